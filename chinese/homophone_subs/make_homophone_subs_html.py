@@ -7,157 +7,363 @@ This script reads homophone_subs.txt and generates an HTML table showing
 one-to-many relationships between simplified and traditional Chinese characters.
 """
 
+import argparse
+import io
+import re
 import sys
-from typing import Dict, List, Tuple, Any
+from bisect import insort
+from pathlib import Path
+from sys import intern
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    TextIO,
+    Tuple,
+    Union,
+)
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from zhgen.cache import add_cache_argument, make_cache  # noqa: E402
+from zhgen.minify import ArtifactWriter, add_artifact_arguments  # noqa: E402
+from zhgen.pages import open_atomic  # noqa: E402
+from zhgen.pinyin import to_numbered  # noqa: E402
+from zhgen.shards import shard_directory, write_shards  # noqa: E402
+from zhgen.stats import (  # noqa: E402
+    NULL_STATS,
+    Stats,
+    add_stats_argument,
+    make_stats,
+)
 
 
 DATA_FILE = "homophone_subs.txt"
+SHARD_DIR = "homophone_table"
+
+
+class Entry(NamedTuple):
+    """A simplified character line: "g-031 发 fa1"."""
+
+    code: str
+    simplified: str
+    pinyin: str  # numbered, e.g. "fa1"
+
+
+class Variant(NamedTuple):
+    """A traditional character line: "\\t發 [fā] launch, start"."""
+
+    traditional: str
+    pinyin: str  # as written, e.g. "fā"
+    meaning: str
+
+
+class Example(NamedTuple):
+    """An example line: "\\t\\t出發 [chūfā] to head off"."""
+
+    word: str
+    pinyin: str  # as written, e.g. "chūfā"
+    meaning: str
+
+
+Record = Union[Entry, Variant, Example]
+
+
+class TraditionalChar:
+    """A traditional character of an entry, with its examples in file order."""
+
+    __slots__ = ("traditional", "pinyin", "meaning", "examples")
+
+    def __init__(self, traditional: str, pinyin: str, meaning: str):
+        self.traditional = traditional
+        self.pinyin = pinyin  # as written, e.g. "fā"
+        self.meaning = meaning
+        self.examples: List[Example] = []
+
+    def __repr__(self):
+        return f"TraditionalChar({self.traditional!r}, {self.pinyin!r})"
+
+    # Pickled as a plain tuple, which is smaller and faster than the
+    # default dict of slots.
+    def __getstate__(self):
+        return (self.traditional, self.pinyin, self.meaning, self.examples)
+
+    def __setstate__(self, state):
+        self.traditional, self.pinyin, self.meaning, self.examples = state
+
+
+class SimplifiedChar:
+    """
+    A simplified character entry and its traditional characters.
+
+    Attributes:
+        variants: Traditional character -> TraditionalChar
+        traditional: Keys of variants, sorted
+        rows: Number of examples over all variants; the rowspan of the
+            entry's first cell
+    """
+
+    __slots__ = ("code", "simplified", "pinyin", "variants", "traditional", "rows")
+
+    def __init__(self, code: str, simplified: str, pinyin: str):
+        self.code = code
+        self.simplified = simplified
+        self.pinyin = pinyin  # numbered, e.g. "fa1"
+        self.variants: Dict[str, TraditionalChar] = {}
+        self.traditional: List[str] = []
+        self.rows = 0
+
+    def __repr__(self):
+        return f"SimplifiedChar({self.simplified!r}, {self.pinyin!r})"
+
+    def __getstate__(self):
+        return (self.code, self.simplified, self.pinyin, self.variants, self.rows)
+
+    def __setstate__(self, state):
+        self.code, self.simplified, self.pinyin, self.variants, self.rows = state
+        self.traditional = sorted(self.variants)
 
 
 class HomophoneData:
-    """Container for homophone substitution data."""
+    """
+    Container for homophone substitution data.
 
-    def __init__(self):
-        self.lookup: Dict[Tuple[str, str], Dict[str, List[Tuple[str, str]]]] = {}
+    Entries are keyed by (numbered pinyin, simplified character). The keys
+    are only sorted again after one is added out of order.
+
+    simplified_for(), find_example() and read_as() look entries up from
+    the other side with one dict access each. Their indexes are built
+    together, in one pass, by the first such lookup and kept until the
+    data changes. The table never needs them, so neither parsing nor
+    loading from the cache pays for them.
 
-    def add_simplified_char(self, pinyin: str, simplified: str):
+    Attributes:
+        entries: (pinyin, simplified) -> SimplifiedChar
+    """
+
+    def __init__(self):
+        self.entries: Dict[Tuple[str, str], SimplifiedChar] = {}
+        self._keys: List[Tuple[str, str]] = []
+        self._keys_sorted = True
+        self._indexes: Optional[Tuple[dict, dict, dict]] = None
+
+    @property
+    def keys(self) -> List[Tuple[str, str]]:
+        """Keys of entries, sorted."""
+        if not self._keys_sorted:
+            self._keys.sort()
+            self._keys_sorted = True
+        return self._keys
+
+    def __getstate__(self):
+        return list(self.entries.values())
+
+    def __setstate__(self, entries):
+        self.__init__()
+        self.entries = {(entry.pinyin, entry.simplified): entry for entry in entries}
+        self._keys = list(self.entries)
+        self._keys_sorted = False
+
+    def add_entry(self, record: Entry) -> SimplifiedChar:
+        """Add a simplified character entry, replacing one with the same key."""
+        key = (record.pinyin, record.simplified)
+        if key not in self.entries:
+            # Inserting in place would move half the list every time.
+            if self._keys_sorted and self._keys and key < self._keys[-1]:
+                self._keys_sorted = False
+            self._keys.append(key)
+        entry = self.entries[key] = SimplifiedChar(*record)
+        self._indexes = None
+        return entry
+
+    def add_variant(self, entry: SimplifiedChar, record: Variant) -> TraditionalChar:
+        """Add a traditional character to an entry, replacing one it has."""
+        traditional = record.traditional
+        old = entry.variants.get(traditional)
+        if old is None:
+            insort(entry.traditional, traditional)
+        else:
+            entry.rows -= len(old.examples)
+        variant = entry.variants[traditional] = TraditionalChar(*record)
+        self._indexes = None
+        return variant
+
+    def add_example_record(
+        self, entry: SimplifiedChar, variant: TraditionalChar, record: Example
+    ):
+        """Add an example to a traditional character of an entry."""
+        variant.examples.append(record)
+        entry.rows += 1
+        self._indexes = None
+
+    def add_simplified_char(
+        self, pinyin: str, simplified: str, code: str = ""
+    ) -> SimplifiedChar:
         """Add a simplified character entry."""
-        self.lookup[(pinyin, simplified)] = {}
+        return self.add_entry(Entry(code, intern(simplified), intern(pinyin)))
 
     def add_traditional_char(
-        self, pinyin: str, simplified: str, traditional: str, meaning: str
-    ):
+        self,
+        pinyin: str,
+        simplified: str,
+        traditional: str,
+        meaning: str,
+        trad_pinyin: str = "",
+    ) -> TraditionalChar:
         """Add a traditional character entry."""
-        self.lookup[(pinyin, simplified)][traditional] = []
+        return self.add_variant(
+            self.entries[(pinyin, simplified)],
+            Variant(intern(traditional), intern(trad_pinyin), meaning),
+        )
 
     def add_example(
-        self, pinyin: str, simplified: str, traditional: str, example: str, meaning: str
+        self,
+        pinyin: str,
+        simplified: str,
+        traditional: str,
+        example: str,
+        meaning: str,
+        example_pinyin: str = "",
     ):
         """Add an example word/phrase."""
-        self.lookup[(pinyin, simplified)][traditional].append((example, meaning))
+        entry = self.entries[(pinyin, simplified)]
+        self.add_example_record(
+            entry,
+            entry.variants[traditional],
+            Example(intern(example), example_pinyin, meaning),
+        )
+
+    def _index(self) -> Tuple[dict, dict, dict]:
+        """Return the reverse indexes, building them if needed."""
+        if self._indexes is None:
+            by_traditional: Dict[str, List[SimplifiedChar]] = {}
+            by_example: Dict[str, List[Tuple[SimplifiedChar, TraditionalChar]]] = {}
+            by_pinyin: Dict[str, List[SimplifiedChar]] = {}
+            for entry in self.entries.values():
+                by_pinyin.setdefault(entry.pinyin, []).append(entry)
+                for variant in entry.variants.values():
+                    by_traditional.setdefault(variant.traditional, []).append(entry)
+                    for example in variant.examples:
+                        by_example.setdefault(example.word, []).append((entry, variant))
+            self._indexes = (by_traditional, by_example, by_pinyin)
+        return self._indexes
+
+    def simplified_for(self, traditional: str) -> List[SimplifiedChar]:
+        """Return the entries that list a traditional character."""
+        return self._index()[0].get(traditional, [])
 
+    def find_example(self, word: str) -> List[Tuple[SimplifiedChar, TraditionalChar]]:
+        """Return the (entry, variant) pairs that list an example word."""
+        return self._index()[1].get(word, [])
 
-def read_data(filename: str) -> HomophoneData:
+    def read_as(self, pinyin: str) -> List[SimplifiedChar]:
+        """Return the entries read as a numbered pinyin, e.g. "fa1"."""
+        return self._index()[2].get(pinyin, [])
+
+
+# Lines starting with one of these are not entries of the table.
+EXCLUDED_STARTS = frozenset("'赞熏腌曲")
+
+# One pattern per indentation level, matched after the leading tabs:
+# "g-031 发 fa1" (more fields may follow), then "發 [fā] meaning" twice.
+_ENTRY_RE = re.compile(r"\s*([^\W\d_]-\d+)\s+(\S+)\s+(\S+)")
+_GLOSS_RE = re.compile(r"(.*?) \[(.*?)\] (.*)")
+_LINE_RES = (_ENTRY_RE, _GLOSS_RE, _GLOSS_RE)
+
+# Parser states: what the last record was, and so what may follow it.
+_START, _IN_ENTRY, _IN_VARIANT = range(3)
+
+
+def parse_records(lines: Iterable[str], stats: Stats = NULL_STATS) -> Iterator[Record]:
+    """
+    Parse homophone_subs.txt lines into records, in a single pass.
+
+    The indentation of a line, in tabs, gives its kind: an Entry at the
+    left margin, a Variant of the last entry under one tab and an Example
+    of the last variant under two. A variant before any entry, or an
+    example before any variant of the current entry, is skipped, as is a
+    line that does not parse; neither changes what later lines belong to.
+
+    Args:
+        lines: Lines of the file, with or without their line endings
+        stats: Receives line, record and skip counters
+
+    Yields:
+        Entry, Variant and Example records, in file order; a Variant
+        belongs to the last Entry yielded and an Example to the last
+        Variant
+    """
+    state = _START
+    counts = [0, 0, 0]  # entries, variants, examples
+    line_count = 0
+    try:
+        for line_count, line in enumerate(lines, 1):
+            line = line.rstrip("\n\r")
+            if not line:
+                stats.skip("blank")
+                continue
+            if line[0] in EXCLUDED_STARTS:
+                stats.skip("excluded")
+                continue
+
+            depth = len(line) - len(line.lstrip("\t"))
+            if depth > 2:
+                stats.skip("too_deep")
+                continue
+            if depth > state:
+                stats.skip("orphan_variant" if depth == 1 else "orphan_example")
+                continue
+            match = _LINE_RES[depth].match(line, depth)
+            if match is None:
+                stats.skip(("bad_entry", "bad_variant", "bad_example")[depth])
+                continue
+
+            counts[depth] += 1
+            # Characters and readings repeat, so they are interned.
+            if depth == 0:
+                code, simplified, pinyin = match.groups()
+                state = _IN_ENTRY
+                yield Entry(code, intern(simplified), intern(to_numbered(pinyin)))
+            elif depth == 1:
+                traditional, pinyin, meaning = match.groups()
+                state = _IN_VARIANT
+                yield Variant(intern(traditional), intern(pinyin), meaning)
+            else:
+                word, pinyin, meaning = match.groups()
+                yield Example(intern(word), pinyin, meaning)
+    finally:
+        # Counted once at the end; a per-line call costs more than the match.
+        stats.count("lines", line_count)
+        for name, count in zip(("entries", "variants", "examples"), counts):
+            stats.count(name, count)
+
+
+def read_data(filename: str, stats: Stats = NULL_STATS) -> HomophoneData:
     """
     Read input data into a structured format.
 
     Args:
         filename: Path to the input data file
+        stats: Receives the "parse" stage time and parse_records() counters
 
     Returns:
         HomophoneData object containing the parsed data
-
-    Raises:
-        FileNotFoundError: If the input file doesn't exist
-        ValueError: If the data format is invalid
     """
     data = HomophoneData()
 
     try:
-        with open(filename, "r", encoding="utf-8") as f:
-            current_simp = None
-            current_trad = None
-
-            for line_num, original_line in enumerate(f, 1):
-                line = original_line.rstrip("\n\r")
-
-                if not line:
-                    continue
-
-                # Skip lines that don't follow the expected pattern
-                if (
-                    line.startswith("'")
-                    or line.startswith("赞")
-                    or line.startswith("熏")
-                    or line.startswith("腌")
-                    or line.startswith("曲")
-                ):
-                    continue
-
-                # Count leading tabs to determine indentation level
-                leading_tabs = 0
-                for char in line:
-                    if char == "\t":
-                        leading_tabs += 1
-                    else:
-                        break
-
-                if leading_tabs == 0:
-                    # This is a line like "g-031 发 fa1" or "u-005 板 ban3"
-                    try:
-                        parts = line.split()
-                        if len(parts) >= 3:
-                            # Format: "g-031 发 fa1" where first part is code, second is char, third is pinyin
-                            code, simp, pinyin = parts[:3]
-
-                            # Validate that we have a proper code format (letter-number)
-                            if (
-                                code[0].isalpha()
-                                and code[1] == "-"
-                                and code[2:].isdigit()
-                            ):
-                                current_simp = (
-                                    pinyin,
-                                    simp,
-                                )  # Store the raw character, not HTML
-                                data.add_simplified_char(pinyin, simp)
-
-                    except (ValueError, IndexError) as e:
-                        # Skip problematic lines
-                        continue
-
-                elif leading_tabs == 1:
-                    # This is a line like "\t發 [fā] launch, start." (single tab)
-                    try:
-                        if current_simp is None:
-                            continue  # Skip if no simplified character is set
-
-                        stripped_line = line.lstrip("\t")
-                        if " [" not in stripped_line or "]" not in stripped_line:
-                            continue
-
-                        trad, rest = stripped_line.split(" [", 1)
-                        if "]" not in rest:
-                            continue
-
-                        trad_pinyin, meaning = rest.split("] ", 1)
-                        current_trad = trad
-                        # Use the simplified character's pinyin for consistency
-                        data.add_traditional_char(
-                            current_simp[0], current_simp[1], trad, meaning
-                        )
-
-                    except (ValueError, IndexError) as e:
-                        # Skip problematic lines
-                        continue
-
-                elif leading_tabs == 2:
-                    # This is a line like "\t\t出發 [chūfā] to head off" (double tab)
-                    try:
-                        if current_simp is None or current_trad is None:
-                            continue  # Skip if no simplified or traditional character is set
-
-                        stripped_line = line.lstrip("\t")
-                        if " [" not in stripped_line or "]" not in stripped_line:
-                            continue
-
-                        example, rest = stripped_line.split(" [", 1)
-                        if "]" not in rest:
-                            continue
-
-                        example_pinyin, meaning = rest.split("] ", 1)
-                        # Use the simplified character's pinyin for consistency
-                        data.add_example(
-                            current_simp[0],
-                            current_simp[1],
-                            current_trad,
-                            example,
-                            meaning,
-                        )
-
-                    except (ValueError, IndexError) as e:
-                        # Skip problematic lines
-                        continue
+        with open(filename, "r", encoding="utf-8") as f, stats.stage("parse"):
+            entry = variant = None
+            for record in parse_records(f, stats):
+                if type(record) is Entry:
+                    entry = data.add_entry(record)
+                elif type(record) is Variant:
+                    variant = data.add_variant(entry, record)
+                else:
+                    data.add_example_record(entry, variant, record)
 
     except FileNotFoundError:
         print(f"Error: Input file '{filename}' not found.", file=sys.stderr)
@@ -172,21 +378,7 @@ def read_data(filename: str) -> HomophoneData:
     return data
 
 
-def generate_html_table(data: HomophoneData) -> str:
-    """
-    Generate the HTML table from the parsed data.
-
-    Args:
-        data: HomophoneData object containing the parsed data
-
-    Returns:
-        HTML string containing the complete table
-    """
-    html_lines = []
-
-    # Table header
-    html_lines.append(
-        """<table>
+TABLE_HEAD = """<table>
   <thead>
     <tr>
       <th width="10%">Simplified Character</th>
@@ -195,18 +387,30 @@ def generate_html_table(data: HomophoneData) -> str:
     </tr>
   </thead>
   <tbody>"""
-    )
+TABLE_TAIL = "  </tbody>\n</table>"
 
-    # Generate table rows
-    for pinyin, simp in sorted(data.lookup.keys()):
-        # Count total rows for this simplified character
-        total_rows = sum(
-            len(examples) for examples in data.lookup[(pinyin, simp)].values()
-        )
 
+def row_groups(data: HomophoneData):
+    """
+    Yield the table rows of each simplified character, in table order.
+
+    Args:
+        data: HomophoneData object containing the parsed data
+
+    Yields:
+        (pinyin, HTML lines, number of rows) per simplified character that
+        has examples
+    """
+    for key in data.keys:
+        entry = data.entries[key]
+        total_rows = entry.rows
         if total_rows == 0:
             continue  # Skip entries with no examples
 
+        pinyin, simp = key
+        variants = entry.variants
+        html_lines = []
+
         # Print simplified character header
         html_lines.append(
             f'    <tr><th rowspan={total_rows}><span class="simp char">{simp}</span></th>'
@@ -214,8 +418,8 @@ def generate_html_table(data: HomophoneData) -> str:
 
         # Print traditional characters and examples
         first_trad = True
-        for trad in sorted(data.lookup[(pinyin, simp)].keys()):
-            examples = data.lookup[(pinyin, simp)][trad]
+        for trad in entry.traditional:
+            examples = variants[trad].examples
 
             if not examples:
                 continue  # Skip traditional characters with no examples
@@ -227,7 +431,7 @@ def generate_html_table(data: HomophoneData) -> str:
             trad_entry = f'<span class="trad char">{trad}</span> [<span class="pinyin">{pinyin}</span>]'
             html_lines.append(f"      <td rowspan={len(examples)}>{trad_entry}</td>")
 
-            for i, (example, meaning) in enumerate(examples):
+            for i, (example, _, meaning) in enumerate(examples):
                 if i > 0:
                     html_lines.append("    <tr>")
                 example_entry = f'<span class="trad">{example}</span> [<span class="pinyin">{pinyin}</span>] {meaning}'
@@ -235,24 +439,153 @@ def generate_html_table(data: HomophoneData) -> str:
 
             first_trad = False
 
-    # Close table
-    html_lines.append("  </tbody>\n</table>")
+        yield pinyin, html_lines, total_rows
+
+
+def write_html_table(data: HomophoneData, out: TextIO):
+    """
+    Write the HTML table to a file object as it is generated.
+
+    Only the rows of one simplified character are held at a time, so memory
+    use does not grow with the table.
+
+    Args:
+        data: HomophoneData object containing the parsed data
+        out: Where to write; no newline follows the table
+    """
+    out.write(TABLE_HEAD)
+    for _, group_lines, _ in row_groups(data):
+        out.write("\n")
+        out.write("\n".join(group_lines))
+    out.write("\n")
+    out.write(TABLE_TAIL)
+
+
+def generate_html_table(data: HomophoneData) -> str:
+    """
+    Generate the HTML table from the parsed data.
+
+    Args:
+        data: HomophoneData object containing the parsed data
+
+    Returns:
+        HTML string containing the complete table
+    """
+    buffer = io.StringIO()
+    write_html_table(data, buffer)
+    return buffer.getvalue()
+
+
+def shard_key(pinyin: str) -> str:
+    """Return the shard of a numbered pinyin: its first letter."""
+    first = pinyin[:1]
+    return first if "a" <= first <= "z" else "other"
 
-    return "\n".join(html_lines)
 
+def write_table_shards(
+    directory: str,
+    data: HomophoneData,
+    stats: Stats = NULL_STATS,
+    writer: Optional[ArtifactWriter] = None,
+) -> Dict[str, Any]:
+    """
+    Write the table as one fragment per first letter of the pinyin plus a
+    manifest; see zhgen.shards. The fragments joined in order, with the
+    newline that printing the table adds, give generate_html_table(),
+    minified if writer minifies.
+    """
+    # Rows are sorted by pinyin, so each first letter is one contiguous run.
+    shards: List[List[Any]] = []  # [key, HTML lines, number of rows]
+    for pinyin, group_lines, rows in row_groups(data):
+        key = shard_key(pinyin)
+        if not shards or shards[-1][0] != key:
+            shards.append([key, [], 0])
+        shards[-1][1].extend(group_lines)
+        shards[-1][2] += rows
+    return write_shards(
+        directory,
+        TABLE_HEAD + "\n",
+        (
+            (key, "\n".join(group_lines) + "\n", rows)
+            for key, group_lines, rows in shards
+        ),
+        TABLE_TAIL + "\n",
+        stats,
+        writer,
+    )
 
-def main():
+
+def main(argv=None):
     """Main function to process the data and generate HTML."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--output",
+        "-o",
+        metavar="FILE",
+        help="write the table to FILE instead of standard output; the file "
+        "is replaced only once the whole table has been generated",
+    )
+    parser.add_argument(
+        "--shards",
+        action="store_true",
+        help="write the table as a directory of fragments, one per first "
+        "letter of the pinyin, plus manifest.json, named after --output "
+        f"(default {SHARD_DIR}/)",
+    )
+    add_artifact_arguments(parser)
+    add_cache_argument(parser)
+    add_stats_argument(parser)
+    args = parser.parse_args(argv)
+    if args.gzip and not (args.output or args.shards):
+        parser.error("--gzip needs --output or --shards")
+    stats = make_stats("make_homophone_subs_html.py", args.stats)
+    writer = ArtifactWriter(args.minify, args.gzip, stats)
+
     print("Reading data from", DATA_FILE, "...", file=sys.stderr)
 
     try:
-        data = read_data(DATA_FILE)
-        print(f"Processed {len(data.lookup)} simplified characters", file=sys.stderr)
+        data = make_cache(args.no_cache).load(
+            "make_homophone_subs_html",
+            __file__,
+            DATA_FILE,
+            lambda: read_data(DATA_FILE, stats),
+            stats=stats,
+        )
+        print(f"Processed {len(data.entries)} simplified characters", file=sys.stderr)
+
+        if args.shards:
+            directory = shard_directory(args.output) if args.output else SHARD_DIR
+            print(f"Writing HTML fragments to {directory}/...", file=sys.stderr)
+            with stats.stage("write"):
+                manifest = write_table_shards(directory, data, stats, writer)
+            print(f"Wrote {len(manifest['shards'])} fragments", file=sys.stderr)
+            writer.report(f"{directory}/")
+            stats.write(args.stats)
+            return
 
         print("Generating HTML table...", file=sys.stderr)
-        html_table = generate_html_table(data)
-
-        print(html_table)
+        if writer.enabled:
+            # Minifying and compressing need the whole table.
+            with stats.stage("render"):
+                html_table = generate_html_table(data)
+            with stats.stage("write"):
+                if args.output:
+                    writer.write(args.output, html_table + "\n")
+                else:
+                    print(writer.process(html_table))
+            if args.output:
+                writer.report(args.output)
+        else:
+            # Rows go out as they are generated.
+            with stats.stage("render"):
+                if args.output:
+                    with open_atomic(args.output) as f:
+                        write_html_table(data, f)
+                        f.write("\n")
+                else:
+                    write_html_table(data, sys.stdout)
+                    sys.stdout.write("\n")
+        stats.write(args.stats)
 
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
@@ -12,8 +12,39 @@ The output file translit_char_freqs_pronunciation.txt contains:
 character<tab>frequency<tab>pinyin-with-tone
 """
 
+import argparse
+import hashlib
+import os
+import pickle
 import sys
-from collections import defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from zhgen.cache import gc_paused  # noqa: E402
+from zhgen.counts import PairCounter  # noqa: E402
+from zhgen.pages import open_atomic  # noqa: E402
+from zhgen.pinyin import split_syllables  # noqa: E402
+from zhgen.sources import source_digest  # noqa: E402
+from zhgen.stats import (  # noqa: E402
+    NULL_STATS,
+    Stats,
+    add_stats_argument,
+    make_stats,
+)
+from zhgen.tsv import ColumnReader, write_rows  # noqa: E402
+
+# Files smaller than this are not worth splitting across processes.
+SHARD_MIN_BYTES = 1 << 20
+
+DATA_FILES = ["name_translit.txt", "country_translit.txt"]
+OUTPUT_FILE = "translit_char_freqs_pronunciation.txt"
+
+# Per-file counts and content hashes from the last run; see
+# process_data_files_incremental().
+CHECKPOINT_FILE = "translit_char_freqs.checkpoint.pickle"
+# Bump when the layout of the stored file states changes; changes to the
+# counting code are caught by checkpoint_header().
+CHECKPOINT_VERSION = 2
 
 
 def parse_pinyin_with_tones(pinyin_text):
@@ -26,90 +57,17 @@ def parse_pinyin_with_tones(pinyin_text):
     Returns:
         list: List of syllables with tone numbers
     """
-    # Split by spaces first to get individual syllables
-    syllables = []
-    for syllable in pinyin_text.split():
-        if not syllable:
-            continue
-
-        # Convert tone marks to numbers
-        tone_mark_to_number = {
-            "ā": "a1",
-            "á": "a2",
-            "ǎ": "a3",
-            "à": "a4",
-            "ē": "e1",
-            "é": "e2",
-            "ě": "e3",
-            "è": "e4",
-            "ī": "i1",
-            "í": "i2",
-            "ǐ": "i3",
-            "ì": "i4",
-            "ō": "o1",
-            "ó": "o2",
-            "ǒ": "o3",
-            "ò": "o4",
-            "ū": "u1",
-            "ú": "u2",
-            "ǔ": "u3",
-            "ù": "u4",
-            "ǖ": "v1",
-            "ǘ": "v2",
-            "ǚ": "v3",
-            "ǜ": "v4",
-            "Ā": "a1",
-            "Á": "a2",
-            "Ǎ": "a3",
-            "À": "a4",
-            "Ē": "e1",
-            "É": "e2",
-            "Ě": "e3",
-            "È": "e4",
-            "Ī": "i1",
-            "Í": "i2",
-            "Ǐ": "i3",
-            "Ì": "i4",
-            "Ō": "o1",
-            "Ó": "o2",
-            "Ŏ": "o3",
-            "Ò": "o4",
-            "Ū": "u1",
-            "Ú": "u2",
-            "Ŭ": "u3",
-            "Ù": "u4",
-            "Ǖ": "v1",
-            "Ǘ": "v2",
-            "Ǚ": "v3",
-            "Ǜ": "v4",
-        }
-
-        # Find which tone mark is in this syllable
-        tone_number = "1"  # default
-        for mark, replacement in tone_mark_to_number.items():
-            if mark in syllable:
-                tone_number = replacement[-1]  # Get the tone number
-                # Replace the tone mark with the base letter
-                base_letter = replacement[:-1]  # Get the base letter
-                syllable = syllable.replace(mark, base_letter)
-                break
-
-        # Add tone number if not already present
-        if not syllable[-1].isdigit():
-            syllable += tone_number
+    return split_syllables(pinyin_text)
 
-        syllables.append(syllable)
 
-    return syllables
-
-
-def extract_characters_and_pinyin(chinese_text, pinyin_text):
+def extract_characters_and_pinyin(chinese_text, pinyin_text, stats=NULL_STATS):
     """
     Extract individual characters and their corresponding pinyin.
 
     Args:
         chinese_text (str): Chinese character text
         pinyin_text (str): Corresponding pinyin text
+        stats (Stats): Records lines where the counts do not match
 
     Returns:
         list: List of (character, pinyin) tuples
@@ -119,6 +77,11 @@ def extract_characters_and_pinyin(chinese_text, pinyin_text):
 
     # Extract individual Chinese characters
     characters = list(chinese_text)
+    if len(characters) != len(pinyin_syllables):
+        if len(characters) > len(pinyin_syllables):
+            stats.count("mismatch.more_chars")
+        else:
+            stats.count("mismatch.more_syllables")
 
     # Match characters to pinyin syllables
     char_pinyin_pairs = []
@@ -135,43 +98,65 @@ def extract_characters_and_pinyin(chinese_text, pinyin_text):
     return char_pinyin_pairs
 
 
-def process_data_file(filename, char_frequencies):
+def read_range(filename, char_frequencies, start=0, end=None, stats=NULL_STATS):
     """
-    Process a data file and update character frequencies.
+    Count character-pinyin pairs in a byte range of a data file.
+
+    The file is memory-mapped and only the Hanzi and Pinyin columns of each
+    data line are decoded; see zhgen.tsv.ColumnReader.
 
     Args:
         filename (str): Path to the data file
-        char_frequencies (defaultdict): Dictionary to store character frequencies
+        char_frequencies (PairCounter): Counter to store character frequencies
+        start (int): First byte; must be the start of a line
+        end (int): End of the range (default: end of file)
+        stats (Stats): Receives the "parse" stage time and line counters
+
+    Returns:
+        tuple: (number of lines read, list of (line_num, line) pairs that
+        had insufficient data, numbered from start)
     """
-    try:
-        with open(filename, "r", encoding="utf-8") as f:
-            for line_num, line in enumerate(f, 1):
-                line = line.strip()
+    reader = ColumnReader(filename, (1, 2), start, end)
+    add_pairs = char_frequencies.add_pairs
+    with stats.stage("parse"):
+        for chinese, pinyin in reader:
+            # Convert pinyin to lowercase to ignore capitalization
+            pinyin = pinyin.lower()
+
+            # Extract character-pinyin pairs
+            char_pinyin_pairs = extract_characters_and_pinyin(chinese, pinyin, stats)
 
-                # Skip comments and empty lines
-                if not line or line.startswith("#"):
-                    continue
+            # Update frequencies
+            add_pairs(char_pinyin_pairs)
 
-                # Split by tabs
-                parts = line.split("\t")
-                if len(parts) < 3:
-                    print(
-                        f"Warning: Line {line_num} in {filename} has insufficient data: {line}",
-                        file=sys.stderr,
-                    )
-                    continue
+    stats.count("lines", reader.line_count)
+    stats.skip("blank", reader.blank_count)
+    stats.skip("comment", reader.comment_count)
+    stats.skip("insufficient_data", len(reader.skipped))
+    return reader.line_count, reader.skipped
 
-                _, chinese, pinyin = parts[:3]
 
-                # Convert pinyin to lowercase to ignore capitalization
-                pinyin = pinyin.lower()
+def warn_skipped(filename, skipped):
+    """Print a warning for each line that had insufficient data."""
+    for line_num, line in skipped:
+        print(
+            f"Warning: Line {line_num} in {filename} has insufficient data: {line}",
+            file=sys.stderr,
+        )
 
-                # Extract character-pinyin pairs
-                char_pinyin_pairs = extract_characters_and_pinyin(chinese, pinyin)
 
-                # Update frequencies
-                for char, pinyin_syllable in char_pinyin_pairs:
-                    char_frequencies[(char, pinyin_syllable)] += 1
+def process_data_file(filename, char_frequencies, stats=NULL_STATS):
+    """
+    Process a data file and update character frequencies.
+
+    Args:
+        filename (str): Path to the data file
+        char_frequencies (PairCounter): Counter to store character frequencies
+        stats (Stats): Instrumentation for --stats
+    """
+    try:
+        _, skipped = read_range(filename, char_frequencies, stats=stats)
+        warn_skipped(filename, skipped)
 
     except FileNotFoundError:
         print(f"Error: File '{filename}' not found.", file=sys.stderr)
@@ -181,48 +166,475 @@ def process_data_file(filename, char_frequencies):
         sys.exit(1)
 
 
-def main():
-    """Main function to process all data files and generate frequency output."""
-    data_files = ["name_translit.txt", "country_translit.txt"]
+def shard_ranges(filename, shards, start=0, end=None):
+    """
+    Split a byte range of a file into ranges that end on line boundaries.
 
-    print("Processing transliteration data files...")
+    Args:
+        filename (str): Path to the data file
+        shards (int): Desired number of shards
+        start (int): First byte of the range; must be the start of a line
+        end (int): End of the range (default: end of file); must be the end
+            of a line or the end of the file
+
+    Returns:
+        list: (start, end) byte offsets covering the range, in order
+    """
+    if end is None:
+        end = os.path.getsize(filename)
+    size = end - start
+    shards = max(1, min(shards, size // SHARD_MIN_BYTES or 1))
+    boundaries = [start]
+    with open(filename, "rb") as f:
+        for i in range(1, shards):
+            offset = start + size * i // shards
+            if offset <= boundaries[-1]:
+                continue
+            f.seek(offset)
+            f.readline()  # move to the start of the next line
+            offset = f.tell()
+            if offset >= end:
+                break
+            if offset > boundaries[-1]:
+                boundaries.append(offset)
+    boundaries.append(end)
+    return list(zip(boundaries, boundaries[1:]))
+
+
+def count_shard(filename, start, end, stats=NULL_STATS):
+    """
+    Count character-pinyin pairs in one byte range of a data file.
+
+    Insertion order of the returned counter follows first appearance in the
+    shard, so merging shards in file order reproduces the serial ordering
+    exactly.
+
+    Returns:
+        tuple: (counts, number of lines read, skipped lines with line
+        numbers relative to the start of the shard)
+    """
+    counts = PairCounter()
+    line_count, skipped = read_range(filename, counts, start, end, stats)
+    return counts, line_count, skipped
+
+
+def count_shard_worker(filename, start, end, collect_stats):
+    """
+    Run count_shard() in a worker process.
+
+    Returns:
+        tuple: count_shard()'s result plus the worker's stats report, or
+        None if collect_stats is false
+    """
+    stats = Stats("worker") if collect_stats else NULL_STATS
+    counts, line_count, skipped = count_shard(filename, start, end, stats)
+    return counts, line_count, skipped, stats.report() if collect_stats else None
+
+
+def count_byte_range(filename, start, end, jobs=1, stats=NULL_STATS):
+    """
+    Count character-pinyin pairs in a byte range, in parallel if worthwhile.
+
+    Args:
+        filename (str): Path to the data file
+        start (int): First byte; must be the start of a line
+        end (int): End of the range; must be the end of a line or the file
+        jobs (int): Number of worker processes
+        stats (Stats): Instrumentation for --stats
+
+    Returns:
+        tuple: (counts, number of lines read, skipped lines with line
+        numbers relative to start)
+    """
+    ranges = shard_ranges(filename, jobs, start, end) if jobs > 1 else [(start, end)]
+    if len(ranges) == 1:
+        return count_shard(filename, start, end, stats)
+
+    tasks = [(filename, s, e, stats.enabled) for s, e in ranges]
+    # Imported here because it adds tens of milliseconds to startup, which
+    # make_syllabary.py would pay on every run just by importing this module.
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        results = list(executor.map(count_shard_worker, *zip(*tasks)))
+
+    with stats.stage("aggregate"):
+        counts = PairCounter()
+        skipped = []
+        line_count = 0
+        for shard_counts, shard_lines, shard_skipped, report in results:
+            counts.update(shard_counts)
+            skipped.extend((line_count + num, line) for num, line in shard_skipped)
+            line_count += shard_lines
+            if report:
+                stats.merge(report)
+    return counts, line_count, skipped
+
+
+def process_data_files_parallel(filenames, char_frequencies, jobs, stats=NULL_STATS):
+    """
+    Count all data files using a pool of worker processes.
 
-    # Dictionary to store character frequencies: (char, pinyin) -> frequency
-    char_frequencies = defaultdict(int)
+    Each file is split into byte-range shards that are counted independently
+    and then merged in file order, so the result is identical to calling
+    process_data_file() on each file in turn.
 
-    # Process each data file
-    for filename in data_files:
+    Args:
+        filenames (list): Paths to the data files, in processing order
+        char_frequencies (PairCounter): Counter to store character frequencies
+        jobs (int): Number of worker processes
+        stats (Stats): Instrumentation for --stats
+    """
+    for filename in filenames:
         print(f"Processing {filename}...")
-        process_data_file(filename, char_frequencies)
+        try:
+            counts, _, skipped = count_byte_range(
+                filename, 0, os.path.getsize(filename), jobs, stats
+            )
+        except FileNotFoundError:
+            print(f"Error: File '{filename}' not found.", file=sys.stderr)
+            sys.exit(1)
+        except Exception as e:
+            print(f"Error processing {filename}: {e}", file=sys.stderr)
+            sys.exit(1)
+        warn_skipped(filename, skipped)
+        with stats.stage("aggregate"):
+            char_frequencies.update(counts)
+
+
+def file_digest(filename, length):
+    """Return the SHA-256 hex digest of the first length bytes of a file."""
+    digest = hashlib.sha256()
+    with open(filename, "rb") as f:
+        remaining = length
+        while remaining > 0:
+            block = f.read(min(remaining, 1 << 20))
+            if not block:
+                break
+            digest.update(block)
+            remaining -= len(block)
+    return digest.hexdigest()
+
+
+def complete_lines_end(filename, size):
+    """Return the offset just past the last newline in a file (0 if none)."""
+    with open(filename, "rb") as f:
+        position = size
+        while position > 0:
+            step = min(position, 4096)
+            f.seek(position - step)
+            block = f.read(step)
+            index = block.rfind(b"\n")
+            if index >= 0:
+                return position - step + index + 1
+            position -= step
+    return 0
+
+
+def checkpoint_header():
+    """
+    Return the header a checkpoint must start with to be reused.
+
+    It pairs CHECKPOINT_VERSION, which covers the layout of the file states,
+    with a hash of this script and the zhgen modules it imports, which decide
+    the counts. Editing any of them makes the next run recount everything.
+    """
+    return (CHECKPOINT_VERSION, source_digest([__file__]))
+
+
+def load_checkpoint(path):
+    """
+    Load a checkpoint written by save_checkpoint().
+
+    Returns:
+        dict: filename -> file state, or an empty dict if the checkpoint is
+        missing, unreadable or was written by other code
+    """
+    try:
+        with open(path, "rb") as f, gc_paused():
+            if pickle.load(f) != checkpoint_header():
+                return {}
+            files = pickle.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception:
+        # A truncated checkpoint, or one from an older format; it is
+        # rewritten after a full recount.
+        return {}
+    return files if isinstance(files, dict) else {}
+
 
-    # Convert to the required format and sort by frequency
-    output_data = []
-    for (char, pinyin), frequency in char_frequencies.items():
-        output_data.append((char, frequency, pinyin))
+def save_checkpoint(path, files):
+    """
+    Atomically write the per-file states to a checkpoint file.
 
-    # Sort by frequency (descending), then by character
-    output_data.sort(key=lambda x: (-x[1], x[0]))
+    The file holds two pickles: checkpoint_header(), then the states, whose
+    counts are PairCounters and so are stored as their arrays.
+    """
+    with open_atomic(path, binary=True) as f:
+        pickle.dump(checkpoint_header(), f, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(files, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def update_file_state(filename, state, jobs=1, stats=NULL_STATS):
+    """
+    Bring one file's checkpoint state up to date with the file on disk.
+
+    The state covers the file up to its last complete line ("offset"). If
+    the file is unchanged, the stored counts are reused as they are. If it
+    only grew and its first offset bytes still hash to the stored digest,
+    only the new lines are counted. Any other change means a full recount.
+
+    Args:
+        filename (str): Path to the data file
+        state (dict): The file's state from the checkpoint, or None; its
+            counts are updated in place when lines were appended
+        jobs (int): Number of worker processes for counting
+        stats (Stats): Instrumentation for --stats
+
+    Returns:
+        tuple: (new state, how it was brought up to date: "unchanged",
+        "appended" or "full")
+    """
+    stat = os.stat(filename)
+    if (
+        state
+        and state["size"] == stat.st_size
+        and state["mtime_ns"] == stat.st_mtime_ns
+    ):
+        return state, "unchanged"
+
+    with stats.stage("read"):
+        offset = complete_lines_end(filename, stat.st_size)
+        appended = (
+            state is not None
+            and state["offset"] <= offset
+            and file_digest(filename, state["offset"]) == state["sha256"]
+        )
+    if appended:
+        start, first_line_num = state["offset"], state["lines"] + 1
+        how = "appended"
+    else:
+        start, first_line_num = 0, 1
+        how = "full"
+
+    new_counts, line_count, skipped = count_byte_range(
+        filename, start, offset, jobs, stats
+    )
+    warn_skipped(filename, [(first_line_num + num - 1, line) for num, line in skipped])
+    if appended:
+        counts = state["counts"]
+        with stats.stage("aggregate"):
+            counts.update(new_counts)
+    else:
+        counts = new_counts
+
+    with stats.stage("read"):
+        digest = file_digest(filename, offset)
+    new_state = {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "offset": offset,
+        "sha256": digest,
+        "lines": first_line_num - 1 + line_count,
+        "counts": counts,
+    }
+    return new_state, how
+
+
+def process_data_files_incremental(
+    filenames, char_frequencies, checkpoint_path, jobs=1, full=False, stats=NULL_STATS
+):
+    """
+    Count all data files, reusing the counts stored in a checkpoint.
+
+    Counts are kept per file and merged in file order, so the result is
+    identical to a full recount. A trailing line without a newline is never
+    stored in the checkpoint; it is counted afresh on every run. The
+    checkpoint is only rewritten when some file was counted.
+
+    Args:
+        filenames (list): Paths to the data files, in processing order
+        char_frequencies (PairCounter): Counter to store character frequencies
+        checkpoint_path (str): Path of the checkpoint file
+        jobs (int): Number of worker processes for counting
+        full (bool): Ignore the stored checkpoint and recount everything
+        stats (Stats): Instrumentation for --stats
+    """
+    with stats.stage("read"):
+        old_files = {} if full else load_checkpoint(checkpoint_path)
+    new_files = {}
+    changed = set(old_files) != set(filenames)
+    for filename in filenames:
+        try:
+            state, how = update_file_state(
+                filename, old_files.get(filename), jobs, stats
+            )
+        except FileNotFoundError:
+            print(f"Error: File '{filename}' not found.", file=sys.stderr)
+            sys.exit(1)
+        except Exception as e:
+            print(f"Error processing {filename}: {e}", file=sys.stderr)
+            sys.exit(1)
+        print(f"Processing {filename}... ({how})")
+        stats.count(f"files.{how}")
+        new_files[filename] = state
+        changed = changed or how != "unchanged"
+
+        with stats.stage("aggregate"):
+            char_frequencies.update(state["counts"])
+        if state["size"] > state["offset"]:
+            tail_counts, _, skipped = count_shard(
+                filename, state["offset"], state["size"], stats
+            )
+            warn_skipped(
+                filename, [(state["lines"] + num, line) for num, line in skipped]
+            )
+            with stats.stage("aggregate"):
+                char_frequencies.update(tail_counts)
+
+    if changed:
+        with stats.stage("write"):
+            save_checkpoint(checkpoint_path, new_files)
+
+
+def count_frequencies(
+    data_files=DATA_FILES, jobs=1, checkpoint=None, full=False, stats=NULL_STATS
+):
+    """
+    Count character-pinyin pairs in the transliteration files.
+
+    This is the whole counting step of the script without the output file,
+    for callers that want the counts in memory (make_syllabary.py does).
+
+    Args:
+        data_files (list): Transliteration files, counted in this order
+        jobs (int): Number of worker processes
+        checkpoint (str): Checkpoint file for incremental counting, or None
+            to count everything without one
+        full (bool): Ignore the stored checkpoint and recount everything
+        stats (Stats): Instrumentation for --stats
+
+    Returns:
+        PairCounter: (char, pinyin) -> frequency, in first-counted order
+    """
+    char_frequencies = PairCounter()
+    if checkpoint is not None:
+        process_data_files_incremental(
+            data_files, char_frequencies, checkpoint, jobs, full, stats
+        )
+    elif jobs > 1:
+        process_data_files_parallel(data_files, char_frequencies, jobs, stats)
+    else:
+        for filename in data_files:
+            print(f"Processing {filename}...")
+            process_data_file(filename, char_frequencies, stats)
+    return char_frequencies
+
+
+def write_frequencies(rows, filename=OUTPUT_FILE):
+    """
+    Write char<tab>frequency<tab>pinyin lines, replacing the file atomically.
+
+    Args:
+        rows (iterable): (char, frequency, pinyin) rows in output order, such
+            as PairCounter.rows() yields; consumed lazily and written in
+            chunks
+        filename (str): Output path
+
+    Returns:
+        int: Number of rows written
+    """
+    with open_atomic(filename) as f:
+        return write_rows(f, rows)
+
+
+def parse_args(argv=None):
+    """Parse command-line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        metavar="N",
+        help="count with N worker processes (0 = one per CPU; default 1)",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        default=CHECKPOINT_FILE,
+        metavar="PATH",
+        help=f"checkpoint file for incremental updates (default {CHECKPOINT_FILE})",
+    )
+    parser.add_argument(
+        "--no-checkpoint",
+        action="store_true",
+        help="recount everything without reading or writing a checkpoint",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="ignore the stored checkpoint, recount everything and rewrite it",
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        metavar="N",
+        help="write only the N most frequent pairs, selected with a heap "
+        "instead of a full sort",
+    )
+    add_stats_argument(parser)
+    args = parser.parse_args(argv)
+    if args.top is not None and args.top < 0:
+        parser.error("--top must be 0 or a positive number")
+    if args.jobs < 0:
+        parser.error("--jobs must be 0 or a positive number")
+    if args.jobs == 0:
+        args.jobs = os.cpu_count() or 1
+    return args
+
+
+def main(argv=None):
+    """Main function to process all data files and generate frequency output."""
+    args = parse_args(argv)
+    stats = make_stats("generate_frequencies.py", args.stats)
+
+    print("Processing transliteration data files...")
+
+    # Counter to store character frequencies: (char, pinyin) -> frequency
+    char_frequencies = count_frequencies(
+        DATA_FILES,
+        args.jobs,
+        None if args.no_checkpoint else args.checkpoint,
+        args.full,
+        stats,
+    )
+
+    # Sort by frequency (descending), then by character. Rows are produced
+    # lazily and written in chunks as they come.
+    with stats.stage("render"):
+        order = char_frequencies.sorted_indices(args.top)
 
     # Write output file
-    output_filename = "translit_char_freqs_pronunciation.txt"
-    print(f"Writing {len(output_data)} character entries to {output_filename}...")
+    output_filename = OUTPUT_FILE
+    print(f"Writing {len(order)} character entries to {output_filename}...")
 
-    with open(output_filename, "w", encoding="utf-8") as f:
-        for char, frequency, pinyin in output_data:
-            f.write(f"{char}\t{frequency}\t{pinyin}\n")
+    with stats.stage("write"):
+        write_frequencies(char_frequencies.rows_at(order), output_filename)
 
     print(f"Successfully generated {output_filename}")
-    print(f"Total unique character-pinyin combinations: {len(output_data)}")
+    print(f"Total unique character-pinyin combinations: {len(char_frequencies)}")
 
     # Print some statistics
-    total_frequency = sum(freq for _, freq, _ in output_data)
-    print(f"Total character occurrences: {total_frequency}")
+    print(f"Total character occurrences: {char_frequencies.total()}")
 
     # Show top 10 most frequent characters
     print("\nTop 10 most frequent characters:")
-    for i, (char, freq, pinyin) in enumerate(output_data[:10], 1):
+    for i, (char, freq, pinyin) in enumerate(char_frequencies.most_common(10), 1):
         print(f"{i:2d}. {char} ({pinyin}): {freq}")
 
+    stats.write(args.stats)
+
 
 if __name__ == "__main__":
     main()
@@ -11,63 +11,200 @@ This script generates an HTML table showing Chinese characters used for
 transliterating foreign names and words, organized by pinyin syllables.
 """
 
+import argparse
+import contextlib
+import heapq
+import os
 import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from zhgen.cache import add_cache_argument, make_cache  # noqa: E402
+from zhgen.minify import ArtifactWriter, add_artifact_arguments  # noqa: E402
+from zhgen.pages import splice_table, write_atomic  # noqa: E402
+from zhgen.phonology import SYLLABARY_GRID  # noqa: E402
+from zhgen.stats import NULL_STATS, add_stats_argument, make_stats  # noqa: E402
+from generate_frequencies import (  # noqa: E402
+    DATA_FILES,
+    count_frequencies,
+    write_frequencies,
+)
+
 DATA_FILE = "translit_char_freqs_pronunciation.txt"
+PAGE_FILE = "../syllabary.html"
+
 FREQUENT_THRESHOLD = 10
 
+# Cell HTML by whether the character is frequent, filled in by render_cell().
+CELL_TEMPLATES = {
+    True: '<span title="{pinyin}; {freq}{also}" class="frequent">{char}</span>',
+    False: '<span title="{pinyin}; {freq}{also}" class="infrequent">{char}</span>',
+}
 
-def read_data_file(filename):
-    """Read and parse the data file, returning processed data."""
-    char_to_numbered_pinyin = {}  # char -> pinyin (e.g., 尔 -> er3)
-    char_to_frequency = {}  # char -> frequency (e.g., 尔 -> 232)
-    toneless_pinyin_to_char = {}  # toneless pinyin -> char (e.g., er -> 尔)
-    toneless_pinyin_to_html = {}  # toneless pinyin -> HTML span
 
+def parse_line(line, line_num, stats=NULL_STATS):
+    """
+    Parse one line of the data file.
+
+    Args:
+        line (str): A char<tab>freq<tab>pinyin line
+        line_num (int): Line number for warnings
+        stats (Stats): Receives skip counters
+
+    Returns:
+        tuple: (char, freq, pinyin), or None if the line is skipped
+    """
+    line = line.strip()
+    if not line:
+        stats.skip("blank")
+        return None
+    if line.startswith("#"):
+        stats.skip("comment")
+        return None
+
+    values = line.split()
+    if len(values) < 3:
+        print(
+            f"Warning: Line {line_num} has insufficient data: {line}",
+            file=sys.stderr,
+        )
+        stats.skip("insufficient_data")
+        return None
+
+    char, freq_str, pinyin = values
     try:
-        with open(filename, "r", encoding="utf-8") as datafile:
-            for line_num, line in enumerate(datafile, 1):
-                line = line.strip()
-                if not line or line.startswith("#"):
-                    continue
-
-                values = line.split()
-                if len(values) < 3:
-                    print(
-                        f"Warning: Line {line_num} has insufficient data: {line}",
-                        file=sys.stderr,
-                    )
-                    continue
-
-                char, freq_str, pinyin = values
-                try:
-                    freq = int(freq_str)
-                except ValueError:
-                    print(
-                        f"Warning: Invalid frequency on line {line_num}: {freq_str}",
-                        file=sys.stderr,
-                    )
-                    continue
-
-                # Remove tone number to get toneless pinyin
-                toneless_pinyin = pinyin[:-1] if pinyin[-1].isdigit() else pinyin
-
-                char_to_numbered_pinyin[char] = pinyin
-                char_to_frequency[char] = freq
-
-                # Create HTML span with tooltip
-                html = f'<span title="{pinyin}; {freq}" class="{"frequent" if freq > FREQUENT_THRESHOLD else "infrequent"}">{char}</span>'
-
-                # Keep the character with highest frequency for each toneless pinyin
-                if (
-                    toneless_pinyin not in toneless_pinyin_to_char
-                    or freq
-                    > char_to_frequency[toneless_pinyin_to_char[toneless_pinyin]]
-                ):
-                    toneless_pinyin_to_char[toneless_pinyin] = char
-                    toneless_pinyin_to_html[toneless_pinyin] = html
+        freq = int(freq_str)
+    except ValueError:
+        print(
+            f"Warning: Invalid frequency on line {line_num}: {freq_str}",
+            file=sys.stderr,
+        )
+        stats.skip("bad_frequency")
+        return None
+    return char, freq, pinyin
+
+
+def read_rows(datafile, stats=NULL_STATS):
+    """
+    Yield (char, freq, pinyin) for each data line of an open data file.
+
+    Args:
+        datafile: Iterable of lines in the data file format
+        stats (Stats): Receives line and skip counters
+    """
+    line_num = 0
+    for line_num, line in enumerate(datafile, 1):
+        row = parse_line(line, line_num, stats)
+        if row is not None:
+            yield row
+    stats.count("lines", line_num)
+
+
+def rows_from_counts(char_frequencies, stats=NULL_STATS):
+    """
+    Yield (char, freq, pinyin) straight from generate_frequencies.py counts.
+
+    Rows come in the order generate_frequencies.py writes them, so the
+    result is the same as writing DATA_FILE and reading it back. Rows whose
+    character is whitespace or "#" would not survive that round trip intact
+    and go through the line parser instead.
+
+    Args:
+        char_frequencies (PairCounter): Counts from count_frequencies()
+        stats (Stats): Receives pair and skip counters
+    """
+    line_num = 0
+    for line_num, (char, freq, pinyin) in enumerate(char_frequencies.rows(), 1):
+        if char.isspace() or char == "#":
+            row = parse_line(f"{char}\t{freq}\t{pinyin}", line_num, stats)
+            if row is not None:
+                yield row
+        else:
+            yield char, freq, pinyin
+    stats.count("pairs", line_num)
+
+
+def select_syllables(rows, stats=NULL_STATS, alternates=0):
+    """
+    Pick the most frequent character for each toneless syllable.
+
+    Only the winners are kept, as plain records; no HTML is built here.
+    With alternates, the next most frequent characters of each syllable are
+    kept too, in a heap of at most alternates + 1 rows per syllable, so
+    memory stays bounded however long the input is.
+
+    Args:
+        rows (iterable): (char, freq, pinyin) tuples
+        stats (Stats): Receives character counters
+        alternates (int): Number of runner-up characters to keep per syllable
+
+    Returns:
+        dict: toneless pinyin -> (char, freq, pinyin, runners_up) of its
+        winner, where runners_up is a tuple of up to alternates
+        (char, freq, pinyin) rows, most frequent first
+    """
+    char_to_frequency = {}  # char -> frequency (e.g., 尔 -> 232)
+    toneless_pinyin_to_winner = {}  # toneless pinyin -> (char, freq, pinyin)
+    toneless_pinyin_to_heap = {}  # toneless pinyin -> [(freq, -seq, row)]
+    heap_size = alternates + 1 if alternates > 0 else 0
+
+    for seq, row in enumerate(rows):
+        char, freq, pinyin = row
+        # Remove tone number to get toneless pinyin
+        toneless_pinyin = pinyin[:-1] if pinyin[-1].isdigit() else pinyin
+
+        char_to_frequency[char] = freq
+
+        # Keep the character with highest frequency for each toneless pinyin
+        winner = toneless_pinyin_to_winner.get(toneless_pinyin)
+        if winner is None or freq > char_to_frequency[winner[0]]:
+            toneless_pinyin_to_winner[toneless_pinyin] = row
+
+        if heap_size:
+            # Min-heap of the most frequent rows; earlier rows win ties.
+            heap = toneless_pinyin_to_heap.setdefault(toneless_pinyin, [])
+            entry = (freq, -seq, row)
+            if len(heap) < heap_size:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+
+    stats.count("characters", len(char_to_frequency))
+    records = {}
+    for toneless_pinyin, winner in toneless_pinyin_to_winner.items():
+        heap = toneless_pinyin_to_heap.get(toneless_pinyin, ())
+        runners_up = [row for _, _, row in sorted(heap, reverse=True)]
+        runners_up = tuple(row for row in runners_up if row is not winner)
+        records[toneless_pinyin] = (*winner, runners_up[:alternates])
+    return records
+
+
+def render_cell(winner):
+    """
+    Return the HTML span for a winner record.
 
+    Args:
+        winner (tuple): A (char, freq, pinyin, runners_up) record from
+            select_syllables()
+
+    Returns:
+        str: The character in a span with a pinyin/frequency tooltip that
+        also lists the runners-up, if any
+    """
+    char, freq, pinyin, runners_up = winner
+    also = ""
+    if runners_up:
+        also = " (also: " + ", ".join(f"{c} {p}; {f}" for c, f, p in runners_up) + ")"
+    return CELL_TEMPLATES[freq > FREQUENT_THRESHOLD].format(
+        char=char, freq=freq, pinyin=pinyin, also=also
+    )
+
+
+def read_data_file(filename, stats=NULL_STATS, alternates=0):
+    """Read and parse the data file, returning processed data."""
+    try:
+        with open(filename, "r", encoding="utf-8") as datafile, stats.stage("parse"):
+            return select_syllables(read_rows(datafile, stats), stats, alternates)
     except FileNotFoundError:
         print(f"Error: Data file '{filename}' not found.", file=sys.stderr)
         sys.exit(1)
@@ -75,268 +212,214 @@ def read_data_file(filename):
         print(f"Error reading data file: {e}", file=sys.stderr)
         sys.exit(1)
 
-    return toneless_pinyin_to_html
 
+def count_syllables(jobs=1, export=None, stats=NULL_STATS, alternates=0):
+    """
+    Count the transliteration files in this process and select syllables.
+
+    Runs generate_frequencies.py's counting step without going through
+    DATA_FILE. Its progress messages go to stderr so they do not mix with
+    the table on stdout.
+
+    Args:
+        jobs (int): Number of worker processes for counting
+        export (str): Also write the counts to this file in DATA_FILE format
+        stats (Stats): Instrumentation for --stats
+        alternates (int): Runners-up to keep per syllable
+
+    Returns:
+        dict: toneless pinyin -> winner record, as read_data_file() returns
+    """
+    with contextlib.redirect_stdout(sys.stderr):
+        char_frequencies = count_frequencies(DATA_FILES, jobs, stats=stats)
+    if export:
+        with stats.stage("write"):
+            write_frequencies(char_frequencies.rows(), export)
+    with stats.stage("aggregate"):
+        return select_syllables(
+            rows_from_counts(char_frequencies, stats), stats, alternates
+        )
+
+
+def table_rows(syllable_to_winner):
+    """
+    Lay out the table for a dictionary of syllables to winner records.
 
-def generate_spellings():
-    """Generate a 2D list of pinyin spellings.
+    HTML is rendered only for the syllables that have a cell in the table.
 
-    Returns a 2D list where rows are finals and columns are initials.
-    Some combinations will be impossible syllables, which is fine since
-    only syllables with actual data will be displayed.
+    Returns:
+        tuple: (initial names for the header row, list of (final name,
+        list of cell HTML) rows)
+    """
+    rows = []
+    for final_name, spellings in zip(SYLLABARY_GRID.finals, SYLLABARY_GRID.rows):
+        cells = []
+        for spelling in spellings:
+            winner = syllable_to_winner.get(spelling)
+            cells.append("" if winner is None else render_cell(winner))
+        rows.append((final_name, cells))
+    return SYLLABARY_GRID.initials, rows
+
+
+def format_table(initial_names, rows):
+    """Return the table as the HTML fragment printed to stdout."""
+    lines = ["<table>", "<tr><th></th>"]
+    lines.append("".join(f"<th>{initial}</th>" for initial in initial_names) + "</tr>")
+    for final_name, cells in rows:
+        lines.append(f"<tr><th>{final_name}</th>")
+        lines.extend(f"\t<td>{cell}</td>" for cell in cells)
+        lines.append("</tr>")
+    lines.append("</table>")
+    return "\n".join(lines) + "\n"
+
+
+def page_lines(initial_names, rows):
     """
-    zero_initial_finals = [
-        "er",
-        "a",
-        "o",
-        "e",
-        "ai",
-        "ei",
-        "ao",
-        "ou",
-        "an",
-        "en",
-        "ang",
-        "eng",
-        "ong",
-        "yi",
-        "ya",
-        "yao",
-        "ye",
-        "you",
-        "yan",
-        "yin",
-        "yang",
-        "ying",
-        "yong",
-        "wu",
-        "wa",
-        "wo",
-        "wai",
-        "wei",
-        "wan",
-        "wen",
-        "wang",
-        "weng",
-        "yu",
-        "yue",
-        "yuan",
-        "yun",
-        "x",
-    ]
-
-    normal_finals_spellings = [
-        "er",
-        "a",
-        "o",
-        "e",
-        "ai",
-        "ei",
-        "ao",
-        "ou",
-        "an",
-        "en",
-        "ang",
-        "eng",
-        "ong",
-        "i",
-        "ia",
-        "iao",
-        "ie",
-        "iu",
-        "ian",
-        "in",
-        "iang",
-        "ing",
-        "iong",
-        "u",
-        "ua",
-        "uo",
-        "uai",
-        "ui",
-        "uan",
-        "uen",
-        "uang",
-        "ueng",
-        "v",
-        "ve",
-        "ve",
-        "van",
-        "vn",
-        "x",
-    ]
-
-    jqx_finals_spellings = [
-        "er",
-        "a",
-        "o",
-        "e",
-        "ai",
-        "ei",
-        "ao",
-        "ou",
-        "an",
-        "en",
-        "ang",
-        "eng",
-        "ong",
-        "i",
-        "ia",
-        "iao",
-        "ie",
-        "iu",
-        "ian",
-        "in",
-        "iang",
-        "ing",
-        "iong",
-        "x",
-        "ua",
-        "uo",
-        "uai",
-        "ui",
-        "uan",
-        "uen",
-        "uang",
-        "ueng",
-        "u",
-        "ue",
-        "ue",
-        "uan",
-        "un",
-        "x",
-    ]
-
-    syllables = [zero_initial_finals]
-
-    # Add normal initials (b, p, m, f, d, t, n, l, g, k, h, z, c, s, zh, ch, sh, r)
-    for initial in [
-        "b",
-        "p",
-        "m",
-        "f",
-        "d",
-        "t",
-        "n",
-        "l",
-        "g",
-        "k",
-        "h",
-        "z",
-        "c",
-        "s",
-        "zh",
-        "ch",
-        "sh",
-        "r",
-    ]:
-        this_initial_list = [initial + final for final in normal_finals_spellings]
-        syllables.append(this_initial_list)
-
-    # Add j, q, x initials (which have special rules)
-    for initial in ["j", "q", "x"]:
-        this_initial_list = [initial + final for final in jqx_finals_spellings]
-        syllables.append(this_initial_list)
-
-    return syllables
-
-
-def print_pinyin_table(syllable_to_html):
-    """Print the HTML table with the given dictionary of syllables to HTML."""
-    spellings = generate_spellings()
-
-    final_names = [
-        "er",
-        "a",
-        "o",
-        "e",
-        "ai",
-        "ei",
-        "ao",
-        "ou",
-        "an",
-        "en",
-        "ang",
-        "eng",
-        "ong",
-        "i",
-        "ia",
-        "iao",
-        "ie",
-        "iou",
-        "ian",
-        "in",
-        "iang",
-        "ing",
-        "iong",
-        "u",
-        "ua",
-        "uo",
-        "uai",
-        "uei",
-        "uan",
-        "uen",
-        "uang",
-        "ueng",
-        "v",
-        "ve",
-        "ve",
-        "van",
-        "vn",
-    ]
-
-    initial_names = [
-        "-",
-        "b",
-        "p",
-        "m",
-        "f",
-        "d",
-        "t",
-        "n",
-        "l",
-        "g",
-        "k",
-        "h",
-        "z",
-        "c",
-        "s",
-        "zh",
-        "ch",
-        "sh",
-        "r",
-        "j",
-        "q",
-        "x",
-    ]
-
-    print("<table>")
-    print("<tr><th></th>")
+    Yield the table contents as (depth, html) lines for splice_table(),
+    one element per line as in ../syllabary.html.
+    """
+    yield 0, "<tr>"
+    yield 1, "<th></th>"
     for initial in initial_names:
-        print(f"<th>{initial}</th>", end="")
-    print("</tr>")
-
-    for final_index, final_name in enumerate(final_names):
-        print(f"<tr><th>{final_name}</th>")
-        for initial_index in range(len(initial_names)):
-            spelling = spellings[initial_index][final_index]
-            if spelling in syllable_to_html:
-                print(f"\t<td>{syllable_to_html[spelling]}</td>")
-            else:
-                print("\t<td></td>")
-        print("</tr>")
-    print("</table>")
+        yield 1, f"<th>{initial}</th>"
+    yield 0, "</tr>"
+    for final_name, cells in rows:
+        yield 0, "<tr>"
+        yield 1, f"<th>{final_name}</th>"
+        for cell in cells:
+            yield 1, f"<td>{cell}</td>"
+        yield 0, "</tr>"
 
 
-def main():
+def print_pinyin_table(syllable_to_winner):
+    """Print the HTML table for a dictionary of syllables to winner records."""
+    sys.stdout.write(format_table(*table_rows(syllable_to_winner)))
+
+
+def main(argv=None):
     """Main function to process data and generate HTML table."""
-    print(f"Processing data file: {DATA_FILE}")
-    print(f"Frequent threshold: {FREQUENT_THRESHOLD}")
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--from-translit",
+        action="store_true",
+        help=f"count {' and '.join(DATA_FILES)} in this process instead of "
+        f"reading {DATA_FILE}",
+    )
+    parser.add_argument(
+        "--export",
+        nargs="?",
+        const=DATA_FILE,
+        metavar="FILE",
+        help=f"with --from-translit, also write the counts to FILE "
+        f"(default {DATA_FILE})",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=1,
+        metavar="N",
+        help="with --from-translit, count with N worker processes "
+        "(0 = one per CPU; default 1)",
+    )
+    parser.add_argument(
+        "--alternates",
+        "-k",
+        type=int,
+        default=0,
+        metavar="K",
+        help="also list the next K most frequent characters of each syllable "
+        "in its tooltip (default 0)",
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        metavar="FILE",
+        help="write the table fragment to FILE instead of stdout",
+    )
+    parser.add_argument(
+        "--splice",
+        nargs="?",
+        const=PAGE_FILE,
+        metavar="PAGE",
+        help=f"replace the table in PAGE (default {PAGE_FILE}) with the new one; "
+        "the page is never minified or gzipped",
+    )
+    add_artifact_arguments(parser)
+    add_cache_argument(parser)
+    add_stats_argument(parser)
+    args = parser.parse_args(argv)
+    if args.export and not args.from_translit:
+        parser.error("--export requires --from-translit")
+    if args.jobs < 0:
+        parser.error("--jobs must be 0 or a positive number")
+    if args.jobs == 0:
+        args.jobs = os.cpu_count() or 1
+    if args.alternates < 0:
+        parser.error("--alternates must be 0 or a positive number")
+    if args.gzip and not args.output:
+        parser.error("--gzip needs --output")
+    stats = make_stats("make_syllabary.py", args.stats)
+    writer = ArtifactWriter(args.minify, args.gzip, stats)
+    # Progress goes to stdout ahead of the table, unless the table is
+    # written to a file.
+    log = sys.stderr if args.output or args.splice else sys.stdout
+
+    if args.from_translit:
+        print(f"Counting data files: {', '.join(DATA_FILES)}", file=log)
+    else:
+        print(f"Processing data file: {DATA_FILE}", file=log)
+    print(f"Frequent threshold: {FREQUENT_THRESHOLD}", file=log)
+
+    if args.from_translit:
+        syllable_to_winner = count_syllables(
+            args.jobs, args.export, stats, args.alternates
+        )
+    else:
+        syllable_to_winner = make_cache(args.no_cache).load(
+            "make_syllabary",
+            __file__,
+            DATA_FILE,
+            lambda: read_data_file(DATA_FILE, stats, args.alternates),
+            params=(args.alternates,),
+            stats=stats,
+        )
+    print(f"Found {len(syllable_to_winner)} unique syllables", file=log)
+    stats.count("syllables", len(syllable_to_winner))
+
+    if not (args.output or args.splice):
+        with stats.stage("render"):
+            if writer.minify:
+                sys.stdout.write(
+                    writer.process(format_table(*table_rows(syllable_to_winner)))
+                )
+            else:
+                print_pinyin_table(syllable_to_winner)
+        stats.write(args.stats)
+        return
 
-    syllable_to_html = read_data_file(DATA_FILE)
-    print(f"Found {len(syllable_to_html)} unique syllables")
+    with stats.stage("render"):
+        initial_names, rows = table_rows(syllable_to_winner)
+    try:
+        if args.output:
+            with stats.stage("write"):
+                writer.write(args.output, format_table(initial_names, rows))
+            print(f"Wrote {args.output}", file=log)
+            writer.report(args.output, file=log)
+        if args.splice:
+            with stats.stage("write"):
+                with open(args.splice, "r", encoding="utf-8") as f:
+                    page = f.read()
+                write_atomic(
+                    args.splice,
+                    splice_table(page, page_lines(initial_names, rows)),
+                )
+            print(f"Updated the table in {args.splice}", file=log)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
 
-    print_pinyin_table(syllable_to_html)
+    stats.write(args.stats)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+
+"""
+Tests for the Python table generators.
+
+Run from the chinese/ directory with either runner:
+
+    python3 -m unittest discover tests
+    python3 -m pytest tests
+"""
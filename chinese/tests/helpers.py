@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+"""Running a generator script on a copy of its inputs."""
+
+import contextlib
+import importlib.util
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+CHINESE_DIR = Path(__file__).resolve().parent.parent
+GOLDEN_DIR = Path(__file__).resolve().parent / "golden"
+
+# Set ZHGEN_UPDATE_GOLDEN=1 to rewrite the golden files from the current
+# output instead of comparing against them.
+UPDATE_GOLDEN = os.environ.get("ZHGEN_UPDATE_GOLDEN") == "1"
+
+
+def import_script(path):
+    """
+    Import a generator script as a module, to test its functions directly.
+
+    Args:
+        path (str): The script, relative to chinese/
+
+    Returns:
+        module: The script, imported once per test run
+    """
+    name = "script_" + Path(path).stem
+    if name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(name, CHINESE_DIR / path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        sys.modules[name] = module
+    return sys.modules[name]
+
+
+def run_script(command, inputs, outputs=(), workdir=None):
+    """
+    Run a generator in a scratch directory holding copies of its inputs.
+
+    Args:
+        command (list): Program and arguments; a script ending in .py is
+            given relative to chinese/ and run with the current interpreter
+        inputs (list): Input files, relative to chinese/ or absolute
+        outputs (iterable): Files the command writes in its directory
+        workdir (str): Run in this existing directory and leave it in
+            place, for outputs that are more than a few files (default: a
+            temporary directory, removed afterwards)
+
+    Returns:
+        tuple: (stdout bytes, {output name: bytes})
+
+    Raises:
+        AssertionError: If the command exits with a non-zero status
+    """
+    if command[0].endswith(".py"):
+        command = [sys.executable, str(CHINESE_DIR / command[0]), *command[1:]]
+    if workdir is None:
+        scratch = tempfile.TemporaryDirectory(prefix="zhgen-test-")
+    else:
+        scratch = contextlib.nullcontext(workdir)
+    with scratch as workdir:
+        for name in inputs:
+            shutil.copy(CHINESE_DIR / name, workdir)
+        env = dict(os.environ, ZHGEN_CACHE_DIR=os.path.join(workdir, ".cache"))
+        result = subprocess.run(
+            command, cwd=workdir, env=env, capture_output=True, check=False
+        )
+        if result.returncode != 0:
+            raise AssertionError(
+                f"{' '.join(map(str, command))} exited with status "
+                f"{result.returncode}:\n" + result.stderr.decode("utf-8", "replace")
+            )
+        written = {name: (Path(workdir) / name).read_bytes() for name in outputs}
+    return result.stdout, written
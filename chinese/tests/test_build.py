@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the incremental build in zhgen.build."""
+
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from tests.helpers import CHINESE_DIR, import_script
+from zhgen import build
+from zhgen.build import TARGETS, Manifest, Target
+
+# Two generators in a scratch directory: "up" copies the first line of
+# a.txt to mid.txt, and "down" copies mid.txt to out.txt. Each logs its run.
+SCRIPTS = {
+    "up.py": (
+        "open('runs.log', 'a').write('up\\n')\n"
+        "first = open('a.txt').readline()\n"
+        "open('mid.txt', 'w').write(first)\n"
+    ),
+    "down.py": (
+        "open('runs.log', 'a').write('down\\n')\n"
+        "open('out.txt', 'w').write(open('mid.txt').read().upper())\n"
+    ),
+}
+
+frequencies = import_script("syllabary/generate_frequencies.py")
+
+SCRATCH_TARGETS = [
+    Target("up", "up.py", [], ["a.txt"], ["mid.txt"]),
+    Target("down", "down.py", [], ["mid.txt"], ["out.txt"]),
+]
+
+
+class TestTargets(unittest.TestCase):
+    def test_dependencies(self):
+        deps = build.dependencies(TARGETS)
+        self.assertEqual(deps["syllabary"], {"frequencies"})
+        self.assertEqual(deps["frequencies"], set())
+        self.assertEqual(
+            [target.name for target in build.select_targets(TARGETS, ["syllabary"])],
+            ["frequencies", "syllabary"],
+        )
+        with self.assertRaises(KeyError):
+            build.select_targets(TARGETS, ["nonesuch"])
+
+    def test_module_inputs(self):
+        inputs = {target.name: build.module_inputs(target) for target in TARGETS}
+        # Direct and indirect (freqtable imports counts) imports are found.
+        self.assertIn("zhgen/pinyin.py", inputs["frequencies"])
+        self.assertIn("zhgen/counts.py", inputs["tone_table"])
+        self.assertIn("zhgen/freqtable.py", inputs["tone_table"])
+        self.assertNotIn("zhgen/freqtable.py", inputs["homophones"])
+        # The syllabary imports generate_frequencies.py, and so its modules.
+        self.assertLessEqual(set(inputs["frequencies"]), set(inputs["syllabary"]))
+
+        # Every module except the standalone tools is some generator's input.
+        used = set().union(*inputs.values())
+        modules = {
+            f"zhgen/{path.name}"
+            for path in (Path(build.CHINESE_DIR) / "zhgen").glob("*.py")
+        }
+        self.assertEqual(
+            modules - used,
+            {"zhgen/bench.py", "zhgen/build.py", "zhgen/lookup.py"},
+        )
+
+
+class TestBuild(unittest.TestCase):
+    def setUp(self):
+        scratch = tempfile.TemporaryDirectory(prefix="zhgen-test-")
+        self.addCleanup(scratch.cleanup)
+        self.dir = Path(scratch.name)
+        for name, text in SCRIPTS.items():
+            (self.dir / name).write_text(text, encoding="utf-8")
+        (self.dir / "a.txt").write_text("one\ntwo\n", encoding="utf-8")
+        patcher = mock.patch.object(build, "CHINESE_DIR", scratch.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.manifest_path = str(self.dir / "manifest.json")
+
+    def build(self, **kwargs):
+        """Run a build; return (success, generators run, stdout)."""
+        log = self.dir / "runs.log"
+        log.unlink(missing_ok=True)
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            ok = build.build(SCRATCH_TARGETS, Manifest(self.manifest_path), **kwargs)
+        runs = log.read_text().split() if log.exists() else []
+        return ok, runs, stdout.getvalue()
+
+    def test_no_op(self):
+        ok, runs, _ = self.build()
+        self.assertTrue(ok)
+        self.assertEqual(runs, ["up", "down"])
+        self.assertEqual((self.dir / "out.txt").read_text(), "ONE\n")
+
+        ok, runs, stdout = self.build(verbose=True)
+        self.assertTrue(ok)
+        self.assertEqual(runs, [])
+        self.assertEqual(stdout, "up: up to date\ndown: up to date\n")
+
+    def test_touched_input(self):
+        self.build()
+        # A new modification time with the same content is not a change.
+        os.utime(self.dir / "a.txt", ns=(0, 10**9))
+        self.assertEqual(self.build()[1], [])
+
+        (self.dir / "a.txt").write_text("uno\ntwo\n", encoding="utf-8")
+        ok, runs, stdout = self.build()
+        self.assertTrue(ok)
+        self.assertEqual(runs, ["up", "down"])
+        self.assertIn("up: running up.py (a.txt changed)", stdout)
+        self.assertIn("down: running down.py (mid.txt changed)", stdout)
+        self.assertEqual((self.dir / "out.txt").read_text(), "UNO\n")
+
+    def test_unchanged_rebuilt_output(self):
+        self.build()
+        # up reruns, but writes the same mid.txt, so down stays up to date.
+        (self.dir / "a.txt").write_text("one\nthree\n", encoding="utf-8")
+        ok, runs, _ = self.build()
+        self.assertTrue(ok)
+        self.assertEqual(runs, ["up"])
+
+    def test_edited_output_and_script(self):
+        self.build()
+        (self.dir / "out.txt").write_text("edited\n", encoding="utf-8")
+        self.assertEqual(self.build()[1], ["down"])
+        with open(self.dir / "down.py", "a", encoding="utf-8") as f:
+            f.write("# changed\n")
+        self.assertEqual(self.build()[1], ["down"])
+
+    def test_dry_run(self):
+        self.build()
+        (self.dir / "a.txt").write_text("uno\n", encoding="utf-8")
+        ok, runs, stdout = self.build(dry_run=True)
+        self.assertTrue(ok)
+        self.assertEqual(runs, [])
+        self.assertIn("up: would run (a.txt changed)", stdout)
+        self.assertIn("down: would run (a dependency would be rebuilt)", stdout)
+
+    def test_failure_skips_dependents(self):
+        self.build()
+        (self.dir / "up.py").write_text("raise SystemExit(3)\n", encoding="utf-8")
+        with contextlib.redirect_stderr(io.StringIO()):
+            ok, runs, stdout = self.build()
+        self.assertFalse(ok)
+        self.assertIn("down: skipped, up failed", stdout)
+        # The manifest still describes the last successful run.
+        fixed = SCRIPTS["up.py"] + "# fixed\n"
+        (self.dir / "up.py").write_text(fixed, encoding="utf-8")
+        self.assertEqual(self.build()[1], ["up"])
+
+
+class TestCodeChange(unittest.TestCase):
+    """A rebuild after a zhgen module changes reruns the real generators."""
+
+    def setUp(self):
+        scratch = tempfile.TemporaryDirectory(prefix="zhgen-test-")
+        self.addCleanup(scratch.cleanup)
+        self.dir = Path(scratch.name)
+        ignore = shutil.ignore_patterns("__pycache__", "*.pickle")
+        for name in ["zhgen", "syllabary", "tonetable"]:
+            shutil.copytree(Path(CHINESE_DIR) / name, self.dir / name, ignore=ignore)
+        for patcher in [
+            mock.patch.object(build, "CHINESE_DIR", scratch.name),
+            mock.patch.dict(os.environ),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        os.environ.pop("ZHGEN_CACHE_DIR", None)
+        self.targets = build.select_targets(TARGETS, ["frequencies", "tone_table"])
+        self.manifest_path = str(self.dir / "manifest.json")
+
+    def build(self, force=False):
+        with contextlib.redirect_stdout(io.StringIO()):
+            ok = build.build(self.targets, Manifest(self.manifest_path), force=force)
+        self.assertTrue(ok)
+        return {
+            target.name: (self.dir / target.outputs[0]).read_bytes()
+            for target in self.targets
+        }
+
+    def edit(self, module, old, new):
+        path = self.dir / "zhgen" / module
+        text = path.read_text(encoding="utf-8")
+        self.assertIn(old, text)
+        path.write_text(text.replace(old, new), encoding="utf-8")
+
+    def test_edited_module(self):
+        before = self.build()
+        # Every tone mark reads as tone 4, and ranks become four times larger.
+        self.edit("pinyin.py", "tone = TONE_MARKS[match.group()][1]", 'tone = "4"')
+        self.edit(
+            "freqtable.py", "ranks.append(int(rank))", "ranks.append(int(rank) * 4)"
+        )
+        after = self.build()
+        self.assertNotEqual(after["frequencies"], before["frequencies"])
+        self.assertNotEqual(after["tone_table"], before["tone_table"])
+        # The same as a rebuild from scratch with the edited code.
+        (self.dir / "syllabary" / frequencies.CHECKPOINT_FILE).unlink()
+        shutil.rmtree(self.dir / ".cache")
+        self.assertEqual(self.build(force=True), after)
+
+
+if __name__ == "__main__":
+    unittest.main()
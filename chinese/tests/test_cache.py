@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for zhgen.cache.ParseCache."""
+
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from zhgen import sources
+from zhgen.cache import ParseCache
+from zhgen.stats import Stats
+
+
+class TestParseCache(unittest.TestCase):
+    def setUp(self):
+        scratch = tempfile.TemporaryDirectory(prefix="zhgen-test-")
+        self.addCleanup(scratch.cleanup)
+        self.workdir = Path(scratch.name)
+        self.cache = ParseCache(self.workdir / "cache", max_entries=2)
+        self.input = self.workdir / "input.txt"
+        self.input.write_text("one\n", encoding="utf-8")
+        self.code = self.workdir / "parser.py"
+        self.code.write_text("from zhgen.pinyin import to_numbered\n", encoding="utf-8")
+        self.parses = 0
+
+    def parse(self):
+        self.parses += 1
+        return self.input.read_text(encoding="utf-8").split()
+
+    def load(self, filename=None, params=()):
+        stats = Stats("test")
+        result = self.cache.load(
+            "test",
+            str(self.code),
+            str(filename or self.input),
+            self.parse,
+            params,
+            stats,
+        )
+        return result, stats.counters
+
+    def entries(self):
+        return sorted(self.cache.directory.glob("*.pickle"))
+
+    def test_hit(self):
+        self.assertEqual(self.load(), (["one"], {"cache.miss": 1}))
+        self.assertEqual(self.load(), (["one"], {"cache.hit": 1}))
+        self.assertEqual(self.parses, 1)
+
+    def test_code_change(self):
+        self.load()
+        with open(self.code, "a", encoding="utf-8") as f:
+            f.write("# edited\n")
+        result, counters = self.load()
+        self.assertEqual(counters, {"cache.miss": 1})
+        self.assertEqual(self.parses, 2)
+        # Parameters that change the result are part of the key too.
+        _, counters = self.load(params=("top", 5))
+        self.assertEqual(counters, {"cache.miss": 1})
+
+    def test_imported_code_change(self):
+        # A copy of the zhgen package, so that a module can be edited.
+        package = self.workdir / "zhgen"
+        shutil.copytree(sources.ZHGEN_DIR, package)
+        with mock.patch.object(sources, "ZHGEN_DIR", str(package)):
+            self.load()
+            self.assertEqual(self.load()[1], {"cache.hit": 1})
+            with open(package / "pinyin.py", "a", encoding="utf-8") as f:
+                f.write("# edited\n")
+            self.assertEqual(self.load()[1], {"cache.miss": 1})
+            # A module the parser does not import makes no difference.
+            with open(package / "freqtable.py", "a", encoding="utf-8") as f:
+                f.write("# edited\n")
+            self.assertEqual(self.load()[1], {"cache.hit": 1})
+
+    def test_source_change(self):
+        self.load()
+        # The key is the content hash, so a rewrite with the same size and
+        # mtime is still noticed.
+        stat = self.input.stat()
+        self.input.write_text("two\n", encoding="utf-8")
+        os.utime(self.input, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertEqual(self.load(), (["two"], {"cache.miss": 1}))
+        # Changing it back finds the first entry again.
+        self.input.write_text("one\n", encoding="utf-8")
+        self.assertEqual(self.load(), (["one"], {"cache.hit": 1}))
+
+    def test_eviction(self):
+        paths = []
+        for i in range(3):
+            path = self.workdir / f"input{i}.txt"
+            path.write_text(f"{i}\n", encoding="utf-8")
+            paths.append(path)
+            self.load(filename=path)
+            entry = (
+                self.workdir
+                / "cache"
+                / (self.cache.key("test", str(self.code), str(path)) + ".pickle")
+            )
+            # Distinct, increasing use times regardless of clock resolution.
+            os.utime(entry, ns=(i * 10**9, i * 10**9))
+        self.assertEqual(len(self.entries()), 2)
+
+        # Loading an entry marks it as recently used, so the oldest of the
+        # others goes next.
+        self.load(filename=paths[1])
+        path = self.workdir / "input3.txt"
+        path.write_text("3\n", encoding="utf-8")
+        self.load(filename=path)
+        _, counters = self.load(filename=paths[1])
+        self.assertEqual(counters, {"cache.hit": 1})
+        _, counters = self.load(filename=paths[2])
+        self.assertEqual(counters, {"cache.miss": 1})
+
+    def test_corrupt_entry(self):
+        self.load()
+        (entry,) = self.entries()
+        entry.write_bytes(b"not a pickle")
+        self.assertEqual(self.load(), (["one"], {"cache.miss": 1}))
+        # The entry was rewritten and is usable again.
+        with open(entry, "rb") as f:
+            self.assertEqual(pickle.load(f), ["one"])
+        self.assertEqual(self.load(), (["one"], {"cache.hit": 1}))
+
+    def test_truncated_entry(self):
+        self.load()
+        (entry,) = self.entries()
+        entry.write_bytes(entry.read_bytes()[:5])
+        self.assertEqual(self.load(), (["one"], {"cache.miss": 1}))
+
+    def test_disabled(self):
+        cache = ParseCache(self.workdir / "cache", enabled=False)
+        for _ in range(2):
+            result = cache.load("test", str(self.code), str(self.input), self.parse)
+            self.assertEqual(result, ["one"])
+        self.assertEqual(self.parses, 2)
+        self.assertFalse((self.workdir / "cache").exists())
+
+    def test_missing_input(self):
+        # The parser, not the cache, reports a missing input.
+        missing = self.workdir / "missing.txt"
+        with self.assertRaises(FileNotFoundError):
+            self.cache.load("test", str(self.code), str(missing), missing.read_text)
+        self.assertEqual(self.entries(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
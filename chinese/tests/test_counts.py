@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for zhgen.counts.PairCounter."""
+
+import pickle
+import random
+import unittest
+from unittest import mock
+
+from zhgen import counts
+from zhgen.counts import PairCounter
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def expected_order(counter):
+    """(char, count, syllable) rows as a stable sort of the items would give."""
+    rows = [(char, count, syllable) for (char, syllable), count in counter.items()]
+    return sorted(rows, key=lambda row: (-row[1], row[0]))
+
+
+def random_counter(seed, pairs=3000):
+    # Few distinct counts and characters, so most rows tie on both keys.
+    rng = random.Random(seed)
+    counter = PairCounter()
+    for _ in range(pairs):
+        char = chr(0x4E00 + rng.randrange(40))
+        counter.add(char, f"s{rng.randrange(30)}{rng.randrange(5)}", rng.randint(1, 4))
+    return counter
+
+
+class TestPairCounter(unittest.TestCase):
+    def test_counting(self):
+        counter = PairCounter()
+        counter.add_pairs([("李", "li3"), ("王", "wang2"), ("李", "li3")])
+        counter.add("王", "wang2", 5)
+        counter.update({("李", "li4"): 2})
+        counter.update([(("王", "wang2"), 1)])
+        self.assertEqual(
+            list(counter.items()),
+            [(("李", "li3"), 2), (("王", "wang2"), 7), (("李", "li4"), 2)],
+        )
+        self.assertEqual(len(counter), 3)
+        self.assertEqual(counter.total(), 11)
+        self.assertEqual(counter.chars, ["李", "王"])
+
+    def test_tie_break(self):
+        counter = PairCounter()
+        for char, syllable, count in [
+            ("王", "wang2", 3),
+            ("李", "li4", 3),
+            ("安", "an1", 1),
+            ("李", "li3", 3),
+            ("王", "wang4", 5),
+            ("安", "an4", 1),
+        ]:
+            counter.add(char, syllable, count)
+        # Descending count, then character; pairs that tie on both keep the
+        # order in which they were first counted.
+        self.assertEqual(
+            counter.most_common(),
+            [
+                ("王", 5, "wang4"),
+                ("李", 3, "li4"),
+                ("李", 3, "li3"),
+                ("王", 3, "wang2"),
+                ("安", 1, "an1"),
+                ("安", 1, "an4"),
+            ],
+        )
+        self.assertEqual(counter.most_common(2), counter.most_common()[:2])
+        self.assertEqual(counter.most_common(0), [])
+
+    def assertPathsAgree(self, counter):
+        expected = expected_order(counter)
+        n = len(counter)
+        limits = [None, 0, 1, 7, 100, n - 1, n, n + 5]
+        paths = {"stdlib": mock.patch.object(counts, "_numpy", False)}
+        if numpy is not None:
+            paths["numpy"] = mock.patch.object(counts, "NUMPY_MIN_PAIRS", 0)
+        for path, patch in paths.items():
+            for limit in limits:
+                with self.subTest(path=path, limit=limit), patch:
+                    self.assertEqual(counter.most_common(limit), expected[:limit])
+
+    def test_stdlib_and_numpy_agree(self):
+        for seed in range(3):
+            self.assertPathsAgree(random_counter(seed))
+
+    def test_pickle(self):
+        counter = random_counter(0)
+        copy = pickle.loads(pickle.dumps(counter, protocol=pickle.HIGHEST_PROTOCOL))
+        self.assertEqual(list(copy.items()), list(counter.items()))
+        self.assertEqual(copy.most_common(), counter.most_common())
+
+        # The lookup dicts are rebuilt on the first add, so an existing pair
+        # is found rather than appended again.
+        (char, syllable), count = next(iter(counter.items()))
+        copy.add(char, syllable)
+        copy.add("新", "xin1")
+        self.assertEqual(len(copy), len(counter) + 1)
+        self.assertEqual(next(iter(copy.items())), ((char, syllable), count + 1))
+
+    def test_merge(self):
+        first = random_counter(1, 500)
+        second = random_counter(2, 500)
+        expected = PairCounter(first.items())
+        expected.update(second.items())
+
+        merged = PairCounter()
+        merged.update(first)  # copied: the counter is empty
+        merged.update(second)
+        self.assertEqual(list(merged.items()), list(expected.items()))
+
+        # The copy does not share arrays or lists with its source.
+        before = list(first.items())
+        merged.add("新", "xin1")
+        merged.update(first)
+        self.assertEqual(list(first.items()), before)
+
+    def test_merge_unpickled(self):
+        first = pickle.loads(pickle.dumps(random_counter(1, 500)))
+        second = pickle.loads(pickle.dumps(random_counter(2, 500)))
+        merged = PairCounter()
+        merged.update(first)
+        merged.update(second)
+        expected = PairCounter(random_counter(1, 500).items())
+        expected.update(random_counter(2, 500).items())
+        self.assertEqual(list(merged.items()), list(expected.items()))
+        self.assertEqual(merged.most_common(), expected.most_common())
+
+
+if __name__ == "__main__":
+    unittest.main()
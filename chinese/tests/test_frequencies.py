@@ -0,0 +1,222 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for generate_frequencies.py's sharded and incremental counting."""
+
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from tests.helpers import import_script
+from zhgen.stats import Stats
+
+frequencies = import_script("syllabary/generate_frequencies.py")
+
+NAMES = (
+    "# Name\tHanzi\tPinyin\n"
+    "Anna\t安娜\tĀnnà\n"
+    "Li\t李\tLǐ\n"
+    "Bad\t坏\n"
+    "Wang\t王\tWáng\n"
+)
+
+
+class TestCheckpoint(unittest.TestCase):
+    def setUp(self):
+        scratch = tempfile.TemporaryDirectory(prefix="zhgen-test-")
+        self.addCleanup(scratch.cleanup)
+        self.names = os.path.join(scratch.name, "name_translit.txt")
+        self.countries = os.path.join(scratch.name, "country_translit.txt")
+        self.checkpoint = os.path.join(scratch.name, "checkpoint.pickle")
+        self.write(self.countries, "China\t中国\tZhōngguó\n")
+
+    def write(self, path, text, mode="w"):
+        with open(path, mode, encoding="utf-8") as f:
+            f.write(text)
+
+    def count(self, checkpoint=True):
+        """
+        Count the two files.
+
+        Returns:
+            tuple: (rows in output order, stats counters, stderr)
+        """
+        stats = Stats("test")
+        stderr = io.StringIO()
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(
+            stderr
+        ):
+            counts = frequencies.count_frequencies(
+                [self.names, self.countries],
+                checkpoint=self.checkpoint if checkpoint else None,
+                stats=stats,
+            )
+        return list(counts.rows()), stats.counters, stderr.getvalue()
+
+    def assertMatchesRecount(self, rows):
+        expected, _, _ = self.count(checkpoint=False)
+        self.assertEqual(rows, expected)
+
+    def test_unchanged(self):
+        self.write(self.names, NAMES)
+        first, counters, stderr = self.count()
+        self.assertEqual(counters["files.full"], 2)
+        self.assertIn("Line 4 ", stderr)
+        inode = os.stat(self.checkpoint).st_ino
+
+        rows, counters, stderr = self.count()
+        self.assertEqual(rows, first)
+        self.assertEqual(counters["files.unchanged"], 2)
+        self.assertNotIn("lines", counters)
+        self.assertEqual(stderr, "")
+        # Nothing was counted, so the checkpoint was not rewritten.
+        self.assertEqual(os.stat(self.checkpoint).st_ino, inode)
+        self.assertMatchesRecount(rows)
+
+    def test_append(self):
+        self.write(self.names, NAMES)
+        self.count()
+        self.write(self.names, "Li Na\t李娜\tLǐ Nà\nBad\t坏\n", "a")
+        rows, counters, stderr = self.count()
+        self.assertEqual(counters["files.appended"], 1)
+        self.assertEqual(counters["files.unchanged"], 1)
+        self.assertEqual(counters["lines"], 2)
+        # Only the new bad line is reported, numbered within the whole file.
+        self.assertNotIn("Line 4 ", stderr)
+        self.assertIn("Line 7 ", stderr)
+        self.assertMatchesRecount(rows)
+
+        rows, counters, _ = self.count()
+        self.assertEqual(counters["files.unchanged"], 2)
+        self.assertMatchesRecount(rows)
+
+    def test_edited_prefix(self):
+        self.write(self.names, NAMES)
+        self.count()
+        stat = os.stat(self.names)
+        # Same size, different content: only the digest can tell.
+        self.write(self.names, NAMES.replace("Wáng", "Wàng"))
+        os.utime(self.names, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+        self.assertEqual(os.path.getsize(self.names), stat.st_size)
+
+        rows, counters, _ = self.count()
+        self.assertEqual(counters["files.full"], 1)
+        self.assertIn(("王", 1, "wang4"), rows)
+        self.assertNotIn(("王", 1, "wang2"), rows)
+        self.assertMatchesRecount(rows)
+
+    def test_trailing_partial_line(self):
+        self.write(self.names, NAMES + "Bad\t坏")
+        rows, _, stderr = self.count()
+        self.assertIn("Line 6 ", stderr)
+        self.assertMatchesRecount(rows)
+
+        # The partial line is not in the checkpoint, so it is counted again.
+        rows, counters, stderr = self.count()
+        self.assertEqual(counters["files.unchanged"], 2)
+        self.assertIn("Line 6 ", stderr)
+        self.assertMatchesRecount(rows)
+
+        # Completing it makes it part of the appended range.
+        self.write(self.names, "\tHuài\nZhao\t赵\tZhào", "a")
+        rows, counters, stderr = self.count()
+        self.assertEqual(counters["files.appended"], 1)
+        self.assertEqual(stderr, "")
+        self.assertIn(("坏", 1, "huai4"), rows)
+        self.assertMatchesRecount(rows)
+
+    def test_code_change(self):
+        self.write(self.names, NAMES)
+        first, _, _ = self.count()
+        # An edited copy of the script, importing the same zhgen modules.
+        script = os.path.join(os.path.dirname(self.checkpoint), "edited.py")
+        shutil.copyfile(frequencies.__file__, script)
+        self.write(script, "# edited\n", "a")
+        with mock.patch.object(frequencies, "__file__", script):
+            rows, counters, _ = self.count()
+        self.assertEqual(counters["files.full"], 2)
+        self.assertEqual(rows, first)
+        # The recount was stored under the edited code's header.
+        with mock.patch.object(frequencies, "__file__", script):
+            _, counters, _ = self.count()
+        self.assertEqual(counters["files.unchanged"], 2)
+        _, counters, _ = self.count()
+        self.assertEqual(counters["files.full"], 2)
+
+    def test_corrupt_checkpoint(self):
+        self.write(self.names, NAMES)
+        self.write(self.checkpoint, "not a pickle")
+        rows, counters, _ = self.count()
+        self.assertEqual(counters["files.full"], 2)
+        self.assertMatchesRecount(rows)
+
+
+class TestSharding(unittest.TestCase):
+    def setUp(self):
+        scratch = tempfile.TemporaryDirectory(prefix="zhgen-test-")
+        self.addCleanup(scratch.cleanup)
+        self.path = os.path.join(scratch.name, "name_translit.txt")
+        lines = ["# Name\tHanzi\tPinyin"]
+        for i in range(200):
+            if i % 17 == 3:
+                lines.append(f"Bad{i}\t坏")
+            elif i % 23 == 5:
+                lines.append("")
+            else:
+                lines.append(f"N{i}\t{'李王赵'[i % 3]}{'安娜'[i % 2]}\tLǐ Nà{i % 4}")
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        self.size = os.path.getsize(self.path)
+        # Lowered so that the small test file is split several ways.
+        patcher = mock.patch.object(frequencies, "SHARD_MIN_BYTES", 64)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_shard_ranges(self):
+        ranges = frequencies.shard_ranges(self.path, 4)
+        self.assertEqual(len(ranges), 4)
+        self.assertEqual(ranges[0][0], 0)
+        self.assertEqual(ranges[-1][1], self.size)
+        with open(self.path, "rb") as f:
+            data = f.read()
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            self.assertEqual(end, start)
+            self.assertEqual(data[start - 1 : start], b"\n")
+
+    def test_counts_match_serial(self):
+        serial, serial_lines, serial_skipped = frequencies.count_shard(
+            self.path, 0, self.size
+        )
+        self.assertTrue(serial_skipped)
+        for jobs in (2, 3, 5):
+            with self.subTest(jobs=jobs):
+                self.assertGreater(
+                    len(frequencies.shard_ranges(self.path, jobs, 0, self.size)), 1
+                )
+                counts, line_count, skipped = frequencies.count_byte_range(
+                    self.path, 0, self.size, jobs
+                )
+                self.assertEqual(list(counts.items()), list(serial.items()))
+                self.assertEqual(line_count, serial_lines)
+                # Line numbers continue across shard boundaries.
+                self.assertEqual(skipped, serial_skipped)
+
+    def test_skipped_line_numbers(self):
+        _, _, skipped = frequencies.count_byte_range(self.path, 0, self.size, 3)
+        with open(self.path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        self.assertEqual(
+            skipped,
+            [
+                (num, line)
+                for num, line in enumerate(lines, 1)
+                if line.startswith("Bad")
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+
+"""
+Golden-output tests: each generator's output on the real data, byte for byte.
+
+The golden files are in tests/golden/. After a change that is meant to alter
+the output, regenerate them with
+
+    ZHGEN_UPDATE_GOLDEN=1 python3 -m unittest tests.test_golden
+
+and review the diff before committing.
+"""
+
+import difflib
+import os
+import tempfile
+import unittest
+
+from tests.helpers import CHINESE_DIR, GOLDEN_DIR, UPDATE_GOLDEN, run_script
+from zhgen.shards import assemble, read_manifest
+
+TRANSLIT_FILES = ["syllabary/name_translit.txt", "syllabary/country_translit.txt"]
+FREQUENCIES_FILE = "syllabary/translit_char_freqs_pronunciation.txt"
+
+# make_syllabary.py prints this many progress lines ahead of the table.
+SYLLABARY_PROGRESS_LINES = 3
+
+
+class GoldenTestCase(unittest.TestCase):
+    """Compares output against a file in tests/golden/."""
+
+    maxDiffLines = 40
+
+    def assertGolden(self, golden_name, actual):
+        """
+        Assert that actual (bytes) equals the golden file golden_name.
+
+        With ZHGEN_UPDATE_GOLDEN=1 the golden file is rewritten instead.
+        """
+        path = GOLDEN_DIR / golden_name
+        if UPDATE_GOLDEN:
+            path.write_bytes(actual)
+            return
+        expected = path.read_bytes()
+        if actual == expected:
+            return
+        diff = list(
+            difflib.unified_diff(
+                expected.decode("utf-8").splitlines(keepends=True),
+                actual.decode("utf-8").splitlines(keepends=True),
+                f"golden/{golden_name}",
+                "actual",
+            )
+        )
+        if len(diff) > self.maxDiffLines:
+            diff = diff[: self.maxDiffLines] + ["...\n"]
+        self.fail(f"output differs from golden/{golden_name}:\n" + "".join(diff))
+
+
+def _skip_lines(output, count):
+    """Return output (bytes) without its first count lines."""
+    return b"".join(output.splitlines(keepends=True)[count:])
+
+
+class TestFrequencies(GoldenTestCase):
+    def test_output(self):
+        _, files = run_script(
+            ["syllabary/generate_frequencies.py", "--no-checkpoint"],
+            TRANSLIT_FILES,
+            ["translit_char_freqs_pronunciation.txt"],
+        )
+        self.assertGolden(
+            "translit_char_freqs_pronunciation.txt.golden",
+            files["translit_char_freqs_pronunciation.txt"],
+        )
+
+    def test_parallel_output(self):
+        _, files = run_script(
+            ["syllabary/generate_frequencies.py", "--no-checkpoint", "--jobs", "2"],
+            TRANSLIT_FILES,
+            ["translit_char_freqs_pronunciation.txt"],
+        )
+        self.assertGolden(
+            "translit_char_freqs_pronunciation.txt.golden",
+            files["translit_char_freqs_pronunciation.txt"],
+        )
+
+    def test_checked_in_counts_are_current(self):
+        # make_syllabary.py reads the checked-in counts, so they should be
+        # what generate_frequencies.py produces from the checked-in names.
+        self.assertGolden(
+            "translit_char_freqs_pronunciation.txt.golden",
+            (CHINESE_DIR / FREQUENCIES_FILE).read_bytes(),
+        )
+
+
+class TestSyllabary(GoldenTestCase):
+    def test_stdout(self):
+        stdout, _ = run_script(
+            ["syllabary/make_syllabary.py", "--no-cache"], [FREQUENCIES_FILE]
+        )
+        self.assertGolden(
+            "syllabary_table.html.golden",
+            _skip_lines(stdout, SYLLABARY_PROGRESS_LINES),
+        )
+
+    def test_output_file(self):
+        _, files = run_script(
+            ["syllabary/make_syllabary.py", "--output", "table.html"],
+            [FREQUENCIES_FILE],
+            ["table.html"],
+        )
+        self.assertGolden("syllabary_table.html.golden", files["table.html"])
+
+    def test_from_translit(self):
+        stdout, _ = run_script(
+            ["syllabary/make_syllabary.py", "--from-translit"], TRANSLIT_FILES
+        )
+        self.assertGolden(
+            "syllabary_table.html.golden",
+            _skip_lines(stdout, SYLLABARY_PROGRESS_LINES),
+        )
+
+
+class TestToneTable(GoldenTestCase):
+    def test_output(self):
+        _, files = run_script(
+            ["tonetable/make_tone_table.py", "--no-cache"],
+            ["tonetable/frequency_pinyin_table.txt"],
+            ["tone_table.html"],
+        )
+        self.assertGolden("tone_table.html.golden", files["tone_table.html"])
+
+    def test_default_variant(self):
+        _, files = run_script(
+            [
+                "tonetable/make_tone_table.py",
+                "--variant",
+                "table.html=250,500,1000,1500,2000,2500",
+            ],
+            ["tonetable/frequency_pinyin_table.txt"],
+            ["table.html"],
+        )
+        self.assertGolden("tone_table.html.golden", files["table.html"])
+
+
+class TestShards(GoldenTestCase):
+    """The fragments of --shards joined in order give the single-file table."""
+
+    def assertShardsGolden(self, golden_name, command, input_file, directory):
+        with tempfile.TemporaryDirectory(prefix="zhgen-test-") as workdir:
+            run_script(command, [input_file], workdir=workdir)
+            shard_dir = os.path.join(workdir, directory)
+            manifest = read_manifest(shard_dir)
+            self.assertGreater(len(manifest["shards"]), 1)
+            self.assertEqual(
+                sorted(os.listdir(shard_dir)),
+                sorted(["manifest.json"] + [s["file"] for s in manifest["shards"]]),
+            )
+            table = assemble(shard_dir).encode("utf-8")
+        self.assertEqual(manifest["bytes"], len(table))
+        self.assertGolden(golden_name, table)
+
+    def test_tone_table(self):
+        self.assertShardsGolden(
+            "tone_table.html.golden",
+            ["tonetable/make_tone_table.py", "--no-cache", "--shards"],
+            "tonetable/frequency_pinyin_table.txt",
+            "tone_table",
+        )
+
+    def test_homophones(self):
+        self.assertShardsGolden(
+            "homophone_table.html.golden",
+            ["homophone_subs/make_homophone_subs_html.py", "--no-cache", "--shards"],
+            "homophone_subs/homophone_subs.txt",
+            "homophone_table",
+        )
+
+    def test_stale_shards_are_removed(self):
+        with tempfile.TemporaryDirectory(prefix="zhgen-test-") as workdir:
+            data_file = "tonetable/frequency_pinyin_table.txt"
+            command = ["tonetable/make_tone_table.py", "--shards", "--variant"]
+            run_script(
+                [*command, "t.html=250,500,1000,1500,2000,all"],
+                [data_file],
+                workdir=workdir,
+            )
+            everything = set(os.listdir(os.path.join(workdir, "t")))
+            run_script([*command, "t.html=10"], [data_file], workdir=workdir)
+            fewer = set(os.listdir(os.path.join(workdir, "t")))
+            manifest = read_manifest(os.path.join(workdir, "t"))
+        self.assertLess(len(fewer), len(everything))
+        self.assertEqual(
+            fewer, {"manifest.json"} | {s["file"] for s in manifest["shards"]}
+        )
+
+
+class TestHomophones(GoldenTestCase):
+    def test_stdout(self):
+        stdout, _ = run_script(
+            ["homophone_subs/make_homophone_subs_html.py", "--no-cache"],
+            ["homophone_subs/homophone_subs.txt"],
+        )
+        self.assertGolden("homophone_table.html.golden", stdout)
+
+    def test_output_file(self):
+        _, files = run_script(
+            ["homophone_subs/make_homophone_subs_html.py", "--output", "table.html"],
+            ["homophone_subs/homophone_subs.txt"],
+            ["table.html"],
+        )
+        self.assertGolden("homophone_table.html.golden", files["table.html"])
+
+
+if __name__ == "__main__":
+    unittest.main()
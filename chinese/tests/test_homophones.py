@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the homophone table parser."""
+
+import io
+import pickle
+import unittest
+
+from tests.helpers import CHINESE_DIR, GOLDEN_DIR, import_script
+from zhgen.stats import Stats
+
+homophones = import_script("homophone_subs/make_homophone_subs_html.py")
+Entry = homophones.Entry
+Variant = homophones.Variant
+Example = homophones.Example
+
+DATA_FILE = CHINESE_DIR / "homophone_subs" / "homophone_subs.txt"
+
+
+def parse(text):
+    stats = Stats("test")
+    records = list(homophones.parse_records(text.splitlines(keepends=True), stats))
+    return records, stats.counters
+
+
+class TestParseRecords(unittest.TestCase):
+    def test_records(self):
+        records, counters = parse(
+            "g-031 发 fa1\n"
+            "\t發 [fā] launch / start\n"
+            "\t\t出發 [chūfā] to head off\n"
+            "\n"
+            "\t髮 [fà] hair\n"
+        )
+        self.assertEqual(
+            records,
+            [
+                Entry("g-031", "发", "fa1"),
+                Variant("發", "fā", "launch / start"),
+                Example("出發", "chūfā", "to head off"),
+                Variant("髮", "fà", "hair"),
+            ],
+        )
+        self.assertEqual(counters["lines"], 5)
+        self.assertEqual(counters["skipped.blank"], 1)
+        self.assertEqual(counters["variants"], 2)
+
+    def test_tone_marks_become_numbers(self):
+        records, _ = parse("u-005 板 bǎn extra\n")
+        self.assertEqual(records, [Entry("u-005", "板", "ban3")])
+
+    def test_orphans(self):
+        records, counters = parse(
+            "\t發 [fā] launch\n"
+            "\t\t出發 [chūfā] to head off\n"
+            "g-031 发 fa1\n"
+            "\t\t出發 [chūfā] to head off\n"
+        )
+        self.assertEqual(records, [Entry("g-031", "发", "fa1")])
+        self.assertEqual(counters["skipped.orphan_variant"], 1)
+        self.assertEqual(counters["skipped.orphan_example"], 2)
+
+    def test_bad_lines_keep_the_state(self):
+        # As in the data file: variants after a bad entry line belong to
+        # the previous entry.
+        records, counters = parse(
+            "g-031 发 fa1\n"
+            "u015 卜 bu3\n"
+            "x-023 伙\n"
+            "\t卜 [bǔ]\n"
+            "\t蔔 [bo] turnip\n"
+            "\t\t\t蘿蔔 [luóbo] turnip\n"
+            "'quoted\n"
+        )
+        self.assertEqual(
+            records, [Entry("g-031", "发", "fa1"), Variant("蔔", "bo", "turnip")]
+        )
+        self.assertEqual(counters["skipped.bad_entry"], 2)
+        self.assertEqual(counters["skipped.bad_variant"], 1)
+        self.assertEqual(counters["skipped.too_deep"], 1)
+        self.assertEqual(counters["skipped.excluded"], 1)
+
+    def test_data_file(self):
+        with open(DATA_FILE, encoding="utf-8") as f:
+            records, counters = parse(f.read())
+        self.assertEqual(
+            counters["lines"], len(records) + counters["skipped.bad_entry"]
+        )
+        data = homophones.read_data(str(DATA_FILE))
+        self.assertEqual(len(data.entries), counters["entries"])
+
+
+class TestHomophoneData(unittest.TestCase):
+    def setUp(self):
+        self.data = data = homophones.HomophoneData()
+        data.add_simplified_char("zhi3", "只", "g-100")
+        data.add_simplified_char("ban3", "板", "u-005")
+        data.add_traditional_char("ban3", "板", "闆", "boss", "bǎn")
+        data.add_traditional_char("ban3", "板", "板", "board", "bǎn")
+        data.add_example("ban3", "板", "闆", "老闆", "boss", "lǎobǎn")
+        data.add_example("ban3", "板", "板", "黑板", "blackboard", "hēibǎn")
+        data.add_example("ban3", "板", "板", "木板", "plank", "mùbǎn")
+
+    def test_order_and_rows(self):
+        entry = self.data.entries[("ban3", "板")]
+        self.assertEqual(self.data.keys, [("ban3", "板"), ("zhi3", "只")])
+        self.assertEqual(entry.traditional, ["板", "闆"])
+        self.assertEqual(entry.rows, 3)
+        self.assertEqual(self.data.entries[("zhi3", "只")].rows, 0)
+
+    def test_fields_are_kept(self):
+        entry = self.data.entries[("ban3", "板")]
+        variant = entry.variants["闆"]
+        self.assertEqual(entry.code, "u-005")
+        self.assertEqual((variant.pinyin, variant.meaning), ("bǎn", "boss"))
+        self.assertEqual(variant.examples, [Example("老闆", "lǎobǎn", "boss")])
+        self.assertFalse(hasattr(entry, "__dict__"))
+
+    def test_reverse_indexes(self):
+        entry = self.data.entries[("ban3", "板")]
+        self.assertEqual(self.data.simplified_for("闆"), [entry])
+        self.assertEqual(
+            self.data.find_example("黑板"), [(entry, entry.variants["板"])]
+        )
+        self.assertEqual(self.data.read_as("ban3"), [entry])
+        self.assertEqual(self.data.simplified_for("發"), [])
+
+    def test_replacing(self):
+        # Adding a traditional character again starts it over.
+        data = self.data
+        data.add_traditional_char("ban3", "板", "板", "board", "bǎn")
+        entry = data.entries[("ban3", "板")]
+        self.assertEqual(entry.rows, 1)
+        self.assertEqual(entry.traditional, ["板", "闆"])
+        self.assertEqual(data.find_example("黑板"), [])
+        self.assertEqual(data.simplified_for("板"), [entry])
+
+        # So does adding an entry again.
+        new = data.add_simplified_char("ban3", "板", "u-006")
+        self.assertEqual(data.simplified_for("闆"), [])
+        self.assertEqual(data.find_example("老闆"), [])
+        self.assertEqual(data.read_as("ban3"), [new])
+
+    def test_data_file_indexes(self):
+        data = homophones.read_data(str(DATA_FILE))
+        # 委託 is an example of both 托 and 託.
+        self.assertEqual(
+            sorted(variant.traditional for _, variant in data.find_example("委託")),
+            ["托", "託"],
+        )
+        self.assertEqual(
+            [entry.simplified for entry in data.simplified_for("髮")], ["发"]
+        )
+
+    def test_pickle(self):
+        # The cache pickles only the entries; the indexes are built on use.
+        data = homophones.read_data(str(DATA_FILE))
+        copy = pickle.loads(pickle.dumps(data, pickle.HIGHEST_PROTOCOL))
+        self.assertEqual(copy.keys, data.keys)
+        self.assertEqual(
+            homophones.generate_html_table(copy), homophones.generate_html_table(data)
+        )
+        self.assertEqual(len(copy.find_example("委託")), 2)
+        self.assertEqual(copy.read_as("fa1"), [copy.entries[("fa1", "发")]])
+        self.assertIs(type(copy.find_example("委託")[0][1].examples[0]), Example)
+
+    def test_write_html_table(self):
+        data = homophones.read_data(str(DATA_FILE))
+        out = io.StringIO()
+        homophones.write_html_table(data, out)
+        out.write("\n")
+        golden = (GOLDEN_DIR / "homophone_table.html.golden").read_text("utf-8")
+        self.assertEqual(out.getvalue(), golden)
+        self.assertEqual(homophones.generate_html_table(data) + "\n", golden)
+
+
+if __name__ == "__main__":
+    unittest.main()
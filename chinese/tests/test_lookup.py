@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for zhgen.lookup on the checked-in data."""
+
+import io
+import json
+import tempfile
+import unittest
+
+from zhgen.cache import ParseCache
+from zhgen.lookup import (
+    FREQUENCY_FILE,
+    TRANSLIT_FILE,
+    build_index,
+    load_index,
+    parse_syllable,
+    run_batch,
+)
+
+
+class TestParseSyllable(unittest.TestCase):
+    def test_forms(self):
+        self.assertEqual(parse_syllable("ma3"), ("ma", 3))
+        self.assertEqual(parse_syllable("mǎ"), ("ma", 3))
+        self.assertEqual(parse_syllable("MA"), ("ma", None))
+        self.assertEqual(parse_syllable("lǜ"), ("lv", 4))
+        self.assertEqual(parse_syllable("nü3"), ("nv", 3))
+        self.assertEqual(parse_syllable("de5"), ("de", 0))
+
+    def test_not_a_syllable(self):
+        self.assertIsNone(parse_syllable("了"))
+        self.assertIsNone(parse_syllable("ma 3"))
+        self.assertIsNone(parse_syllable("3"))
+
+
+class TestLookupIndex(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.index = build_index(FREQUENCY_FILE, TRANSLIT_FILE)
+
+    def test_char(self):
+        result = self.index.query("的")
+        self.assertEqual(result["rank"], 1)
+        self.assertEqual(result["readings"], [{"pinyin": "de0", "primary": True}])
+
+    def test_char_with_translit_counts(self):
+        result = self.index.query("斯")
+        self.assertEqual(result["translit"][0], {"pinyin": "si1", "count": 601})
+        self.assertEqual(
+            result["translit_count"], sum(t["count"] for t in result["translit"])
+        )
+
+    def test_syllable_is_ranked(self):
+        result = self.index.query("ma3")
+        ranks = [entry["rank"] for entry in result["chars"]]
+        self.assertEqual(ranks, sorted(ranks))
+        self.assertTrue(all(entry["pinyin"] == "ma3" for entry in result["chars"]))
+        self.assertEqual(self.index.query("mǎ"), {**result, "query": "mǎ"})
+
+    def test_toneless_syllable_lists_every_tone(self):
+        every = self.index.query("ma")["count"]
+        by_tone = sum(
+            self.index.query(f"ma{tone}").get("count", 0) for tone in range(5)
+        )
+        self.assertEqual(every, by_tone)
+
+    def test_limit(self):
+        self.assertEqual(len(self.index.query("ma", limit=2)["chars"]), 2)
+
+    def test_errors(self):
+        self.assertEqual(self.index.query("zzz")["error"], "not found")
+        self.assertIn("error", self.index.query("hello world"))
+
+    def test_batch(self):
+        out = io.StringIO()
+        run_batch(self.index, ["ma3\n", "\n", "的\n"], out)
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([line["query"] for line in lines], ["ma3", "的"])
+
+    def test_cached_index_matches(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ParseCache(directory)
+            load_index(cache=cache)
+            cached = load_index(cache=cache)
+        self.assertEqual(cached.chars, self.index.chars)
+        self.assertEqual(cached.syllables, self.index.syllables)
+
+
+if __name__ == "__main__":
+    unittest.main()
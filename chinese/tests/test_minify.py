@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for zhgen.minify and the --minify and --gzip options."""
+
+import gzip
+import os
+import tempfile
+import unittest
+
+from tests.helpers import GOLDEN_DIR, run_script
+from zhgen.minify import ArtifactWriter, minify_html
+from zhgen.shards import assemble
+
+
+class TestMinifyHtml(unittest.TestCase):
+    def test_structural_whitespace(self):
+        self.assertEqual(
+            minify_html("<table>\n  <tr>\n\t<td> x </td>\n  </tr>\n</table>\n"),
+            "<table><tr><td>x</td></tr></table>",
+        )
+
+    def test_inline_whitespace_is_kept(self):
+        # A space between two spans renders, so it stays, collapsed.
+        self.assertEqual(
+            minify_html("<td><span>a</span>\n\n<span>b</span>  c</td>"),
+            "<td><span>a</span>\n<span>b</span> c</td>",
+        )
+
+    def test_repeated_attribute(self):
+        self.assertEqual(
+            minify_html("<td  class='tone0'\n class='empty'></td>"),
+            "<td class='tone0'></td>",
+        )
+
+    def test_values_untouched(self):
+        html = '<span title="a  b" class="x">了  </span><br />'
+        self.assertEqual(
+            minify_html(html), '<span title="a  b" class="x">了 </span><br/>'
+        )
+
+    def test_quoted_angle_bracket(self):
+        # The tag does not end at a ">" inside a quoted attribute value.
+        html = "<td  title=\"a>  b\"\n class='x > y'>c</td>"
+        self.assertEqual(minify_html(html), "<td title=\"a>  b\" class='x > y'>c</td>")
+
+    def test_raw_elements(self):
+        html = "<pre>\n  a\n  b\n</pre><!--  x  --><td> <script> 1  +  2 </script>"
+        self.assertEqual(
+            minify_html(html),
+            "<pre>\n  a\n  b\n</pre><!--  x  --><td><script> 1  +  2 </script>",
+        )
+
+    def test_idempotent(self):
+        html = (GOLDEN_DIR / "homophone_table.html.golden").read_text("utf-8")
+        once = minify_html(html)
+        self.assertLess(len(once), len(html))
+        self.assertEqual(minify_html(once), once)
+
+
+class TestArtifactWriter(unittest.TestCase):
+    def test_gzip_is_deterministic(self):
+        html = "<table>\n<tr><td> 了 </td></tr>\n</table>"
+        with tempfile.TemporaryDirectory(prefix="zhgen-test-") as workdir:
+            path = os.path.join(workdir, "t.html")
+            writer = ArtifactWriter(minify=True, gzip=True)
+            sizes = writer.write(path, html)
+            with open(path + ".gz", "rb") as f:
+                first = f.read()
+            writer.write(path, html)
+            with open(path + ".gz", "rb") as f:
+                second = f.read()
+            with open(path, "rb") as f:
+                written = f.read()
+        self.assertEqual(first, second)
+        self.assertEqual(gzip.decompress(first), written)
+        self.assertEqual(written, minify_html(html).encode("utf-8"))
+        self.assertEqual(sizes, (len(html.encode("utf-8")), len(written), len(first)))
+
+
+class TestMinifiedOutput(unittest.TestCase):
+    def test_tone_table(self):
+        _, files = run_script(
+            ["tonetable/make_tone_table.py", "--no-cache", "--minify", "--gzip"],
+            ["tonetable/frequency_pinyin_table.txt"],
+            ["tone_table.html", "tone_table.html.gz"],
+        )
+        golden = (GOLDEN_DIR / "tone_table.html.golden").read_text("utf-8")
+        self.assertEqual(files["tone_table.html"].decode("utf-8"), minify_html(golden))
+        self.assertEqual(
+            gzip.decompress(files["tone_table.html.gz"]), files["tone_table.html"]
+        )
+
+    def test_homophone_shards(self):
+        golden = (GOLDEN_DIR / "homophone_table.html.golden").read_text("utf-8")
+        with tempfile.TemporaryDirectory(prefix="zhgen-test-") as workdir:
+            run_script(
+                [
+                    "homophone_subs/make_homophone_subs_html.py",
+                    "--no-cache",
+                    "--shards",
+                    "--minify",
+                    "--gzip",
+                ],
+                ["homophone_subs/homophone_subs.txt"],
+                workdir=workdir,
+            )
+            table = assemble(os.path.join(workdir, "homophone_table"))
+        # Fragment boundaries fall next to <tr> tags, so minifying each
+        # piece gives the same table as minifying the whole.
+        self.assertEqual(table, minify_html(golden))
+
+
+if __name__ == "__main__":
+    unittest.main()
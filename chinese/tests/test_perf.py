@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+
+"""
+Time and memory regression check for every generator.
+
+Timings depend on the machine, so the baseline is recorded locally rather
+than checked in, and the test only runs when ZHGEN_PERF_BASELINE names it:
+
+    python3 -m zhgen.bench --sizes 1e4,1e5 --repeat 3 --output perf.json
+    # ...change something...
+    ZHGEN_PERF_BASELINE=perf.json python3 -m unittest tests.test_perf
+
+ZHGEN_PERF_TOLERANCE sets the allowed growth (default 0.25, i.e. 25%).
+"""
+
+import json
+import os
+import unittest
+
+from zhgen.bench import CHECK_TOLERANCE, check_baseline
+
+BASELINE = os.environ.get("ZHGEN_PERF_BASELINE")
+
+
+@unittest.skipUnless(BASELINE, "ZHGEN_PERF_BASELINE is not set")
+class TestPerformance(unittest.TestCase):
+    def test_no_regressions(self):
+        with open(BASELINE, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        tolerance = float(os.environ.get("ZHGEN_PERF_TOLERANCE", CHECK_TOLERANCE))
+        _, problems = check_baseline(baseline, tolerance)
+        self.assertEqual(problems, [], "\n".join(problems))
+
+
+if __name__ == "__main__":
+    unittest.main()
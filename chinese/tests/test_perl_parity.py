@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+
+"""
+make_tone_table.py against the original make_tone_table.pl.
+
+The Python version puts each <span> and closing </td> on its own line where
+the Perl version prints a cell on one line, so the two are compared with
+newlines removed. Skipped when perl is not installed.
+"""
+
+import random
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from tests.helpers import CHINESE_DIR, run_script
+from zhgen.bench import SEED, real_syllables, write_tone_table
+
+DATA_FILE = "tonetable/frequency_pinyin_table.txt"
+
+# Lines of synthetic data; enough to fill every frequency level.
+SYNTHETIC_LINES = 20_000
+
+
+def _without_newlines(output):
+    return output.decode("utf-8").replace("\n", "")
+
+
+@unittest.skipUnless(shutil.which("perl"), "perl is not installed")
+class TestPerlParity(unittest.TestCase):
+    def assertSameTable(self, data_file):
+        perl_output, _ = run_script(
+            ["perl", str(CHINESE_DIR / "tonetable" / "make_tone_table.pl")],
+            [data_file],
+        )
+        _, files = run_script(
+            ["tonetable/make_tone_table.py", "--no-cache"],
+            [data_file],
+            ["tone_table.html"],
+        )
+        self.assertTrue(perl_output.startswith(b"<table>"))
+        self.assertEqual(
+            _without_newlines(files["tone_table.html"]),
+            _without_newlines(perl_output),
+        )
+
+    def test_real_data(self):
+        self.assertSameTable(DATA_FILE)
+
+    def test_synthetic_data(self):
+        rng = random.Random(f"{SEED}-perl-parity")
+        with tempfile.TemporaryDirectory(prefix="zhgen-test-") as workdir:
+            path = Path(workdir) / "frequency_pinyin_table.txt"
+            write_tone_table(path, SYNTHETIC_LINES, rng, real_syllables())
+            self.assertSameTable(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for zhgen.pinyin."""
+
+import unittest
+
+from zhgen import pinyin
+from zhgen.pinyin import (
+    fold_umlaut,
+    split_syllables,
+    split_tone,
+    strip_tone,
+    to_marked,
+    to_numbered,
+)
+
+
+class TestToNumbered(unittest.TestCase):
+    def test_tone_marks(self):
+        for marked, numbered in [
+            ("fā", "fa1"),
+            ("má", "ma2"),
+            ("hǎo", "hao3"),
+            ("shì", "shi4"),
+            ("xué", "xue2"),
+            ("ŏu", "ou3"),  # breve in place of the caron
+        ]:
+            with self.subTest(marked):
+                self.assertEqual(to_numbered(marked), numbered)
+
+    def test_uppercase(self):
+        self.assertEqual(to_numbered("Fā"), "fa1")
+        self.assertEqual(to_numbered("FĀ"), "fa1")
+        self.assertEqual(to_numbered("ZHI4"), "zhi4")
+
+    def test_numbered_input_is_kept(self):
+        self.assertEqual(to_numbered("fa1"), "fa1")
+        self.assertEqual(to_numbered("de5"), "de5")
+        self.assertEqual(to_numbered("de0"), "de0")
+
+    def test_default_tone(self):
+        self.assertEqual(pinyin.DEFAULT_TONE, "1")
+        self.assertEqual(to_numbered("de"), "de1")
+        self.assertEqual(to_numbered(""), "")
+
+    def test_umlaut(self):
+        # Only a tone-marked ü becomes v.
+        self.assertEqual(to_numbered("lǜ"), "lv4")
+        self.assertEqual(to_numbered("Nǚ"), "nv3")
+        self.assertEqual(to_numbered("lü"), "lü1")
+        self.assertEqual(to_numbered("lv4"), "lv4")
+        # The transliteration data spells 律 "lu:4", and the frequency
+        # table keeps that spelling.
+        self.assertEqual(to_numbered("lu:4"), "lu:4")
+
+    def test_memo_is_bounded(self):
+        info = to_numbered.cache_info()
+        self.assertEqual(info.maxsize, pinyin.MEMO_SIZE)
+        for i in range(pinyin.MEMO_SIZE + 10):
+            to_numbered(f"x{i}")
+        self.assertEqual(to_numbered.cache_info().currsize, pinyin.MEMO_SIZE)
+        self.assertEqual(to_numbered("hǎo"), "hao3")
+
+
+class TestSplitSyllables(unittest.TestCase):
+    def test_split(self):
+        self.assertEqual(split_syllables("Ā lì  yà"), ["a1", "li4", "ya4"])
+        self.assertEqual(split_syllables("fei1 lu:4 bin1"), ["fei1", "lu:4", "bin1"])
+        self.assertEqual(split_syllables("  "), [])
+
+    def test_matches_to_numbered(self):
+        text = "Xī Bān yá de ma"
+        self.assertEqual(split_syllables(text), [to_numbered(s) for s in text.split()])
+
+
+class TestSplitTone(unittest.TestCase):
+    def test_split(self):
+        self.assertEqual(split_tone("fa1"), ("fa", 1))
+        self.assertEqual(split_tone("de5"), ("de", 5))
+        self.assertEqual(split_tone("lv4"), ("lv", 4))
+
+    def test_no_tone(self):
+        self.assertEqual(split_tone("fa"), ("fa", None))
+        # A lone digit is not a syllable with a tone.
+        self.assertEqual(split_tone("1"), ("1", None))
+
+    def test_non_ascii_digits(self):
+        # str.isdigit() accepts these, but int() would not, and they are not
+        # tone numbers.
+        for syllable in ["ma²", "ma٣", "ma３"]:
+            with self.subTest(syllable):
+                self.assertEqual(split_tone(syllable), (syllable, None))
+                self.assertEqual(strip_tone(syllable), syllable)
+
+
+class TestToMarked(unittest.TestCase):
+    def test_placement(self):
+        for numbered, marked in [
+            ("hao3", "hǎo"),  # a wins
+            ("xue2", "xué"),  # then e
+            ("gou3", "gǒu"),  # then the o of ou
+            ("liu2", "liú"),  # otherwise the last vowel
+            ("gui4", "guì"),
+            ("zhi1", "zhī"),
+        ]:
+            with self.subTest(numbered):
+                self.assertEqual(to_marked(numbered), marked)
+
+    def test_umlaut(self):
+        self.assertEqual(to_marked("lve4"), "lüè")
+        self.assertEqual(to_marked("lv3"), "lǚ")
+        self.assertEqual(to_marked("nü3"), "nǚ")
+        self.assertEqual(to_marked("lv"), "lü")
+
+    def test_uppercase(self):
+        self.assertEqual(to_marked("Hao3"), "hǎo")
+
+    def test_neutral_and_missing_tone(self):
+        self.assertEqual(to_marked("de5"), "de")
+        self.assertEqual(to_marked("de0"), "de")
+        self.assertEqual(to_marked("de"), "de")
+
+    def test_round_trip(self):
+        for numbered in ["ma1", "ma2", "ma3", "ma4", "nv3", "xiong2"]:
+            with self.subTest(numbered):
+                self.assertEqual(to_numbered(to_marked(numbered)), numbered)
+
+
+class TestFoldUmlaut(unittest.TestCase):
+    def test_fold(self):
+        self.assertEqual(fold_umlaut("lü4"), "lv4")
+        self.assertEqual(fold_umlaut("LÜ"), "Lv")
+        self.assertEqual(fold_umlaut("lv4"), "lv4")
+
+
+if __name__ == "__main__":
+    unittest.main()
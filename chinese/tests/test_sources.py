@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for zhgen.sources."""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from zhgen import sources
+
+MODULES = {
+    "__init__.py": "",
+    "top.py": "from zhgen.middle import helper\n",
+    "middle.py": "from zhgen import leaf, missing\n\ndef helper():\n    pass\n",
+    "leaf.py": "VALUE = 1\n",
+    "unused.py": "VALUE = 2\n",
+}
+
+
+class TestSources(unittest.TestCase):
+    def setUp(self):
+        scratch = tempfile.TemporaryDirectory(prefix="zhgen-test-")
+        self.addCleanup(scratch.cleanup)
+        self.package = os.path.join(scratch.name, "zhgen")
+        os.mkdir(self.package)
+        for name, text in MODULES.items():
+            self.write(name, text)
+        self.script = os.path.join(scratch.name, "script.py")
+        with open(self.script, "w", encoding="utf-8") as f:
+            f.write("import zhgen.top\n")
+        patcher = mock.patch.object(sources, "ZHGEN_DIR", self.package)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        sources.zhgen_imports.cache_clear()
+        self.addCleanup(sources.zhgen_imports.cache_clear)
+
+    def write(self, name, text):
+        with open(os.path.join(self.package, name), "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def test_imported_files(self):
+        files = sources.imported_files([self.script], self.package)
+        self.assertEqual(
+            [os.path.relpath(path, os.path.dirname(self.script)) for path in files],
+            [
+                "script.py",
+                os.path.join("zhgen", "__init__.py"),
+                os.path.join("zhgen", "leaf.py"),
+                os.path.join("zhgen", "middle.py"),
+                os.path.join("zhgen", "top.py"),
+            ],
+        )
+
+    def test_digest(self):
+        digest = sources.source_digest([self.script])
+        self.assertEqual(sources.source_digest([self.script]), digest)
+        # A module that is not imported does not count.
+        self.write("unused.py", "VALUE = 3\n")
+        self.assertEqual(sources.source_digest([self.script]), digest)
+        # One imported through another module does.
+        self.write("leaf.py", "VALUE = 3\n")
+        self.assertNotEqual(sources.source_digest([self.script]), digest)
+
+
+if __name__ == "__main__":
+    unittest.main()
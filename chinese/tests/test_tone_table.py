@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for the tone table's cell store and FrequencyTable.load()."""
+
+import os
+import tempfile
+import unittest
+
+from tests.helpers import import_script
+from zhgen.freqtable import FrequencyTable
+from zhgen.stats import NULL_STATS, Stats
+
+tone_table = import_script("tonetable/make_tone_table.py")
+
+
+def load(text, stats=NULL_STATS):
+    with tempfile.TemporaryDirectory(prefix="zhgen-test-") as workdir:
+        path = os.path.join(workdir, "frequency_pinyin_table.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return FrequencyTable.load(path, stats)
+
+
+class TestBuildCells(unittest.TestCase):
+    def test_tones(self):
+        stats = Stats("test")
+        cells = tone_table.build_cells(
+            load("的 1 de5\n得 2 de2\n地 3 de4\n嘚 4 de1*\n"), stats=stats
+        )
+        slots, mask = cells.row("de")
+        self.assertEqual(slots[0 * cells.levels], "的")
+        self.assertEqual(slots[2 * cells.levels], "得")
+        self.assertEqual(slots[4 * cells.levels], "地")
+        self.assertEqual(mask, 0b10101)
+        self.assertEqual(stats.counters["characters"], 3)
+        self.assertEqual(stats.counters["skipped.secondary"], 1)
+
+    def test_tones_out_of_range_are_skipped(self):
+        # The Perl version ignored these; they must not index past the
+        # syllable's slots.
+        stats = Stats("test")
+        cells = tone_table.build_cells(
+            load("的 1 de5\n得 2 de6\n地 3 de9\n了 4 le\n"), stats=stats
+        )
+        slots, mask = cells.row("de")
+        self.assertEqual(slots[0], "的")
+        self.assertEqual(mask, 0b1)
+        self.assertNotIn("le", cells)
+        self.assertEqual(stats.counters["characters"], 1)
+        self.assertEqual(stats.counters["skipped.bad_tone"], 2)
+        self.assertEqual(stats.counters["skipped.no_tone"], 1)
+
+
+class TestLoad(unittest.TestCase):
+    def test_non_ascii_tone_is_skipped(self):
+        stats = Stats("test")
+        table = load("马 5 ma²\n妈 6 ma1\n吗 7 ma٣*\n", stats)
+        self.assertEqual(list(table.chars), ["妈"])
+        self.assertEqual(stats.counters["skipped.unparsed"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+
+"""Tests for zhgen.tsv.ColumnReader against the plain text-mode loop."""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from zhgen import tsv
+from zhgen.tsv import ColumnReader
+
+COLUMNS = (1, 2)
+
+# Block sizes that put block edges inside, at and between lines.
+BLOCK_SIZES = [1, 7, 16, 64, tsv.BLOCK_SIZE]
+
+FILES = {
+    "plain": "# Name\tHanzi\tPinyin\nLi\t李\tLǐ\n\nBad\t坏\nWang\t王\tWáng\n",
+    "no_final_newline": "Li\t李\tLǐ\nWang\t王\tWáng",
+    "crlf": "# c\r\nLi\t李\tLǐ\r\n\r\nBad\t坏\r\nWang\t王\tWáng\r\n",
+    "bare_cr": (
+        "# Names\nLi\t李\tLǐ\rWang\t王\tWáng\r\rBad\t坏\r# c\rZhao\t赵\tZhào\n"
+        "Sun\t孙\tSūn\r"
+    ),
+    "cr_mid_block": "A\t安\tĀn\nB\t白\tBái\nC\t陈\tChén\rD\t邓\tDèng\nE\t鄂\tÈ\n",
+    "unicode_spaces": (
+        "\u3000Li\t李\tLǐ\u3000\n"  # ideographic spaces around a record
+        "\u00a0\n"  # blank once str.strip() removes the NBSP
+        "\u2003# comment\n"
+        "Bad\t坏\u2028\n"  # too few columns, edged by LINE SEPARATOR
+        "Wang\t王\u00a0\tWáng\n"  # NBSP inside a column is kept
+        "\x1cZhao\t赵\tZhào\x1f\n"
+        "Sun\t孙\tSūn\n"
+    ),
+    "long_lines": (
+        "Long\t" + "长" * 40 + "\t" + " ".join(["cháng"] * 40) + "\n"
+        "Li\t李\tLǐ\n" + "# " + "x" * 100 + "\n" + "Bad\t" + "坏" * 30 + "\n"
+    ),
+}
+
+
+def reference(path, columns=COLUMNS):
+    """The text-mode loop that ColumnReader replaces."""
+    records = []
+    skipped = []
+    line_count = blank = comment = 0
+    with open(path, "r", encoding="utf-8") as f:
+        for line_count, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                blank += 1
+                continue
+            if line.startswith("#"):
+                comment += 1
+                continue
+            parts = line.split("\t")
+            if len(parts) <= max(columns):
+                skipped.append((line_count, line))
+                continue
+            records.append(tuple(parts[column] for column in columns))
+    return records, line_count, blank, comment, skipped
+
+
+def read(path, columns=COLUMNS, start=0, end=None):
+    reader = ColumnReader(path, columns, start, end)
+    records = list(reader)
+    return (
+        records,
+        reader.line_count,
+        reader.blank_count,
+        reader.comment_count,
+        reader.skipped,
+    )
+
+
+class TestColumnReader(unittest.TestCase):
+    def setUp(self):
+        scratch = tempfile.TemporaryDirectory(prefix="zhgen-test-")
+        self.addCleanup(scratch.cleanup)
+        self.workdir = scratch.name
+
+    def write(self, name, text):
+        path = os.path.join(self.workdir, name)
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+        return path
+
+    def test_matches_text_loop(self):
+        for name, text in FILES.items():
+            path = self.write(name, text)
+            expected = reference(path)
+            for block_size in BLOCK_SIZES:
+                with self.subTest(name, block_size=block_size), mock.patch.object(
+                    tsv, "BLOCK_SIZE", block_size
+                ):
+                    self.assertEqual(read(path), expected)
+
+    def test_skipped_line_numbers(self):
+        path = self.write("bare_cr", FILES["bare_cr"])
+        with mock.patch.object(tsv, "BLOCK_SIZE", 7):
+            _, line_count, blank, comment, skipped = read(path)
+        self.assertEqual(skipped, [(5, "Bad\t坏")])
+        self.assertEqual((line_count, blank, comment), (8, 1, 2))
+
+        path = self.write("unicode_spaces", FILES["unicode_spaces"])
+        _, _, _, _, skipped = read(path)
+        self.assertEqual(skipped, [(4, "Bad\t坏")])
+
+    def test_other_columns(self):
+        path = self.write("plain", FILES["plain"])
+        self.assertEqual(read(path, (2,)), reference(path, (2,)))
+        self.assertEqual(read(path, (0, 1, 2)), reference(path, (0, 1, 2)))
+
+    def test_byte_range(self):
+        # Line numbers are relative to the start of the range.
+        text = FILES["plain"] + FILES["unicode_spaces"]
+        path = self.write("combined", text)
+        start = len(FILES["plain"].encode("utf-8"))
+        tail = self.write("tail", FILES["unicode_spaces"])
+        with mock.patch.object(tsv, "BLOCK_SIZE", 16):
+            self.assertEqual(read(path, start=start), reference(tail))
+            head_records, *_ = read(path, end=start)
+        self.assertEqual(head_records, reference(self.write("head", FILES["plain"]))[0])
+
+    def test_empty(self):
+        path = self.write("empty", "")
+        self.assertEqual(read(path), ([], 0, 0, 0, []))
+
+
+if __name__ == "__main__":
+    unittest.main()
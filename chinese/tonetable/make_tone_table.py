@@ -6,190 +6,277 @@ Generate a HTML tone table from frequency_pinyin_table.txt
 Mimics the behavior of make_tone_table.pl
 """
 
-import re
-from collections import defaultdict
-
-
-def frequency_level(rank):
-    """Assign a frequency level based on rank."""
-    rank = int(rank)
-    if rank < 250:
-        return 0
-    elif rank < 500:
-        return 1
-    elif rank < 1000:
-        return 2
-    elif rank < 1500:
-        return 3
-    elif rank < 2000:
-        return 4
-    elif rank < 2500:
-        return 5
-    else:
-        return 6
-
-
-def join_initial_final(initial, final):
-    """Given initial and final, return the standard way of writing in pinyin."""
-    if initial == "-":
-        if final == "u":
-            final = "wu"
-        elif final == "i":
-            final = "yi"
-        elif final == "ui":
-            final = "wei"
-        elif final.startswith("v"):
-            final = "yu" + final[1:]
-        elif final.startswith("i"):
-            final = "y" + final[1:]
-        elif final.startswith("u"):
-            final = "w" + final[1:]
-        initial = ""
-    else:
-        if final == "iou":
-            final = "iu"
-        elif final == "uen":
-            final = "un"
-
-    if initial in ["j", "q", "x"]:
-        if final.startswith("u"):
-            final = "X" + final[1:]
-        final = final.replace("v", "u")
-
-    return initial + final
-
-
-def parse_data_file(filename):
-    """Parse the frequency_pinyin_table.txt file."""
-    syllables = defaultdict(lambda: defaultdict(lambda: defaultdict(str)))
-
-    with open(filename, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith("#"):
-                continue
+import argparse
+import math
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from zhgen.cache import add_cache_argument, make_cache  # noqa: E402
+from zhgen.freqtable import (  # noqa: E402
+    LEVEL_BOUNDS,
+    NO_TONE,
+    FrequencyTable,
+    frequency_level,
+)
+from zhgen.minify import ArtifactWriter, add_artifact_arguments  # noqa: E402
+from zhgen.phonology import TONE_TABLE_GRID  # noqa: E402
+from zhgen.shards import shard_directory, write_shards  # noqa: E402
+from zhgen.stats import NULL_STATS, add_stats_argument, make_stats  # noqa: E402
+
+OUTPUT_FILE = "tone_table.html"
+
+# The page styles frequency levels freq0 to freq5.
+MAX_LEVELS = 6
+
+# Tones 0 (neutral) to 4.
+TONES = 5
+
+
+class ToneCells:
+    """
+    Characters of each syllable, by tone and frequency level.
+
+    Each syllable has a fixed block of TONES x levels slots. While building,
+    a slot holds a list of characters; freeze() joins every list once into a
+    string and makes the store read-only, so rendering only indexes into
+    prebuilt tuples.
+
+    Args:
+        levels (int): Number of frequency levels
+    """
+
+    __slots__ = (
+        "levels",
+        "syllables",
+        "_ids",
+        "_slots",
+        "_tone_masks",
+        "_empty",
+        "_frozen",
+    )
 
-            # Parse: char\trank\tpinyin
-            match = re.match(r"^(\S+)\s+(\d+)\s+(\S+)$", line)
-            if not match:
+    def __init__(self, levels=len(LEVEL_BOUNDS)):
+        self.levels = levels
+        self._empty = ("",) * (TONES * levels)
+        self.syllables = []  # syllable id -> syllable
+        self._ids = {}  # syllable -> syllable id
+        self._slots = []  # syllable id -> slots, tone-major
+        self._tone_masks = []  # syllable id -> bit per tone with characters
+        self._frozen = False
+
+    def __len__(self):
+        return len(self.syllables)
+
+    def __contains__(self, syllable):
+        return syllable in self._ids
+
+    def add(self, syllable, tone, level, char):
+        """Append a character to the slot of (syllable, tone, level)."""
+        if self._frozen:
+            raise TypeError("ToneCells is read-only after freeze()")
+        syllable_id = self._ids.get(syllable)
+        if syllable_id is None:
+            syllable_id = self._ids[syllable] = len(self.syllables)
+            self.syllables.append(syllable)
+            self._slots.append([None] * len(self._empty))
+            self._tone_masks.append(0)
+        slots = self._slots[syllable_id]
+        index = tone * self.levels + level
+        if slots[index] is None:
+            slots[index] = [char]
+        else:
+            slots[index].append(char)
+        self._tone_masks[syllable_id] |= 1 << tone
+
+    def freeze(self):
+        """Join each slot's characters and make the store read-only."""
+        if not self._frozen:
+            self._slots = tuple(
+                tuple("" if chars is None else "".join(chars) for chars in slots)
+                for slots in self._slots
+            )
+            self._tone_masks = tuple(self._tone_masks)
+            self._frozen = True
+        return self
+
+    def row(self, syllable):
+        """
+        Return (slots, tone mask) for a syllable of a frozen store.
+
+        slots holds the characters of slot tone * levels + level;
+        bit t of the mask is set if tone t has any characters. An unknown
+        syllable gets empty slots.
+        """
+        syllable_id = self._ids.get(syllable)
+        if syllable_id is None:
+            return self._empty, 0
+        return self._slots[syllable_id], self._tone_masks[syllable_id]
+
+
+def parse_data_file(filename, stats=NULL_STATS):
+    """
+    Parse the frequency_pinyin_table.txt file.
+
+    Returns:
+        FrequencyTable: Every data line, as columns
+    """
+    with stats.stage("parse"):
+        return FrequencyTable.load(filename, stats)
+
+
+def build_cells(table, bounds=LEVEL_BOUNDS, stats=NULL_STATS):
+    """
+    Collect the characters to show in one tone table.
+
+    Args:
+        table (FrequencyTable): The parsed data file
+        bounds (tuple): Rank thresholds; level i holds the ranks below
+            bounds[i], and ranks from the last bound up are left out
+        stats (Stats): Receives character and skip counters
+
+    Returns:
+        ToneCells: The characters to show, frozen
+    """
+    with stats.stage("aggregate"):
+        cells = ToneCells(len(bounds))
+        chars = table.chars
+        ranks = table.ranks
+        names = table.syllables
+        syllable_ids = table.syllable_ids
+        tones = table.tones
+        selected = table.select(
+            max_level=len(bounds) - 1, primary_only=True, bounds=bounds
+        )
+        for i in selected:
+            tone = tones[i]
+            if tone == NO_TONE:
+                stats.skip("no_tone")
                 continue
+            if tone == 5:  # Convert tone 5 to 0 (neutral tone)
+                tone = 0
+            elif tone >= TONES:
+                stats.skip("bad_tone")
+                continue
+            level = frequency_level(ranks[i], bounds)
+            cells.add(names[syllable_ids[i]], tone, level, chars[i])
+            stats.count("characters")
+        cells.freeze()
+
+    primary = sum(table.primary)
+    stats.skip("secondary", len(table) - primary)
+    stats.skip("infrequent", primary - len(selected))
+    return cells
+
+
+def parse_variant(text):
+    """
+    Parse a --variant value such as "top1000.html=250,500,1000".
+
+    The last threshold may be "all" to keep every rank.
+
+    Returns:
+        tuple: (output file, rank thresholds)
+    """
+    output, sep, spec = text.partition("=")
+    if not sep or not output:
+        raise argparse.ArgumentTypeError(f"expected FILE=RANKS, got {text!r}")
+    bounds = []
+    parts = spec.split(",")
+    for index, part in enumerate(parts):
+        if part == "all" and index == len(parts) - 1:
+            bounds.append(math.inf)
+            continue
+        try:
+            bound = int(part)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"bad rank threshold {part!r}")
+        if bound < 1 or (bounds and bound <= bounds[-1]):
+            raise argparse.ArgumentTypeError(
+                "rank thresholds must be positive and increasing"
+            )
+        bounds.append(bound)
+    if len(bounds) > MAX_LEVELS:
+        raise argparse.ArgumentTypeError(
+            f"at most {MAX_LEVELS} thresholds (freq0..freq{MAX_LEVELS - 1})"
+        )
+    return output, tuple(bounds)
+
+
+TABLE_HEAD = [
+    "<table>",
+    "<tr><th></th><th>0</th><th>1</th><th>2</th><th>3</th><th>4</th></tr>",
+]
+TABLE_TAIL = "</table>"
+
+
+def row_groups(syllables):
+    """
+    Yield the table rows grouped by final, in table order.
+
+    "er" comes first as a group of its own, then one group per final with
+    the syllables that have characters, initials in grid order. Finals with
+    no such syllables are left out.
+
+    Yields:
+        tuple: (final, HTML lines, number of rows)
+    """
+    html_lines = []
+    print_row("er", syllables, html_lines)
+    yield "er", html_lines, 1
 
-            zi, rank, pinyin = match.groups()
-            rank = int(rank)
-            is_primary = not pinyin.endswith("*")
-            freq = frequency_level(rank)
-            is_frequent = freq < 6
-
-            if is_primary and is_frequent:
-                # Extract syllable and tone
-                tone_match = re.match(r"^(.+?)(\d)$", pinyin)
-                if tone_match:
-                    syll, tone = tone_match.groups()
-                    tone = int(tone)
-                    if tone == 5:  # Convert tone 5 to 0 (neutral tone)
-                        tone = 0
-                    syllables[syll][tone][freq] += zi
-
-    return syllables
+    for final, row in zip(TONE_TABLE_GRID.finals, TONE_TABLE_GRID.rows):
+        html_lines = []
+        rows = 0
+        for syllable in row:
+            if syllable is not None and syllable in syllables:
+                print_row(syllable, syllables, html_lines)
+                rows += 1
+        if rows:
+            yield final, html_lines, rows
 
 
 def generate_html_table(syllables):
     """Generate the HTML table."""
-    # Define the syllable patterns to generate
-    initials = [
-        "-",
-        "b",
-        "p",
-        "m",
-        "f",
-        "d",
-        "t",
-        "n",
-        "l",
-        "g",
-        "k",
-        "h",
-        "z",
-        "c",
-        "s",
-        "zh",
-        "ch",
-        "sh",
-        "r",
-        "j",
-        "q",
-        "x",
-    ]
-
-    finals = [
-        "a",
-        "o",
-        "e",
-        "ai",
-        "ei",
-        "ao",
-        "ou",
-        "an",
-        "en",
-        "ang",
-        "eng",
-        "ong",
-        "i",
-        "ia",
-        "iao",
-        "ie",
-        "iou",
-        "ian",
-        "in",
-        "iang",
-        "ing",
-        "iong",
-        "u",
-        "ua",
-        "uo",
-        "uai",
-        "ui",
-        "uan",
-        "uen",
-        "uang",
-        "ueng",
-        "v",
-        "ve",
-        "van",
-        "vn",
-    ]
-
-    html_lines = []
-    html_lines.append("<table>")
-    html_lines.append(
-        "<tr><th></th><th>0</th><th>1</th><th>2</th><th>3</th><th>4</th></tr>"
-    )
-
-    # Print "er" first
-    print_row("er", syllables, html_lines)
+    html_lines = list(TABLE_HEAD)
+    for _, group_lines, _ in row_groups(syllables):
+        html_lines.extend(group_lines)
+    html_lines.append(TABLE_TAIL)
+    return "\n".join(html_lines)
 
-    # Print other syllables
-    for final in finals:
-        for initial in initials:
-            syllable = join_initial_final(initial, final)
-            if syllable in syllables:
-                print_row(syllable, syllables, html_lines)
 
-    html_lines.append("</table>")
-    return "\n".join(html_lines)
+def write_table_shards(directory, syllables, stats=NULL_STATS, writer=None):
+    """
+    Write the table as one fragment per final plus a manifest; see
+    zhgen.shards. The fragments joined in order give generate_html_table(),
+    minified if writer minifies.
+    """
+    return write_shards(
+        directory,
+        "\n".join(TABLE_HEAD) + "\n",
+        (
+            (final, "\n".join(group_lines) + "\n", rows)
+            for final, group_lines, rows in row_groups(syllables)
+        ),
+        TABLE_TAIL,
+        stats,
+        writer,
+    )
 
 
 def print_row(syllable, syllables, html_lines):
     """Print a table row for a syllable."""
     html_lines.append(f"<tr><th class='syllable'>{syllable}</th>")
 
-    for tone in range(5):  # 0-4
-        if not syllables[syllable][tone]:
+    slots, tone_mask = syllables.row(syllable)
+    for tone in range(TONES):
+        if not tone_mask & (1 << tone):
             html_lines.append(f"\t<td class='tone{tone}' class='empty'></td>")
         else:
             html_lines.append(f"\t<td class='tone{tone}'>")
-            for freq in range(6):  # 0-5
-                hanzi = syllables[syllable][tone][freq]
+            start = tone * syllables.levels
+            for freq in range(syllables.levels):
+                hanzi = slots[start + freq]
                 if hanzi:
                     html_lines.append(f"<span class='freq{freq}'>{hanzi}</span>")
             html_lines.append("</td>")
@@ -197,22 +284,71 @@ def print_row(syllable, syllables, html_lines):
     html_lines.append("</tr>")
 
 
-def main():
+def main(argv=None):
     """Main function."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--variant",
+        action="append",
+        type=parse_variant,
+        metavar="FILE=RANKS",
+        help="write a table to FILE with frequency levels split at the "
+        "comma-separated RANKS, e.g. top1000.html=250,500,1000 or "
+        "all.html=250,500,1000,1500,2000,all; may be repeated (default "
+        f"{OUTPUT_FILE}={','.join(map(str, LEVEL_BOUNDS))})",
+    )
+    parser.add_argument(
+        "--shards",
+        action="store_true",
+        help="write each table as a directory of fragments, one per final, "
+        "plus manifest.json, named after its file (tone_table.html -> "
+        "tone_table/)",
+    )
+    add_artifact_arguments(parser)
+    add_cache_argument(parser)
+    add_stats_argument(parser)
+    args = parser.parse_args(argv)
+    stats = make_stats("make_tone_table.py", args.stats)
+    writer = ArtifactWriter(args.minify, args.gzip, stats)
+    cache = make_cache(args.no_cache)
+    variants = args.variant or [(OUTPUT_FILE, LEVEL_BOUNDS)]
+
     input_file = "frequency_pinyin_table.txt"
-    output_file = "tone_table.html"
 
     print(f"Reading data from {input_file}...")
-    syllables = parse_data_file(input_file)
-
-    print("Generating HTML table...")
-    html_table = generate_html_table(syllables)
+    table = cache.load(
+        "make_tone_table",
+        __file__,
+        input_file,
+        lambda: parse_data_file(input_file, stats),
+        stats=stats,
+    )
 
-    print(f"Writing HTML to {output_file}...")
-    with open(output_file, "w", encoding="utf-8") as f:
-        f.write(html_table)
+    # Every variant is built from the same parsed table.
+    for output_file, bounds in variants:
+        syllables = build_cells(table, bounds, stats)
+        stats.count("syllables", len(syllables))
+
+        if args.shards:
+            directory = shard_directory(output_file)
+            print(f"Writing HTML fragments to {directory}/...")
+            with stats.stage("write"):
+                manifest = write_table_shards(directory, syllables, stats, writer)
+            print(f"Wrote {len(manifest['shards'])} fragments")
+            writer.report(f"{directory}/", file=sys.stdout)
+            continue
+
+        print("Generating HTML table...")
+        with stats.stage("render"):
+            html_table = generate_html_table(syllables)
+
+        print(f"Writing HTML to {output_file}...")
+        with stats.stage("write"):
+            writer.write(output_file, html_table)
+        writer.report(output_file, file=sys.stdout)
 
     print("Done!")
+    stats.write(args.stats)
 
 
 if __name__ == "__main__":
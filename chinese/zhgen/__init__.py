@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+
+"""
+Shared helpers for the Python table generators under chinese/.
+
+The generator scripts live in their own directories and are run from there,
+so each one puts chinese/ on sys.path before importing from this package.
+"""
@@ -0,0 +1,444 @@
+# -*- coding: utf-8 -*-
+
+"""
+Scaling benchmarks for the Chinese table generators.
+
+Generates synthetic inputs in each generator's format, runs the generator on
+them in a scratch directory and records wall time, throughput and peak RSS,
+along with the per-stage timings and counters each generator reports with
+--stats.
+Run from the chinese/ directory:
+
+    python3 -m zhgen.bench                          # 10^3 .. 10^5 lines
+    python3 -m zhgen.bench --sizes 1e3,1e6 --output bench.json
+    python3 -m zhgen.bench --compare bench.json     # against an earlier run
+    python3 -m zhgen.bench --check bench.json       # fail if slower or larger
+
+Results are written as JSON along with the commit they were measured at, so
+runs from different commits can be compared with --compare. --check runs the
+generators and sizes recorded in a baseline and exits with status 1 if any of
+them got slower or used more memory than the baseline allows.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from zhgen.pinyin import split_tone, to_marked
+
+CHINESE_DIR = Path(__file__).resolve().parent.parent
+SYLLABLE_SOURCE = CHINESE_DIR / "tonetable" / "frequency_pinyin_table.txt"
+
+DEFAULT_SIZES = [10**3, 10**4, 10**5]
+MAX_LINES = 10**7
+SEED = 20100207
+
+# --check allows this much growth in wall time and peak RSS (as a fraction),
+# and ignores wall time differences below CHECK_MIN_SECONDS as noise.
+CHECK_TOLERANCE = 0.25
+CHECK_MIN_SECONDS = 0.05
+
+# Common CJK ideographs, used as the character pool.
+_CJK_FIRST = 0x4E00
+_CJK_COUNT = 0x9FA5 - 0x4E00
+
+
+def real_syllables():
+    """
+    Return the distinct numbered syllables in the real tone table data.
+
+    The synthetic corpus writers draw their readings from this list.
+    """
+    syllables = set()
+    with open(SYLLABLE_SOURCE, "r", encoding="utf-8") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and not line.startswith("#"):
+                letters, tone = split_tone(parts[2].rstrip("*"))
+                if tone is not None:
+                    syllables.add(f"{letters}{tone}")
+    return sorted(syllables)
+
+
+def _char(rng):
+    return chr(_CJK_FIRST + rng.randrange(_CJK_COUNT))
+
+
+def _word(rng, syllables, length):
+    chars = "".join(_char(rng) for _ in range(length))
+    readings = [rng.choice(syllables) for _ in range(length)]
+    return chars, readings
+
+
+def write_translit(path, lines, rng, syllables):
+    """Write a name_translit.txt-style file: Name, Hanzi, tone-marked Pinyin."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("# Synthetic transliterations\n# Name\tHanzi\tPinyin\n")
+        for i in range(lines - 2):
+            chars, readings = _word(rng, syllables, rng.randint(1, 5))
+            pinyin = " ".join(to_marked(reading) for reading in readings)
+            f.write(f"Name{i}\t{chars}\t{pinyin.capitalize()}\n")
+
+
+def write_char_freqs(path, lines, rng, syllables):
+    """Write a translit_char_freqs_pronunciation.txt-style file."""
+    with open(path, "w", encoding="utf-8") as f:
+        for _ in range(lines):
+            freq = int(rng.paretovariate(1.2))
+            f.write(f"{_char(rng)}\t{freq}\t{rng.choice(syllables)}\n")
+
+
+def write_tone_table(path, lines, rng, syllables):
+    """Write a frequency_pinyin_table.txt-style file: char, rank, pinyin."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("# Synthetic data\n# char\trank\tpinyin\n")
+        for rank in range(1, lines - 1):
+            star = "*" if rng.random() < 0.1 else ""
+            f.write(f"{_char(rng)}\t{rank}\t{rng.choice(syllables)}{star}\n")
+
+
+def write_homophones(path, lines, rng, syllables):
+    """Write a homophone_subs.txt-style file of entries, variants and examples."""
+    written = 0
+    entry = 0
+    with open(path, "w", encoding="utf-8") as f:
+        while written < lines:
+            entry += 1
+            reading = rng.choice(syllables)
+            f.write(f"g-{entry:03d} {_char(rng)} {reading}\n")
+            written += 1
+            for _ in range(rng.randint(2, 3)):
+                f.write(f"\t{_char(rng)} [{to_marked(reading)}] meaning\n")
+                written += 1
+                for _ in range(rng.randint(1, 3)):
+                    chars, readings = _word(rng, syllables, rng.randint(2, 4))
+                    marked = "".join(to_marked(r) for r in readings)
+                    f.write(f"\t\t{chars} [{marked}] example\n")
+                    written += 1
+
+
+# name -> (script relative to chinese/, extra args, {input file: writer})
+GENERATORS = {
+    "frequencies": (
+        "syllabary/generate_frequencies.py",
+        ["--no-checkpoint"],
+        {"name_translit.txt": write_translit, "country_translit.txt": None},
+    ),
+    "syllabary": (
+        "syllabary/make_syllabary.py",
+        ["--no-cache"],
+        {"translit_char_freqs_pronunciation.txt": write_char_freqs},
+    ),
+    "tone_table": (
+        "tonetable/make_tone_table.py",
+        ["--no-cache"],
+        {"frequency_pinyin_table.txt": write_tone_table},
+    ),
+    "homophones": (
+        "homophone_subs/make_homophone_subs_html.py",
+        ["--no-cache"],
+        {"homophone_subs.txt": write_homophones},
+    ),
+}
+
+
+def make_corpus(workdir, generator, lines, syllables):
+    """Write the synthetic inputs for one generator and size into workdir."""
+    rng = random.Random(f"{SEED}-{generator}-{lines}")
+    _, _, inputs = GENERATORS[generator]
+    for filename, writer in inputs.items():
+        path = Path(workdir) / filename
+        if writer is None:
+            path.write_text("# (empty)\n", encoding="utf-8")
+        else:
+            writer(path, lines, rng, syllables)
+
+
+def run_generator(workdir, generator):
+    """
+    Run one generator in workdir.
+
+    Returns:
+        tuple: (wall time in seconds, peak RSS in KiB, --stats report)
+    """
+    script, extra_args, _ = GENERATORS[generator]
+    stats_file = Path(workdir) / "stats.json"
+    command = [
+        sys.executable,
+        str(CHINESE_DIR / script),
+        *extra_args,
+        f"--stats={stats_file}",
+    ]
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        command, cwd=workdir, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    )
+    stderr = process.stderr.read()
+    _, status, usage = os.wait4(process.pid, 0)
+    wall = time.perf_counter() - start
+    # Reaped by wait4 above; tell Popen so it does not wait again.
+    process.returncode = os.waitstatus_to_exitcode(status)
+    process.stderr.close()
+    if process.returncode != 0:
+        raise RuntimeError(
+            f"{generator} failed with exit code {process.returncode}:\n"
+            + stderr.decode("utf-8", "replace")
+        )
+    # ru_maxrss is in KiB on Linux and in bytes on macOS.
+    peak_kib = usage.ru_maxrss // 1024 if sys.platform == "darwin" else usage.ru_maxrss
+    with open(stats_file, "r", encoding="utf-8") as f:
+        report = json.load(f)
+    return wall, peak_kib, report
+
+
+def git_commit():
+    """Return the current commit hash, or None outside a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=CHINESE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(generators, sizes, repeat=1, workdir=None, log=sys.stderr):
+    """
+    Benchmark each generator at each size.
+
+    Args:
+        generators (list): Names from GENERATORS
+        sizes (list): Input sizes in lines
+        repeat (int): Runs per case; the fastest is reported
+        workdir (str): Scratch directory (default: a temporary directory)
+        log: File for progress messages
+
+    Returns:
+        dict: JSON-serializable results
+    """
+    syllables = real_syllables()
+    results = []
+    own_workdir = workdir is None
+    root = Path(tempfile.mkdtemp(prefix="zhgen-bench-") if own_workdir else workdir)
+    try:
+        for generator in generators:
+            for lines in sizes:
+                case_dir = root / f"{generator}-{lines}"
+                case_dir.mkdir(parents=True, exist_ok=True)
+                make_corpus(case_dir, generator, lines, syllables)
+                input_bytes = sum(
+                    (case_dir / name).stat().st_size
+                    for name in GENERATORS[generator][2]
+                )
+                runs = [run_generator(case_dir, generator) for _ in range(repeat)]
+                wall, _, report = min(runs, key=lambda run: run[0])
+                peak = max(run[1] for run in runs)
+                results.append(
+                    {
+                        "generator": generator,
+                        "lines": lines,
+                        "input_bytes": input_bytes,
+                        "wall_s": round(wall, 6),
+                        "lines_per_s": round(lines / wall, 1),
+                        "peak_rss_kib": peak,
+                        "stages": report["stages"],
+                        "counters": report["counters"],
+                    }
+                )
+                print(
+                    f"{generator:12s} {lines:>10,d} lines  {wall:9.3f} s  "
+                    f"{lines / wall:>12,.0f} lines/s  {peak / 1024:8.1f} MiB",
+                    file=log,
+                )
+    finally:
+        if own_workdir:
+            shutil.rmtree(root, ignore_errors=True)
+
+    return {
+        "commit": git_commit(),
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def compare(baseline, current, out=sys.stdout):
+    """Print wall time and peak RSS ratios of current vs baseline results."""
+    old = {(r["generator"], r["lines"]): r for r in baseline["results"]}
+    print(
+        f"Compared with {baseline.get('commit') or 'baseline'} "
+        f"(ratios > 1 are slower or larger):",
+        file=out,
+    )
+    for result in current["results"]:
+        before = old.get((result["generator"], result["lines"]))
+        if before is None:
+            continue
+        time_ratio = result["wall_s"] / before["wall_s"]
+        rss_ratio = result["peak_rss_kib"] / before["peak_rss_kib"]
+        print(
+            f"{result['generator']:12s} {result['lines']:>10,d} lines  "
+            f"time x{time_ratio:5.2f}  rss x{rss_ratio:5.2f}",
+            file=out,
+        )
+
+
+def regressions(
+    baseline, current, tolerance=CHECK_TOLERANCE, min_seconds=CHECK_MIN_SECONDS
+):
+    """
+    Return the cases in current that are slower or larger than baseline.
+
+    Args:
+        baseline (dict): Earlier run_benchmarks() results
+        current (dict): New results for some of the same cases
+        tolerance (float): Allowed growth, e.g. 0.25 for 25%
+        min_seconds (float): Wall time increases below this are ignored
+
+    Returns:
+        list: One message per regression; empty if there are none
+    """
+    old = {(r["generator"], r["lines"]): r for r in baseline["results"]}
+    problems = []
+    for result in current["results"]:
+        before = old.get((result["generator"], result["lines"]))
+        if before is None:
+            continue
+        case = f"{result['generator']} at {result['lines']:,d} lines"
+        wall, wall_before = result["wall_s"], before["wall_s"]
+        if wall > wall_before * (1 + tolerance) and wall - wall_before >= min_seconds:
+            problems.append(
+                f"{case}: wall time {wall:.3f} s, baseline {wall_before:.3f} s"
+            )
+        rss, rss_before = result["peak_rss_kib"], before["peak_rss_kib"]
+        if rss > rss_before * (1 + tolerance):
+            problems.append(
+                f"{case}: peak RSS {rss / 1024:.1f} MiB, "
+                f"baseline {rss_before / 1024:.1f} MiB"
+            )
+    return problems
+
+
+def check_baseline(
+    baseline, tolerance=CHECK_TOLERANCE, repeat=1, workdir=None, log=sys.stderr
+):
+    """
+    Rerun the cases recorded in baseline and look for regressions.
+
+    Args:
+        baseline (dict): Earlier run_benchmarks() results
+        tolerance (float): Allowed growth, e.g. 0.25 for 25%
+        repeat (int): Runs per case, at least as many as the baseline used
+        workdir (str): Scratch directory (default: a temporary directory)
+        log: File for progress messages
+
+    Returns:
+        tuple: (new results, list of regression messages)
+    """
+    recorded = {r["generator"] for r in baseline["results"]}
+    generators = [name for name in GENERATORS if name in recorded]
+    sizes = sorted({r["lines"] for r in baseline["results"]})
+    # Timings are compared best against best.
+    repeat = max(repeat, baseline.get("repeat", 1))
+    results = run_benchmarks(generators, sizes, repeat, workdir, log)
+    return results, regressions(baseline, results, tolerance)
+
+
+def parse_sizes(text):
+    """Parse a comma-separated size list such as "1e3,1e4,250000"."""
+    sizes = []
+    for part in text.split(","):
+        size = int(float(part))
+        if not 1 <= size <= MAX_LINES:
+            raise argparse.ArgumentTypeError(
+                f"size {part} is outside 1..{MAX_LINES:.0e}"
+            )
+        sizes.append(size)
+    return sizes
+
+
+def main(argv=None):
+    """Run the benchmarks, or check them against a baseline, and report."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        type=parse_sizes,
+        default=DEFAULT_SIZES,
+        help="comma-separated input sizes in lines, up to 1e7 (default 1e3,1e4,1e5)",
+    )
+    parser.add_argument(
+        "--generators",
+        default=",".join(GENERATORS),
+        help=f"comma-separated subset of: {', '.join(GENERATORS)}",
+    )
+    parser.add_argument("--repeat", type=int, default=1, help="runs per case")
+    parser.add_argument("--output", "-o", help="write JSON results to this file")
+    parser.add_argument("--compare", metavar="JSON", help="earlier results to compare")
+    parser.add_argument(
+        "--check",
+        metavar="JSON",
+        help="run the generators and sizes in these earlier results and exit "
+        "with status 1 on a time or memory regression",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=CHECK_TOLERANCE,
+        help="with --check, allowed growth as a fraction "
+        f"(default {CHECK_TOLERANCE})",
+    )
+    parser.add_argument("--workdir", help="keep generated inputs in this directory")
+    args = parser.parse_args(argv)
+
+    generators = args.generators.split(",")
+    unknown = [name for name in generators if name not in GENERATORS]
+    if unknown:
+        parser.error(f"unknown generator(s): {', '.join(unknown)}")
+
+    problems = None
+    if args.check:
+        with open(args.check, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        results, problems = check_baseline(
+            baseline, args.tolerance, args.repeat, args.workdir
+        )
+    else:
+        results = run_benchmarks(generators, args.sizes, args.repeat, args.workdir)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+        print(f"Wrote {args.output}", file=sys.stderr)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(json.load(f), results, out=sys.stderr)
+
+    if problems is not None:
+        compare(baseline, results, out=sys.stderr)
+        for problem in problems:
+            print(f"Regression: {problem}", file=sys.stderr)
+        if problems:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,480 @@
+# -*- coding: utf-8 -*-
+
+"""
+Incremental build of all the generated Chinese tables.
+
+Each target in TARGETS names a generator script, the files it reads and the
+files it writes. A target is rebuilt only when it is stale:
+
+    - its command line has changed,
+    - an input, the generator script or a zhgen module it imports has
+      different content than at its last successful run, or
+    - an output is missing or has been changed since then.
+
+A generator's parse cache and checkpoint are keyed on the same modules (see
+zhgen.sources), so a rerun caused by a code change recomputes its results
+instead of reusing ones from the old code.
+
+Content hashes are kept in .build-manifest.json (gitignored). A file whose
+size and modification time match the manifest is not hashed again, so a
+build with nothing to do only stats the files. A target that reads another
+target's output waits for it and is then checked against the new output;
+if the rebuilt output is byte-identical, the target is still up to date.
+Independent targets run in parallel, each generator in its own process, and
+the generators replace their outputs atomically.
+
+Run from the chinese/ directory:
+
+    python3 -m zhgen.build                  # everything that is stale
+    python3 -m zhgen.build tone_table -v    # one target and what it needs
+    python3 -m zhgen.build --dry-run        # list what would run
+    python3 -m zhgen.build --force -j 1     # rebuild everything, serially
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import namedtuple
+
+from zhgen.sources import imported_files
+
+# hashlib and subprocess are imported only when a file has to be hashed or a
+# generator run; a build with nothing to do is dominated by startup time.
+CHINESE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MANIFEST_FILE = os.path.join(CHINESE_DIR, ".build-manifest.json")
+MANIFEST_VERSION = 1
+
+# Files are re-hashed when they were modified this recently before they were
+# recorded, since a second change within the same clock tick would not alter
+# their size or modification time.
+_RACY_NS = 2 * 10**9
+
+# Paths are relative to chinese/; the script runs in its own directory.
+Target = namedtuple("Target", ["name", "script", "args", "inputs", "outputs"])
+
+TARGETS = [
+    Target(
+        "frequencies",
+        "syllabary/generate_frequencies.py",
+        [],
+        ["syllabary/name_translit.txt", "syllabary/country_translit.txt"],
+        ["syllabary/translit_char_freqs_pronunciation.txt"],
+    ),
+    Target(
+        "syllabary",
+        "syllabary/make_syllabary.py",
+        ["--splice", "../syllabary.html"],
+        [
+            "syllabary/translit_char_freqs_pronunciation.txt",
+            # Imported for --from-translit.
+            "syllabary/generate_frequencies.py",
+        ],
+        ["syllabary.html"],
+    ),
+    Target(
+        "tone_table",
+        "tonetable/make_tone_table.py",
+        [],
+        ["tonetable/frequency_pinyin_table.txt"],
+        ["tonetable/tone_table.html"],
+    ),
+    Target(
+        "homophones",
+        "homophone_subs/make_homophone_subs_html.py",
+        ["--output", "homophone_table.html"],
+        ["homophone_subs/homophone_subs.txt"],
+        ["homophone_subs/homophone_table.html"],
+    ),
+]
+
+
+def dependencies(targets):
+    """
+    Return the targets each target depends on.
+
+    A target depends on every target that writes one of its inputs.
+
+    Args:
+        targets (list): Target tuples
+
+    Returns:
+        dict: Target name -> set of target names
+    """
+    writers = {}
+    for target in targets:
+        for output in target.outputs:
+            writers[output] = target.name
+    return {
+        target.name: {
+            writers[path]
+            for path in target.inputs
+            if path in writers and writers[path] != target.name
+        }
+        for target in targets
+    }
+
+
+def select_targets(targets, names):
+    """
+    Return the named targets and everything they depend on, in TARGETS order.
+
+    Raises:
+        KeyError: If a name is not a target
+    """
+    by_name = {target.name: target for target in targets}
+    deps = dependencies(targets)
+    wanted = set()
+    todo = list(names)
+    while todo:
+        name = todo.pop()
+        if name not in by_name:
+            raise KeyError(name)
+        if name not in wanted:
+            wanted.add(name)
+            todo.extend(deps[name])
+    return [target for target in targets if target.name in wanted]
+
+
+def _sha256(path):
+    import hashlib
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class Manifest:
+    """
+    Content hashes of each target's files at its last successful run.
+
+    Args:
+        path (str): The manifest file; a missing or unreadable one is
+            treated as empty, so every target is stale
+    """
+
+    def __init__(self, path=MANIFEST_FILE):
+        self.path = path
+        self.changed = False
+        self._seen = {}  # path -> [size, mtime_ns, sha256] for this run
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        if data.get("version") != MANIFEST_VERSION:
+            data = {}
+        self.targets = data.get("targets", {})
+
+    def fingerprint(self, path):
+        """
+        Return [size, mtime_ns, sha256] for a file relative to chinese/, or
+        None if it does not exist.
+
+        The hash recorded by any target for the same size and modification
+        time is reused instead of reading the file.
+        """
+        if path in self._seen:
+            return self._seen[path]
+        try:
+            st = os.stat(os.path.join(CHINESE_DIR, path))
+        except FileNotFoundError:
+            self._seen[path] = None
+            return None
+        for entry in self.targets.values():
+            recorded = entry["files"].get(path)
+            if recorded and recorded[:2] == [st.st_size, st.st_mtime_ns]:
+                self._seen[path] = recorded
+                return recorded
+        fingerprint = [
+            st.st_size,
+            st.st_mtime_ns,
+            _sha256(os.path.join(CHINESE_DIR, path)),
+        ]
+        if time.time_ns() - st.st_mtime_ns < _RACY_NS:
+            # Don't trust the stat next time; hash it again.
+            fingerprint[1] = None
+        self._seen[path] = fingerprint
+        self.changed = True
+        return fingerprint
+
+    def forget(self, paths):
+        """Drop cached fingerprints of files that a generator has rewritten."""
+        for path in paths:
+            self._seen.pop(path, None)
+
+    def stale_reason(self, target, command):
+        """
+        Return why target needs to be rebuilt, or None if it is up to date.
+        """
+        entry = self.targets.get(target.name)
+        if entry is None:
+            return "never built"
+        if entry["command"] != command:
+            return "command changed"
+        recorded = entry["files"]
+        for path in target_files(target):
+            current = self.fingerprint(path)
+            if current is None:
+                return f"{path} is missing"
+            previous = recorded.get(path)
+            if previous is None or previous[2] != current[2]:
+                return f"{path} changed"
+        if recorded.keys() != set(target_files(target)):
+            return "file list changed"
+        return None
+
+    def record(self, target, command):
+        """Store the current hashes of target's files after a successful run."""
+        self.targets[target.name] = {
+            "command": command,
+            "files": {path: self.fingerprint(path) for path in target_files(target)},
+        }
+        self.changed = True
+
+    def refresh(self, target):
+        """Update the stat fields of an up-to-date target's files."""
+        entry = self.targets[target.name]
+        for path, fingerprint in entry["files"].items():
+            current = self.fingerprint(path)
+            if current != fingerprint:
+                entry["files"][path] = current
+                self.changed = True
+
+    def save(self):
+        """Write the manifest if anything in it changed."""
+        if not self.changed:
+            return
+        from zhgen.pages import write_atomic
+
+        data = {"version": MANIFEST_VERSION, "targets": self.targets}
+        write_atomic(self.path, json.dumps(data, indent=2, sort_keys=True) + "\n")
+        self.changed = False
+
+
+def module_inputs(target):
+    """
+    Return the zhgen modules a target's generator imports, directly or
+    through other modules, relative to chinese/.
+
+    Python files among the target's inputs (a script that the generator
+    imports) are followed as well.
+    """
+    package = os.path.join(CHINESE_DIR, "zhgen")
+    paths = [
+        os.path.join(CHINESE_DIR, path)
+        for path in [target.script, *target.inputs]
+        if path.endswith(".py")
+    ]
+    return [
+        os.path.relpath(path, CHINESE_DIR).replace(os.sep, "/")
+        for path in imported_files(paths, package)
+        if os.path.dirname(path) == package
+    ]
+
+
+def target_files(target):
+    """Return every file whose content decides whether target is stale."""
+    return [target.script, *target.inputs, *module_inputs(target), *target.outputs]
+
+
+def command(target):
+    """Return the command line recorded for target in the manifest."""
+    return [os.path.basename(target.script), *target.args]
+
+
+def run_target(target):
+    """
+    Run a target's generator in its own directory.
+
+    Returns:
+        tuple: (CompletedProcess, seconds)
+    """
+    import subprocess
+
+    start = time.perf_counter()
+    script = os.path.join(CHINESE_DIR, target.script)
+    result = subprocess.run(
+        [sys.executable, os.path.basename(script), *target.args],
+        cwd=os.path.dirname(script),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    return result, time.perf_counter() - start
+
+
+def build(targets, manifest, jobs=1, force=False, dry_run=False, verbose=False):
+    """
+    Bring targets up to date, running independent generators in parallel.
+
+    A target runs once every target it depends on has finished; if one of
+    them failed, it is skipped. The manifest is updated for each target that
+    succeeds, so a failed build only reruns what did not finish.
+
+    Args:
+        targets (list): Target tuples, e.g. from select_targets()
+        manifest (Manifest): Hashes from the last build; updated in place
+        jobs (int): Generators to run at the same time
+        force (bool): Rebuild even up-to-date targets
+        dry_run (bool): Only print what would be rebuilt
+        verbose (bool): Print the output of each generator
+
+    Returns:
+        bool: True if every target is up to date afterwards
+    """
+    names = {target.name for target in targets}
+    deps = {name: needs & names for name, needs in dependencies(targets).items()}
+    pending = list(targets)
+    done = set()  # up to date, or would be rebuilt in a dry run
+    rebuilt = set()
+    failed = set()  # failed or skipped
+    running = {}
+    pool = None
+
+    try:
+        while pending or running:
+            for target in list(pending):
+                needs = deps[target.name]
+                if needs & failed:
+                    print(
+                        f"{target.name}: skipped, {', '.join(sorted(needs & failed))} failed"
+                    )
+                    failed.add(target.name)
+                    pending.remove(target)
+                    continue
+                if not needs <= done:
+                    continue
+                pending.remove(target)
+
+                cmd = command(target)
+                reason = "forced" if force else manifest.stale_reason(target, cmd)
+                if reason is None and dry_run and needs & rebuilt:
+                    reason = "a dependency would be rebuilt"
+                if reason is None:
+                    manifest.refresh(target)
+                    if verbose:
+                        print(f"{target.name}: up to date")
+                    done.add(target.name)
+                    continue
+                if dry_run:
+                    print(f"{target.name}: would run ({reason})")
+                    done.add(target.name)
+                    rebuilt.add(target.name)
+                    continue
+
+                print(f"{target.name}: running {' '.join(cmd)} ({reason})")
+                if pool is None:
+                    from concurrent.futures import ThreadPoolExecutor
+
+                    pool = ThreadPoolExecutor(max_workers=jobs)
+                running[pool.submit(run_target, target)] = target
+
+            if not running:
+                if pending:
+                    # Only reachable if TARGETS has a dependency cycle.
+                    raise RuntimeError(
+                        "cannot order targets: "
+                        + ", ".join(target.name for target in pending)
+                    )
+                break
+
+            from concurrent.futures import FIRST_COMPLETED, wait
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                target = running.pop(future)
+                result, seconds = future.result()
+                manifest.forget(target.outputs)
+                missing = [
+                    path
+                    for path in target.outputs
+                    if manifest.fingerprint(path) is None
+                ]
+                if verbose or result.returncode != 0 or missing:
+                    sys.stdout.write(result.stdout)
+                    sys.stderr.write(result.stderr)
+                if result.returncode != 0:
+                    print(
+                        f"{target.name}: failed with exit status {result.returncode}",
+                        file=sys.stderr,
+                    )
+                    failed.add(target.name)
+                elif missing:
+                    print(
+                        f"{target.name}: did not write {', '.join(missing)}",
+                        file=sys.stderr,
+                    )
+                    failed.add(target.name)
+                else:
+                    manifest.record(target, command(target))
+                    print(f"{target.name}: done in {seconds:.2f}s")
+                    done.add(target.name)
+                    rebuilt.add(target.name)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        if not dry_run:
+            manifest.save()
+
+    return not failed
+
+
+def main(argv=None):
+    """Build the stale targets given on the command line, or all of them."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "targets",
+        nargs="*",
+        metavar="TARGET",
+        help="targets to build, along with the targets they depend on "
+        f"(default all: {', '.join(target.name for target in TARGETS)})",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=0,
+        metavar="N",
+        help="run up to N generators at once (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="rebuild targets even if they are up to date",
+    )
+    parser.add_argument(
+        "--dry-run",
+        "-n",
+        action="store_true",
+        help="print what would be rebuilt and why, without running anything",
+    )
+    parser.add_argument(
+        "--verbose",
+        "-v",
+        action="store_true",
+        help="also list up-to-date targets and show generator output",
+    )
+    args = parser.parse_args(argv)
+    if args.jobs < 0:
+        parser.error("--jobs must be 0 or a positive number")
+    jobs = args.jobs or os.cpu_count() or 1
+
+    try:
+        targets = select_targets(
+            TARGETS, args.targets or [target.name for target in TARGETS]
+        )
+    except KeyError as e:
+        print(f"Error: unknown target {e.args[0]!r}", file=sys.stderr)
+        sys.exit(1)
+
+    manifest = Manifest()
+    if not build(targets, manifest, jobs, args.force, args.dry_run, args.verbose):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+
+"""
+Content-addressed cache of parsed generator inputs.
+
+A generator wraps its parse step in ParseCache.load(). The parsed structure
+is pickled under a key made of the input's SHA-256, the parser's name, a
+hash of the parser's source and of the zhgen modules it imports, and any
+parameters that change the result. An unchanged input is then loaded from
+the cache without being parsed; editing the input or the parsing code gives
+a new key, so stale entries are never returned. Entries past MAX_ENTRIES are evicted, least recently used first.
+
+Parse warnings and --stats skip counters come from the parser, so they only
+appear on runs that actually parse the input.
+
+The cache lives in chinese/.cache (gitignored), or in $ZHGEN_CACHE_DIR.
+"""
+
+import contextlib
+import gc
+import hashlib
+import os
+import pickle
+import tempfile
+from pathlib import Path
+
+from zhgen.sources import source_digest
+from zhgen.stats import NULL_STATS
+
+CACHE_DIR = Path(
+    os.environ.get("ZHGEN_CACHE_DIR")
+    or Path(__file__).resolve().parent.parent / ".cache"
+)
+MAX_ENTRIES = 32
+
+_SUFFIX = ".pickle"
+
+
+@contextlib.contextmanager
+def gc_paused():
+    """
+    Pause the cyclic garbage collector.
+
+    Parsing or unpickling builds many small container objects and no
+    garbage, so the collections their allocations would set off every few
+    thousand objects only cost time.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+class ParseCache:
+    """
+    Pickled parse results keyed by input content and parser source.
+
+    Args:
+        directory (Path): Where entries are stored
+        max_entries (int): Entries kept after each store
+        enabled (bool): If false, load() always parses and stores nothing
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_entries=MAX_ENTRIES, enabled=True):
+        self.directory = Path(directory)
+        self.max_entries = max_entries
+        self.enabled = enabled
+
+    def key(self, name, code, filename, params=()):
+        """
+        Return the cache key for parsing filename.
+
+        Args:
+            name (str): Identifies the parser, e.g. "make_tone_table"
+            code (str or tuple): The Python file holding the parser, usually
+                the caller's __file__, or a tuple of files; their source and
+                that of the zhgen modules they import are part of the key
+            filename (str or tuple): Input file, or a tuple of input files
+                that the result is built from
+            params (tuple): Arguments that change the parse result
+
+        Returns:
+            str: Hex digest
+        """
+        filenames = filename if isinstance(filename, tuple) else (filename,)
+        digests = []
+        for path in filenames:
+            digest = hashlib.sha256()
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+            digests.append(digest.digest())
+        codes = code if isinstance(code, tuple) else (code,)
+        header = repr((name, source_digest(codes), params)).encode("utf-8")
+        return hashlib.sha256(header + b"\0" + b"".join(digests)).hexdigest()
+
+    def load(self, name, code, filename, parse, params=(), stats=NULL_STATS):
+        """
+        Return the parse result for filename, from the cache if possible.
+
+        Args:
+            name (str): Identifies the parser
+            code (str or tuple): The Python file holding the parser
+            filename (str or tuple): Input file, or a tuple of input files
+            parse (callable): Called with no arguments on a cache miss; its
+                result must be picklable
+            params (tuple): Arguments that change the parse result
+            stats (Stats): Counts cache hits and misses
+
+        Returns:
+            The parse result
+        """
+        if not self.enabled:
+            with gc_paused():
+                return parse()
+        try:
+            with stats.stage("read"):
+                path = self.directory / (
+                    self.key(name, code, filename, params) + _SUFFIX
+                )
+        except OSError:
+            # Let the parser report a missing or unreadable input.
+            return parse()
+
+        with stats.stage("read"):
+            result = self._read(path)
+        if result is not None:
+            stats.count("cache.hit")
+            return result[0]
+
+        stats.count("cache.miss")
+        with gc_paused():
+            value = parse()
+        with stats.stage("write"):
+            self._write(path, value)
+        return value
+
+    def _read(self, path):
+        """Return (value,) for a cache entry, or None if it is unusable."""
+        try:
+            with open(path, "rb") as f, gc_paused():
+                value = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # A truncated entry or one pickled from classes that have since
+            # changed; it is rewritten after parsing.
+            return None
+        try:
+            os.utime(path)  # mark as recently used for eviction
+        except OSError:
+            pass
+        return (value,)
+
+    def _write(self, path, value):
+        """Store a cache entry atomically, then evict old entries."""
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            self.evict()
+        except OSError:
+            pass  # caching is best-effort; the result is still returned
+
+    def evict(self):
+        """Delete the least recently used entries beyond max_entries."""
+        entries = []
+        for path in self.directory.glob("*" + _SUFFIX):
+            try:
+                entries.append((path.stat().st_mtime_ns, path))
+            except OSError:
+                continue
+        entries.sort(reverse=True)
+        for _, path in entries[self.max_entries :]:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    def clear(self):
+        """Delete every cache entry."""
+        for path in self.directory.glob("*" + _SUFFIX):
+            path.unlink()
+
+
+def add_cache_argument(parser):
+    """Add the shared --no-cache option to an argparse parser."""
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="parse the input even if it is unchanged, and leave the parse "
+        "cache alone",
+    )
+
+
+def make_cache(no_cache):
+    """Return the ParseCache to use for a run."""
+    return ParseCache(enabled=not no_cache)
@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+
+"""
+Compact counter for (character, syllable) pairs.
+
+PairCounter interns characters and syllables to small integer ids and keeps
+one slot per distinct pair in flat arrays (character id, syllable id,
+count), so a pair costs a few bytes of array space plus one int-keyed dict
+entry instead of a tuple holding two string references. Pairs keep the
+order in which they were first counted, which the generators rely on to
+break ties the same way a dict would.
+
+Sorting and top-N selection use NumPy for large counters when it is
+installed and fall back to the standard library otherwise; both give
+identical results.
+"""
+
+import heapq
+from array import array
+
+# NumPy is optional and takes a noticeable fraction of a second to import, so
+# it is only loaded for counters big enough to benefit from it.
+NUMPY_MIN_PAIRS = 50_000
+_numpy = None
+
+# Syllable ids are packed into the low bits of the pair key.
+_SYLLABLE_BITS = 24
+
+# Lookup dicts that are derived from the arrays; see PairCounter.__getattr__.
+_INDEX_ATTRIBUTES = ("_char_ids", "_syllable_ids", "_pairs")
+
+
+def _load_numpy():
+    """Return the numpy module, or None if it is not installed."""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+        except ImportError:
+            numpy = False
+        _numpy = numpy
+    return _numpy or None
+
+
+class PairCounter:
+    """
+    Counts of (character, syllable) pairs in first-counted order.
+
+    Attributes:
+        chars (list): Interned characters, indexed by character id
+        syllables (list): Interned syllables, indexed by syllable id
+        char_ids (array): Character id of each pair
+        syllable_ids (array): Syllable id of each pair
+        counts (array): Count of each pair
+    """
+
+    def __init__(self, items=()):
+        self.chars = []
+        self.syllables = []
+        self._char_ids = {}
+        self._syllable_ids = {}
+        self._pairs = {}  # packed (char id, syllable id) -> pair index
+        self.char_ids = array("l")
+        self.syllable_ids = array("l")
+        self.counts = array("q")
+        self.update(items)
+
+    def __len__(self):
+        return len(self.counts)
+
+    def __getstate__(self):
+        # Only the arrays and lists need to cross a process boundary.
+        return (
+            self.chars,
+            self.syllables,
+            self.char_ids,
+            self.syllable_ids,
+            self.counts,
+        )
+
+    def __setstate__(self, state):
+        # The lookup dicts are rebuilt by __getattr__ on the first add, so a
+        # counter that is only read or merged never pays for them.
+        self.chars, self.syllables, self.char_ids, self.syllable_ids, self.counts = (
+            state
+        )
+
+    def __getattr__(self, name):
+        if name not in _INDEX_ATTRIBUTES:
+            raise AttributeError(name)
+        self._build_index()
+        return self.__dict__[name]
+
+    def _build_index(self):
+        """Rebuild the lookup dicts from the lists and arrays."""
+        self._char_ids = {char: i for i, char in enumerate(self.chars)}
+        self._syllable_ids = {syllable: i for i, syllable in enumerate(self.syllables)}
+        self._pairs = {
+            (char_id << _SYLLABLE_BITS) | syllable_id: i
+            for i, (char_id, syllable_id) in enumerate(
+                zip(self.char_ids, self.syllable_ids)
+            )
+        }
+
+    def _index(self, char, syllable):
+        """Return the pair index of (char, syllable), adding the pair if new."""
+        char_id = self._char_ids.get(char)
+        if char_id is None:
+            char_id = self._char_ids[char] = len(self.chars)
+            self.chars.append(char)
+        syllable_id = self._syllable_ids.get(syllable)
+        if syllable_id is None:
+            syllable_id = self._syllable_ids[syllable] = len(self.syllables)
+            self.syllables.append(syllable)
+
+        key = (char_id << _SYLLABLE_BITS) | syllable_id
+        index = self._pairs.get(key)
+        if index is None:
+            index = self._pairs[key] = len(self.counts)
+            self.char_ids.append(char_id)
+            self.syllable_ids.append(syllable_id)
+            self.counts.append(0)
+        return index
+
+    def add(self, char, syllable, count=1):
+        """Add count to the pair (char, syllable)."""
+        self.counts[self._index(char, syllable)] += count
+
+    def add_pairs(self, pairs):
+        """Count each (char, syllable) pair in an iterable once."""
+        counts = self.counts
+        index = self._index
+        for char, syllable in pairs:
+            counts[index(char, syllable)] += 1
+
+    def update(self, items):
+        """
+        Add counts from another PairCounter, a mapping of (char, syllable)
+        to count, or an iterable of ((char, syllable), count).
+        """
+        if isinstance(items, PairCounter) and not self.counts:
+            # Merging into an empty counter is a copy of the arrays.
+            self.chars = list(items.chars)
+            self.syllables = list(items.syllables)
+            self.char_ids = items.char_ids[:]
+            self.syllable_ids = items.syllable_ids[:]
+            self.counts = items.counts[:]
+            for name in _INDEX_ATTRIBUTES:
+                self.__dict__.pop(name, None)
+            return
+        if hasattr(items, "items"):
+            items = items.items()
+        counts = self.counts
+        index = self._index
+        for (char, syllable), count in items:
+            counts[index(char, syllable)] += count
+
+    def items(self):
+        """Yield ((char, syllable), count) in first-counted order."""
+        chars = self.chars
+        syllables = self.syllables
+        for char_id, syllable_id, count in zip(
+            self.char_ids, self.syllable_ids, self.counts
+        ):
+            yield (chars[char_id], syllables[syllable_id]), count
+
+    def total(self):
+        """Return the sum of all counts."""
+        return sum(self.counts)
+
+    def _char_ranks(self):
+        """Return each character id's position in sorted character order."""
+        ranks = [0] * len(self.chars)
+        for rank, char_id in enumerate(
+            sorted(range(len(self.chars)), key=self.chars.__getitem__)
+        ):
+            ranks[char_id] = rank
+        return ranks
+
+    def sorted_indices(self, limit=None):
+        """
+        Return pair indexes ordered by descending count, then character.
+
+        Pairs that tie on both keep first-counted order, exactly like a
+        stable sort of dict items would.
+
+        Args:
+            limit (int): Return only the first limit indexes
+
+        Returns:
+            list: Pair indexes
+        """
+        n = len(self.counts)
+        if limit is None or limit > n:
+            limit = n
+        if limit <= 0:
+            return []
+        ranks = self._char_ranks()
+
+        np = _load_numpy() if n >= NUMPY_MIN_PAIRS else None
+        if np is not None:
+            counts = np.frombuffer(self.counts, dtype=np.int64)
+            char_ranks = np.asarray(ranks, dtype=np.int64)[
+                np.frombuffer(self.char_ids, dtype=np.dtype("l"))
+            ]
+            candidates = np.arange(n)
+            if limit < n:
+                # Keep everything that ties with the limit-th count so the
+                # final ordering can still be decided exactly.
+                cutoff = -np.partition(-counts, limit - 1)[limit - 1]
+                candidates = np.flatnonzero(counts >= cutoff)
+            order = np.lexsort(
+                (candidates, char_ranks[candidates], -counts[candidates])
+            )
+            return candidates[order][:limit].tolist()
+
+        counts = self.counts
+        char_ids = self.char_ids
+
+        def key(i):
+            return (-counts[i], ranks[char_ids[i]])
+
+        if limit < n:
+            return heapq.nsmallest(limit, range(n), key=key)
+        return sorted(range(n), key=key)
+
+    def rows_at(self, indices):
+        """Yield a (char, count, syllable) row for each pair index."""
+        chars = self.chars
+        syllables = self.syllables
+        char_ids = self.char_ids
+        syllable_ids = self.syllable_ids
+        counts = self.counts
+        for i in indices:
+            yield chars[char_ids[i]], counts[i], syllables[syllable_ids[i]]
+
+    def rows(self, limit=None):
+        """
+        Yield (char, count, syllable) rows ordered as sorted_indices().
+
+        With a limit, only that many pairs are selected (heap selection),
+        so time and memory beyond the counter itself scale with the limit.
+
+        Args:
+            limit (int): Yield only the first limit rows
+        """
+        return self.rows_at(self.sorted_indices(limit))
+
+    def most_common(self, limit=None):
+        """
+        Return (char, count, syllable) rows ordered as sorted_indices().
+
+        Args:
+            limit (int): Return only the first limit rows
+
+        Returns:
+            list: (char, count, syllable) tuples
+        """
+        return list(self.rows(limit))
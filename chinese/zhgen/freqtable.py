@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+
+"""
+Columnar loader for frequency_pinyin_table.txt.
+
+Each data line is "char<whitespace>rank<whitespace>pinyin", where a pinyin
+ending in "*" marks a secondary reading. FrequencyTable.load() reads the
+file in one pass into parallel columns:
+
+    chars          the character of each line
+    ranks          frequency rank (1 = most frequent)
+    syllable_ids   index into syllables, the distinct toneless spellings
+    tones          tone number, or -1 if the pinyin has none
+    primary        1 for primary readings, 0 for secondary ones
+
+Lines are split with str.split() rather than matched with a regex; a line
+is used when it has exactly three fields and a decimal rank, which is what
+the old r"^(\\S+)\\s+(\\d+)\\s+(\\S+)$" match accepted. A pinyin ending in a
+digit that is not ASCII, such as "ma²", is counted as unparsed as well.
+
+Ranks are grouped into frequency levels by bisecting LEVEL_BOUNDS. select()
+filters rows by level, tone and primary flag; for large tables it uses NumPy
+when it is installed and gives the same result without it.
+"""
+
+from array import array
+from bisect import bisect_right
+
+from zhgen.counts import NUMPY_MIN_PAIRS, _load_numpy
+from zhgen.pinyin import split_tone
+from zhgen.stats import NULL_STATS
+
+# A rank below LEVEL_BOUNDS[i] (and not below the bound before it) is level
+# i; ranks from the last bound up are level len(LEVEL_BOUNDS).
+LEVEL_BOUNDS = (250, 500, 1000, 1500, 2000, 2500)
+
+NO_TONE = -1
+
+
+def frequency_level(rank, bounds=LEVEL_BOUNDS):
+    """Return the frequency level of a rank: 0 for the most frequent."""
+    return bisect_right(bounds, rank)
+
+
+class FrequencyTable:
+    """
+    Parallel columns of a frequency_pinyin_table.txt file.
+
+    Attributes:
+        chars (list): Character of each row
+        ranks (array): Rank of each row
+        syllables (list): Distinct toneless spellings
+        syllable_ids (array): Index into syllables for each row
+        tones (array): Tone of each row, or NO_TONE
+        primary (array): 1 if the row is a primary reading, else 0
+    """
+
+    def __init__(self):
+        self.chars = []
+        self.ranks = array("l")
+        self.syllables = []
+        self.syllable_ids = array("l")
+        self.tones = array("b")
+        self.primary = array("b")
+
+    def __len__(self):
+        return len(self.chars)
+
+    @classmethod
+    def load(cls, filename, stats=NULL_STATS):
+        """
+        Read a frequency_pinyin_table.txt file.
+
+        Args:
+            filename (str): Path to the file
+            stats (Stats): Receives line and skip counters
+
+        Returns:
+            FrequencyTable: One row per data line, in file order
+        """
+        table = cls()
+        chars = table.chars
+        ranks = table.ranks
+        syllables = table.syllables
+        syllable_ids = table.syllable_ids
+        tones = table.tones
+        primary = table.primary
+        ids = {}  # toneless spelling -> syllable id
+        tone_of = {}  # pinyin -> (syllable id, tone), memoized
+
+        lines = blank = comment = unparsed = 0
+        with open(filename, "r", encoding="utf-8") as f:
+            for line in f:
+                lines += 1
+                parts = line.split()
+                if not parts:
+                    blank += 1
+                    continue
+                if parts[0][0] == "#":
+                    comment += 1
+                    continue
+                if len(parts) != 3 or not parts[1].isdecimal():
+                    unparsed += 1
+                    continue
+
+                char, rank, pinyin = parts
+                is_primary = pinyin[-1] != "*"
+                parsed = tone_of.get(pinyin)
+                if parsed is None:
+                    letters, tone = split_tone(pinyin if is_primary else pinyin[:-1])
+                    if tone is None and letters[-1:].isdigit():
+                        # A tone written with a non-ASCII digit, as in "ma²".
+                        unparsed += 1
+                        continue
+                    syllable_id = ids.get(letters)
+                    if syllable_id is None:
+                        syllable_id = ids[letters] = len(syllables)
+                        syllables.append(letters)
+                    parsed = tone_of[pinyin] = (
+                        syllable_id,
+                        NO_TONE if tone is None else tone,
+                    )
+
+                chars.append(char)
+                ranks.append(int(rank))
+                syllable_ids.append(parsed[0])
+                tones.append(parsed[1])
+                primary.append(is_primary)
+
+        stats.count("lines", lines)
+        stats.skip("blank", blank)
+        stats.skip("comment", comment)
+        stats.skip("unparsed", unparsed)
+        return table
+
+    def levels(self, bounds=LEVEL_BOUNDS):
+        """Return the frequency level of every row, as an array."""
+        return array("b", [bisect_right(bounds, rank) for rank in self.ranks])
+
+    def select(
+        self, max_level=None, primary_only=False, tones=None, bounds=LEVEL_BOUNDS
+    ):
+        """
+        Return the indexes of the rows that pass all of the given filters.
+
+        Args:
+            max_level (int): Keep rows whose frequency level is at most this
+            primary_only (bool): Keep only primary readings
+            tones (iterable): Keep only rows with one of these tones
+            bounds (tuple): Level bounds for max_level
+
+        Returns:
+            list: Row indexes in file order
+        """
+        # Levels are bisected from ranks, so "level <= max_level" is the
+        # same as "rank < bounds[max_level]".
+        rank_limit = None
+        if max_level is not None and max_level < len(bounds):
+            rank_limit = bounds[max_level]
+        tone_set = None if tones is None else set(tones)
+
+        np = _load_numpy() if len(self) >= NUMPY_MIN_PAIRS else None
+        if np is not None:
+            keep = np.ones(len(self), dtype=bool)
+            if rank_limit is not None:
+                keep &= np.frombuffer(self.ranks, dtype=np.dtype("l")) < rank_limit
+            if primary_only:
+                keep &= np.frombuffer(self.primary, dtype=np.int8) != 0
+            if tone_set is not None:
+                keep &= np.isin(
+                    np.frombuffer(self.tones, dtype=np.int8), sorted(tone_set)
+                )
+            return np.flatnonzero(keep).tolist()
+
+        ranks = self.ranks
+        primary = self.primary
+        row_tones = self.tones
+        return [
+            i
+            for i in range(len(self))
+            if (rank_limit is None or ranks[i] < rank_limit)
+            and (not primary_only or primary[i])
+            and (tone_set is None or row_tones[i] in tone_set)
+        ]
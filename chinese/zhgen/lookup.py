@@ -0,0 +1,359 @@
+# -*- coding: utf-8 -*-
+
+"""
+Character and syllable lookups over the frequency and transliteration data.
+
+LookupIndex is built from tonetable/frequency_pinyin_table.txt and
+syllabary/translit_char_freqs_pronunciation.txt and answers two kinds of
+query with a single dict access each:
+
+    了      rank and readings of a character, and how often each reading
+            is used in transliterations
+    ma3     characters read ma with tone 3, most frequent first
+    mǎ      the same, with a tone mark
+    ma      characters read ma with any tone
+
+The index is kept in the parse cache (chinese/.cache, see zhgen.cache),
+keyed on both data files, so it is only rebuilt when one of them changes.
+Run from the chinese/ directory:
+
+    python3 -m zhgen.lookup 了 ma3          # one JSON result per query
+    python3 -m zhgen.lookup < queries.txt   # one query per line
+    python3 -m zhgen.lookup --serve         # GET /lookup?q=了 on port 8001
+"""
+
+import argparse
+import json
+import re
+import sys
+from pathlib import Path
+
+from zhgen.cache import add_cache_argument, make_cache
+from zhgen.freqtable import NO_TONE, FrequencyTable
+from zhgen.pinyin import fold_umlaut, split_tone, to_numbered
+from zhgen.stats import NULL_STATS, add_stats_argument, make_stats
+from zhgen.tsv import ColumnReader
+
+CHINESE_DIR = Path(__file__).resolve().parent.parent
+FREQUENCY_FILE = CHINESE_DIR / "tonetable" / "frequency_pinyin_table.txt"
+TRANSLIT_FILE = CHINESE_DIR / "syllabary" / "translit_char_freqs_pronunciation.txt"
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8001
+
+# Latin letters, including ü and tone-marked vowels, with an optional tone
+# number.
+_SYLLABLE_RE = re.compile(r"^[a-zA-ZÀ-ɏ]+[0-5]?$")
+
+
+class LookupIndex:
+    """
+    Prebuilt answers for character and syllable queries.
+
+    Attributes:
+        chars (dict): Character -> (rank or None, readings, translit), where
+            readings is a tuple of (numbered pinyin, is primary) in file
+            order and translit a tuple of (numbered pinyin, count)
+        syllables (dict): (letters, tone) -> tuple of (char, rank, numbered
+            pinyin, is primary) sorted by rank; tone None lists every tone
+    """
+
+    def __init__(self, chars, syllables):
+        self.chars = chars
+        self.syllables = syllables
+
+    def char(self, char):
+        """
+        Return a JSON-ready result for one character, or None if unknown.
+        """
+        entry = self.chars.get(char)
+        if entry is None:
+            return None
+        rank, readings, translit = entry
+        return {
+            "char": char,
+            "rank": rank,
+            "readings": [
+                {"pinyin": pinyin, "primary": primary} for pinyin, primary in readings
+            ],
+            "translit_count": sum(count for _, count in translit),
+            "translit": [
+                {"pinyin": pinyin, "count": count} for pinyin, count in translit
+            ],
+        }
+
+    def syllable(self, letters, tone=None, limit=None):
+        """
+        Return a JSON-ready result for a syllable, or None if unknown.
+
+        Args:
+            letters (str): Toneless syllable, with ü spelled v
+            tone (int): Tone 0-4, or None for every tone
+            limit (int): Return at most this many characters
+        """
+        entries = self.syllables.get((letters, tone))
+        if entries is None:
+            return None
+        return {
+            "syllable": letters,
+            "tone": tone,
+            "count": len(entries),
+            "chars": [
+                {"char": char, "rank": rank, "pinyin": pinyin, "primary": primary}
+                for char, rank, pinyin, primary in entries[:limit]
+            ],
+        }
+
+    def query(self, text, limit=None):
+        """
+        Answer one query: a single character or a pinyin syllable.
+
+        Args:
+            text (str): The query, e.g. "了", "ma3", "mǎ" or "ma"
+            limit (int): For syllables, return at most this many characters
+
+        Returns:
+            dict: The result, with the query under "query"; if nothing
+            matched, it has an "error" key instead
+        """
+        query = text.strip()
+        parsed = parse_syllable(query)
+        if parsed is not None:
+            result = self.syllable(*parsed, limit=limit)
+        elif len(query) == 1:
+            result = self.char(query)
+        else:
+            return {"query": query, "error": "expected a character or a syllable"}
+        if result is None:
+            return {"query": query, "error": "not found"}
+        return {"query": query, **result}
+
+
+def parse_syllable(text):
+    """
+    Parse a pinyin syllable query.
+
+    Args:
+        text (str): e.g. "ma3", "mǎ", "MA", "lü4" or "lv"; tone 5 is read as
+            the neutral tone 0
+
+    Returns:
+        tuple: (letters, tone) with tone None if the query has no tone, or
+        None if text is not a syllable
+    """
+    if not _SYLLABLE_RE.match(text):
+        return None
+    syllable = fold_umlaut(text.lower())
+    if not syllable.isascii():
+        syllable = fold_umlaut(to_numbered(syllable))  # tone mark -> number
+    letters, tone = split_tone(syllable)
+    if not letters.isascii() or not letters.isalpha():
+        return None
+    if tone == 5:
+        tone = 0
+    return letters, tone
+
+
+def build_index(frequency_file, translit_file, stats=NULL_STATS):
+    """
+    Build a LookupIndex from the two data files.
+
+    Args:
+        frequency_file (str): A frequency_pinyin_table.txt file
+        translit_file (str): A translit_char_freqs_pronunciation.txt file
+        stats (Stats): Receives line and skip counters
+
+    Returns:
+        LookupIndex
+    """
+    with stats.stage("parse"):
+        table = FrequencyTable.load(frequency_file, stats)
+        translit = {}
+        reader = ColumnReader(translit_file, (0, 1, 2))
+        for char, count, pinyin in reader:
+            if not count.isdecimal():
+                stats.skip("translit_unparsed")
+                continue
+            translit.setdefault(char, []).append((pinyin, int(count)))
+        stats.skip("translit_unparsed", len(reader.skipped))
+
+    with stats.stage("aggregate"):
+        ranks = {}
+        readings = {}
+        syllables = {}
+        for char, rank, syllable_id, tone, primary in zip(
+            table.chars, table.ranks, table.syllable_ids, table.tones, table.primary
+        ):
+            letters = table.syllables[syllable_id]
+            pinyin = letters if tone == NO_TONE else f"{letters}{tone}"
+            primary = bool(primary)
+            if rank < ranks.get(char, rank + 1):
+                ranks[char] = rank
+            readings.setdefault(char, []).append((pinyin, primary))
+            entry = (char, rank, pinyin, primary)
+            syllables.setdefault((letters, None), []).append(entry)
+            if tone != NO_TONE:
+                syllables.setdefault((letters, tone), []).append(entry)
+
+        chars = {
+            char: (
+                ranks.get(char),
+                tuple(readings.get(char, ())),
+                tuple(translit.get(char, ())),
+            )
+            for char in (*readings, *translit)
+        }
+        # Stable, so characters of equal rank keep file order.
+        for key, entries in syllables.items():
+            entries.sort(key=lambda entry: entry[1])
+            syllables[key] = tuple(entries)
+
+    stats.count("chars", len(chars))
+    stats.count("syllables", len(syllables))
+    return LookupIndex(chars, syllables)
+
+
+def load_index(
+    frequency_file=FREQUENCY_FILE,
+    translit_file=TRANSLIT_FILE,
+    cache=None,
+    stats=NULL_STATS,
+):
+    """Return the LookupIndex for the data files, from the cache if possible."""
+    if cache is None:
+        cache = make_cache(False)
+    return cache.load(
+        "lookup",
+        __file__,
+        (str(frequency_file), str(translit_file)),
+        lambda: build_index(frequency_file, translit_file, stats),
+        stats=stats,
+    )
+
+
+def run_batch(index, queries, out, limit=None):
+    """
+    Answer queries, writing one JSON line per query.
+
+    Blank queries are skipped. Each line is flushed as it is written, so
+    another process can drive the lookup through a pipe.
+    """
+    for text in queries:
+        if not text.strip():
+            continue
+        out.write(json.dumps(index.query(text, limit), ensure_ascii=False) + "\n")
+        out.flush()
+
+
+def serve(index, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """
+    Serve GET /lookup?q=QUERY[&limit=N] as JSON until interrupted.
+
+    Unknown queries get status 404 with the same JSON error as the batch
+    mode.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import parse_qs, urlsplit
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlsplit(self.path)
+            params = parse_qs(url.query)
+            if url.path != "/lookup":
+                return self._send(404, {"error": "use /lookup?q=QUERY"})
+            if "q" not in params:
+                return self._send(400, {"error": "missing q parameter"})
+            try:
+                limit = int(params["limit"][0]) if "limit" in params else None
+                if limit is not None and limit < 0:
+                    raise ValueError(limit)
+            except ValueError:
+                return self._send(
+                    400, {"error": "limit must be 0 or a positive number"}
+                )
+            result = index.query(params["q"][0], limit)
+            self._send(404 if "error" in result else 200, result)
+
+        def _send(self, status, result):
+            body = json.dumps(result, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    print(f"Serving on http://{host}:{server.server_port}/lookup?q=", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main(argv=None):
+    """Answer the queries given on the command line or stdin, or serve them."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "queries",
+        nargs="*",
+        metavar="QUERY",
+        help="characters or syllables to look up (default: read one query "
+        "per line from stdin)",
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        metavar="N",
+        help="list at most N characters per syllable",
+    )
+    parser.add_argument(
+        "--serve",
+        nargs="?",
+        const=DEFAULT_PORT,
+        type=int,
+        metavar="PORT",
+        help=f"answer HTTP requests on {DEFAULT_HOST}:PORT (default {DEFAULT_PORT}) "
+        "instead of reading queries",
+    )
+    parser.add_argument(
+        "--frequency-file",
+        default=FREQUENCY_FILE,
+        help="frequency_pinyin_table.txt to index",
+    )
+    parser.add_argument(
+        "--translit-file",
+        default=TRANSLIT_FILE,
+        help="translit_char_freqs_pronunciation.txt to index",
+    )
+    add_cache_argument(parser)
+    add_stats_argument(parser)
+    args = parser.parse_args(argv)
+    if args.limit is not None and args.limit < 0:
+        parser.error("--limit must be 0 or a positive number")
+    stats = make_stats("lookup", args.stats)
+
+    try:
+        index = load_index(
+            args.frequency_file,
+            args.translit_file,
+            make_cache(args.no_cache),
+            stats,
+        )
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.serve is not None:
+        stats.write(args.stats)
+        serve(index, port=args.serve)
+        return
+
+    with stats.stage("query"):
+        run_batch(index, args.queries or sys.stdin, sys.stdout, args.limit)
+    stats.write(args.stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+
+"""
+Minified and gzipped copies of generated tables.
+
+ArtifactWriter is the last stage of the HTML generators. It optionally
+minifies the table with minify_html() and writes a .gz sibling at zlib
+level 9, then reports the size before and after each step:
+
+    tone_table.html: 137,242 bytes, 118,144 minified (-14%), 11,631 gzipped (-92%)
+
+Minification only removes what cannot change how the table renders:
+
+    - whitespace between tags, where one of the tags belongs to table
+      structure (table, thead, tbody, tr, td, th, ...); inside a cell this
+      is leading or trailing space, and elsewhere it is never displayed
+    - other runs of whitespace become a single character: a newline if
+      the run had one, a space otherwise
+    - whitespace inside tags collapses to single spaces, and a repeated
+      attribute is dropped; browsers ignore every copy after the first,
+      as in the tone table's <td class='tone0' class='empty'>
+
+Text and attribute values are not otherwise touched, and pre, script,
+style and textarea elements are copied as they are. Gzip output has no
+timestamp, so the same table always gives the same bytes.
+"""
+
+import gzip
+import re
+import sys
+
+from zhgen.pages import open_atomic
+from zhgen.stats import NULL_STATS
+
+GZIP_LEVEL = 9
+
+# Elements whose surrounding whitespace is never rendered.
+STRUCTURAL_TAGS = frozenset(
+    ["table", "caption", "colgroup", "col", "thead", "tbody", "tfoot", "tr", "td", "th"]
+)
+
+# HTML whitespace; \s would also match U+3000 and other spaces that render.
+_SPACE_RE = re.compile(r"[ \t\n\r\f]+")
+# Raw elements, comments, and tags; a quoted attribute value in a tag may
+# contain ">".
+_TOKEN_RE = re.compile(
+    r"<(?P<raw>pre|script|style|textarea)\b.*?</(?P=raw)\s*>"
+    r"|<!--.*?-->"
+    r"""|<(?:[^>"']|"[^"]*"|'[^']*')*>""",
+    re.IGNORECASE | re.DOTALL,
+)
+_TAG_NAME_RE = re.compile(r"</?([A-Za-z][A-Za-z0-9-]*)")
+_ATTRIBUTE_RE = re.compile(
+    r"""([^\s"'=<>/]+)(?:\s*=\s*("[^"]*"|'[^']*'|[^\s"'=<>`]+))?"""
+)
+
+
+def _tag_name(tag):
+    match = _TAG_NAME_RE.match(tag)
+    return match.group(1).lower() if match else None
+
+
+def _collapse(space):
+    return "\n" if "\n" in space else " "
+
+
+def _minify_tag(tag):
+    """Collapse whitespace in a start or end tag and drop repeated attributes."""
+    if tag.startswith("</"):
+        return "</" + _tag_name(tag) + ">" if _tag_name(tag) else tag
+    match = _TAG_NAME_RE.match(tag)
+    if match is None:
+        return tag  # <!doctype ...> and the like
+    inner = tag[match.end() : -1]
+    self_closing = inner.rstrip().endswith("/")
+    if self_closing:
+        inner = inner.rstrip()[:-1]
+    seen = set()
+    attributes = []
+    for attribute in _ATTRIBUTE_RE.finditer(inner):
+        name = attribute.group(1).lower()
+        if name in seen:
+            continue
+        seen.add(name)
+        value = attribute.group(2)
+        attributes.append(attribute.group(1) + ("" if value is None else "=" + value))
+    return " ".join([match.group(0), *attributes]) + ("/>" if self_closing else ">")
+
+
+def minify_html(html):
+    """
+    Return html with whitespace and repeated attributes removed where that
+    cannot change how it renders; see the module docstring.
+    """
+    out = []
+    text_start = 0
+    previous_structural = False
+    for match in _TOKEN_RE.finditer(html):
+        token = match.group(0)
+        raw = match.group("raw") is not None or token.startswith("<!")
+        name = None if raw else _tag_name(token)
+        structural = name in STRUCTURAL_TAGS
+        out.append(
+            _minify_text(
+                html[text_start : match.start()], previous_structural, structural
+            )
+        )
+        out.append(token if raw or name is None else _minify_tag(token))
+        previous_structural = structural
+        text_start = match.end()
+    out.append(_minify_text(html[text_start:], previous_structural, False))
+    return "".join(out)
+
+
+def _minify_text(text, after_structural, before_structural):
+    """Minify the text between two tokens."""
+    if not text:
+        return text
+    parts = _SPACE_RE.split(text)
+    if len(parts) == 1:
+        return text
+    spaces = _SPACE_RE.findall(text)
+    result = [parts[0]]
+    for space, part in zip(spaces, parts[1:]):
+        result.append(_collapse(space))
+        result.append(part)
+    # A leading or trailing run next to a structural tag goes entirely.
+    if not parts[0] and after_structural:
+        result[1] = ""
+    if not parts[-1] and before_structural:
+        result[-2] = ""
+    return "".join(result)
+
+
+class ArtifactWriter:
+    """
+    Writes generated tables, minified and gzipped as requested.
+
+    Args:
+        minify (bool): Minify HTML before writing it
+        gzip (bool): Also write path + ".gz"
+        stats (Stats): Receives "minify" and "compress" stage times and
+            bytes.raw, bytes.minified and bytes.gzip counters
+    """
+
+    def __init__(self, minify=False, gzip=False, stats=NULL_STATS):
+        self.minify = minify
+        self.gzip = gzip
+        self.stats = stats
+        self.totals = [0, 0, 0]  # raw, written and gzipped bytes since report()
+
+    @property
+    def enabled(self):
+        return self.minify or self.gzip
+
+    def process(self, html):
+        """Return html as it will be written: minified if requested."""
+        if not self.minify:
+            return html
+        with self.stats.stage("minify"):
+            return minify_html(html)
+
+    def write(self, path, html):
+        """
+        Write html (processed) to path, and its gzip to path + ".gz" if
+        requested.
+
+        Returns:
+            tuple: (raw bytes, written bytes, gzipped bytes or None)
+        """
+        raw_size = len(html.encode("utf-8"))
+        data = self.process(html).encode("utf-8")
+        with open_atomic(path, binary=True) as f:
+            f.write(data)
+        gzip_size = None
+        if self.gzip:
+            with self.stats.stage("compress"):
+                compressed = gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+            with open_atomic(path + ".gz", binary=True) as f:
+                f.write(compressed)
+            gzip_size = len(compressed)
+
+        self.totals[0] += raw_size
+        self.totals[1] += len(data)
+        self.totals[2] += gzip_size or 0
+        self.stats.count("bytes.raw", raw_size)
+        if self.minify:
+            self.stats.count("bytes.minified", len(data))
+        if self.gzip:
+            self.stats.count("bytes.gzip", gzip_size)
+        return raw_size, len(data), gzip_size
+
+    def report(self, name, file=sys.stderr):
+        """
+        Print the size of what was written since the last report, before
+        and after each step, if minifying or gzipping.
+
+        Args:
+            name (str): What was written, e.g. a file or directory name
+            file: Where to print
+        """
+        raw_size, size, gzip_size = self.totals
+        self.totals = [0, 0, 0]
+        if not self.enabled:
+            return
+        parts = [f"{raw_size:,} bytes"]
+        if self.minify:
+            parts.append(f"{size:,} minified ({_change(size, raw_size)})")
+        if self.gzip:
+            parts.append(f"{gzip_size:,} gzipped ({_change(gzip_size, raw_size)})")
+        print(f"{name}: {', '.join(parts)}", file=file)
+
+
+def _change(size, before):
+    if not before:
+        return "0%"
+    return f"{(size - before) / before:+.0%}"
+
+
+def add_artifact_arguments(parser):
+    """Add the shared --minify and --gzip options to an argparse parser."""
+    parser.add_argument(
+        "--minify",
+        action="store_true",
+        help="drop whitespace and repeated attributes that cannot change how "
+        "the HTML renders",
+    )
+    parser.add_argument(
+        "--gzip",
+        action="store_true",
+        help="also write a .gz copy of each output file, compressed at the "
+        "maximum level",
+    )
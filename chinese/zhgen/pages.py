@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+
+"""
+Writing generated tables into the site's pages.
+
+The generators render a <table> fragment. splice_table() puts the rows of
+such a table into the one <table> element of a page, in place of the rows
+already there, keeping the page's own <table ...> tag and indentation.
+write_atomic() and open_atomic() then replace the file in a single step, so
+a failed or interrupted run never leaves a half-written page behind.
+"""
+
+import contextlib
+import os
+import re
+import tempfile
+
+# One nesting level in the pages, which are formatted by Prettier.
+INDENT = "  "
+
+_TABLE_RE = re.compile(
+    r"^(?P<indent>[ \t]*)<table\b[^>]*>[ \t]*\n(?P<body>.*?)^(?P=indent)</table>",
+    re.MULTILINE | re.DOTALL,
+)
+
+
+def splice_table(page, lines):
+    """
+    Replace the contents of the only <table> element in a page.
+
+    Args:
+        page (str): HTML of the whole page
+        lines (iterable): (depth, html) pairs, one per output line; depth 0
+            is a direct child of the table
+
+    Returns:
+        str: The page with the new table contents
+
+    Raises:
+        ValueError: If the page does not contain exactly one <table> whose
+            opening and closing tags sit on their own lines
+    """
+    matches = list(_TABLE_RE.finditer(page))
+    if len(matches) != 1:
+        raise ValueError(f"expected one <table> in the page, found {len(matches)}")
+    match = matches[0]
+    indent = match.group("indent")
+    body = "".join(f"{indent}{INDENT * (depth + 1)}{html}\n" for depth, html in lines)
+    return page[: match.start("body")] + body + page[match.end("body") :]
+
+
+@contextlib.contextmanager
+def open_atomic(path, binary=False):
+    """
+    Open a temporary file next to path for writing, and rename it over path
+    when the with block succeeds. On an exception path is untouched.
+
+    Args:
+        path (str): Destination file
+        binary (bool): Open in binary mode instead of as UTF-8 text
+
+    Yields:
+        A file object
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp"
+    )
+    try:
+        f = os.fdopen(fd, "wb") if binary else os.fdopen(fd, "w", encoding="utf-8")
+        with f:
+            yield f
+        if os.path.exists(path):
+            os.chmod(tmp_path, os.stat(path).st_mode & 0o777)
+        else:
+            os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def write_atomic(path, text):
+    """
+    Write text to path by writing a temporary file next to it and renaming
+    it over the original.
+
+    Args:
+        path (str): Destination file
+        text (str): UTF-8 content
+    """
+    with open_atomic(path) as f:
+        f.write(text)
@@ -0,0 +1,204 @@
+# -*- coding: utf-8 -*-
+
+"""
+Pinyin initial/final grids shared by the table generators.
+
+A Grid is a frozen table of spellings with one row per final and one column
+per initial, built once at import. Lookups in either direction are single
+dict accesses:
+
+    SYLLABARY_GRID.spelling("j", "ve")   -> "jue"
+    SYLLABARY_GRID.position("jue")       -> ("j", "ve")
+
+Cells for combinations that do not occur in Mandarin hold None.
+
+There are two grids because the two pages lay out their tables differently:
+SYLLABARY_GRID is the layout of the transliteration syllabary (finals
+including "er", ü written as v except after j/q/x) and TONE_TABLE_GRID is the
+order in which the tone table lists its syllables, spelled by
+join_initial_final().
+"""
+
+# Column headings; "-" is the zero initial.
+INITIALS = (
+    "-",
+    "b",
+    "p",
+    "m",
+    "f",
+    "d",
+    "t",
+    "n",
+    "l",
+    "g",
+    "k",
+    "h",
+    "z",
+    "c",
+    "s",
+    "zh",
+    "ch",
+    "sh",
+    "r",
+    "j",
+    "q",
+    "x",
+)
+
+_JQX = ("j", "q", "x")
+
+
+class Grid:
+    """
+    Frozen table of pinyin spellings.
+
+    Attributes:
+        initials (tuple): Column headings
+        finals (tuple): Row headings; a final may head more than one row
+        rows (tuple): One tuple of spellings (or None) per final, in the
+            order of initials
+    """
+
+    __slots__ = ("initials", "finals", "rows", "_spellings", "_positions")
+
+    def __init__(self, initials, finals, rows):
+        rows = tuple(tuple(row) for row in rows)
+        spellings = {}
+        positions = {}
+        for final, row in zip(finals, rows):
+            for initial, spelling in zip(initials, row):
+                spellings.setdefault((initial, final), spelling)
+                if spelling is not None:
+                    positions.setdefault(spelling, (initial, final))
+        set_attr = super().__setattr__
+        set_attr("initials", tuple(initials))
+        set_attr("finals", tuple(finals))
+        set_attr("rows", rows)
+        set_attr("_spellings", spellings)
+        set_attr("_positions", positions)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Grid is read-only")
+
+    def __contains__(self, syllable):
+        return syllable in self._positions
+
+    def spelling(self, initial, final):
+        """
+        Return the spelling of initial + final, or None if it has no cell.
+
+        Where a final heads more than one row, the first row is used.
+        """
+        return self._spellings.get((initial, final))
+
+    def position(self, syllable):
+        """
+        Return the (initial, final) of a toneless syllable, or None.
+
+        Where a spelling appears in more than one cell, the first cell in
+        row order is returned.
+        """
+        return self._positions.get(syllable)
+
+    def spellings(self):
+        """Yield every spelling in row order, skipping empty cells."""
+        for row in self.rows:
+            for spelling in row:
+                if spelling is not None:
+                    yield spelling
+
+
+def join_initial_final(initial, final):
+    """Given initial and final, return the standard way of writing in pinyin."""
+    if initial == "-":
+        if final == "u":
+            final = "wu"
+        elif final == "i":
+            final = "yi"
+        elif final == "ui":
+            final = "wei"
+        elif final.startswith("v"):
+            final = "yu" + final[1:]
+        elif final.startswith("i"):
+            final = "y" + final[1:]
+        elif final.startswith("u"):
+            final = "w" + final[1:]
+        initial = ""
+    else:
+        if final == "iou":
+            final = "iu"
+        elif final == "uen":
+            final = "un"
+
+    if initial in ["j", "q", "x"]:
+        if final.startswith("u"):
+            final = "X" + final[1:]
+        final = final.replace("v", "u")
+
+    return initial + final
+
+
+def _syllabary_grid():
+    """Build the syllabary layout. "x" marks an impossible cell."""
+    # fmt: off
+    finals = (
+        "er", "a", "o", "e", "ai", "ei", "ao", "ou", "an", "en", "ang", "eng",
+        "ong", "i", "ia", "iao", "ie", "iou", "ian", "in", "iang", "ing",
+        "iong", "u", "ua", "uo", "uai", "uei", "uan", "uen", "uang", "ueng",
+        "v", "ve", "ve", "van", "vn",
+    )
+    zero_initial = (
+        "er", "a", "o", "e", "ai", "ei", "ao", "ou", "an", "en", "ang", "eng",
+        "ong", "yi", "ya", "yao", "ye", "you", "yan", "yin", "yang", "ying",
+        "yong", "wu", "wa", "wo", "wai", "wei", "wan", "wen", "wang", "weng",
+        "yu", "yue", "yuan", "yun", "x",
+    )
+    normal = (
+        "er", "a", "o", "e", "ai", "ei", "ao", "ou", "an", "en", "ang", "eng",
+        "ong", "i", "ia", "iao", "ie", "iu", "ian", "in", "iang", "ing",
+        "iong", "u", "ua", "uo", "uai", "ui", "uan", "uen", "uang", "ueng",
+        "v", "ve", "ve", "van", "vn",
+    )
+    jqx = (
+        "er", "a", "o", "e", "ai", "ei", "ao", "ou", "an", "en", "ang", "eng",
+        "ong", "i", "ia", "iao", "ie", "iu", "ian", "in", "iang", "ing",
+        "iong", "x", "ua", "uo", "uai", "ui", "uan", "uen", "uang", "ueng",
+        "u", "ue", "ue", "uan", "un",
+    )
+    # fmt: on
+    columns = [zero_initial]
+    for initial in INITIALS[1:]:
+        column = jqx if initial in _JQX else normal
+        columns.append([initial + final for final in column])
+    rows = []
+    for final_index in range(len(finals)):
+        row = []
+        for column in columns:
+            spelling = column[final_index]
+            row.append(None if spelling.endswith("x") else spelling)
+        rows.append(row)
+    return Grid(INITIALS, finals, rows)
+
+
+def _tone_table_grid():
+    """Build the tone table order. Spellings marked "X" are impossible."""
+    # fmt: off
+    finals = (
+        "a", "o", "e", "ai", "ei", "ao", "ou", "an", "en", "ang", "eng", "ong",
+        "i", "ia", "iao", "ie", "iou", "ian", "in", "iang", "ing", "iong",
+        "u", "ua", "uo", "uai", "ui", "uan", "uen", "uang", "ueng",
+        "v", "ve", "van", "vn",
+    )
+    # fmt: on
+    rows = []
+    for final in finals:
+        row = []
+        for initial in INITIALS:
+            spelling = join_initial_final(initial, final)
+            row.append(None if "X" in spelling else spelling)
+        rows.append(row)
+    return Grid(INITIALS, finals, rows)
+
+
+SYLLABARY_GRID = _syllabary_grid()
+TONE_TABLE_GRID = _tone_table_grid()
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+
+"""
+Pinyin normalization shared by the generator scripts.
+
+Converts between tone-marked pinyin (fā) and tone-numbered pinyin (fa1).
+All lookup tables are built once at import time, and syllables that have
+been seen before are served from a bounded memo, so normalizing a large
+corpus costs roughly one dict lookup per syllable.
+
+Tone-marked ü (ǖ ǘ ǚ ǜ) becomes "v", as in the tone and syllabary tables.
+A bare ü is left alone unless fold_umlaut() is applied.
+"""
+
+import functools
+import re
+
+DEFAULT_TONE = "1"
+
+# Base letter -> marked vowels for tones 1-4.
+_MARKED_VOWELS = {
+    "a": "āáǎà",
+    "e": "ēéěè",
+    "i": "īíǐì",
+    "o": "ōóǒò",
+    "u": "ūúǔù",
+    "v": "ǖǘǚǜ",
+}
+
+# Marked vowel (either case) -> (base letter, tone digit).
+TONE_MARKS = {}
+for _base, _marks in _MARKED_VOWELS.items():
+    for _tone, _mark in enumerate(_marks, 1):
+        TONE_MARKS[_mark] = (_base, str(_tone))
+        TONE_MARKS[_mark.upper()] = (_base, str(_tone))
+# Breve forms that turn up in hand-typed data in place of the caron.
+TONE_MARKS["ŏ"] = TONE_MARKS["Ŏ"] = ("o", "3")
+TONE_MARKS["ŭ"] = TONE_MARKS["Ŭ"] = ("u", "3")
+
+# (base letter, tone digit) -> lowercase marked vowel.
+_ADD_MARK = {
+    (base, str(tone)): mark
+    for base, marks in _MARKED_VOWELS.items()
+    for tone, mark in enumerate(marks, 1)
+}
+
+_STRIP_MARKS = str.maketrans({mark: base for mark, (base, _) in TONE_MARKS.items()})
+_MARK_RE = re.compile("[" + "".join(TONE_MARKS) + "]")
+_VOWELS = "aeiouv"
+
+# Tone numbers are ASCII digits. str.isdigit() also accepts "²" or "٣", which
+# int() then rejects, and those are not tones.
+_DIGITS = "0123456789"
+
+# Entries in the memo of raw syllable -> numbered syllable. A real corpus has
+# a few thousand distinct syllables at most; the bound only matters for input
+# that is not pinyin at all.
+MEMO_SIZE = 1 << 16
+
+
+@functools.lru_cache(maxsize=MEMO_SIZE)
+def to_numbered(syllable):
+    """
+    Convert one syllable to lowercase tone-number form.
+
+    Syllables with neither a tone mark nor a tone number get DEFAULT_TONE.
+
+    Args:
+        syllable (str): A syllable such as "Fā", "fa1" or "fa"
+
+    Returns:
+        str: The syllable with a trailing tone number, e.g. "fa1"
+    """
+    text = syllable.lower()
+    match = _MARK_RE.search(text)
+    if match:
+        tone = TONE_MARKS[match.group()][1]
+        text = text.translate(_STRIP_MARKS)
+    else:
+        tone = DEFAULT_TONE
+    if text and text[-1] not in _DIGITS:
+        text += tone
+    return text
+
+
+def to_numbered_many(syllables):
+    """
+    Convert a sequence of syllables to tone-number form in one call.
+
+    Args:
+        syllables (iterable): Syllables as accepted by to_numbered()
+
+    Returns:
+        list: Numbered syllables, in input order
+    """
+    return list(map(to_numbered, syllables))
+
+
+def split_syllables(text):
+    """
+    Split whitespace-separated pinyin text into numbered syllables.
+
+    Args:
+        text (str): Pinyin text, e.g. "Ā lì yà"
+
+    Returns:
+        list: Numbered syllables, e.g. ["a1", "li4", "ya4"]
+    """
+    return to_numbered_many(text.split())
+
+
+def normalize_column(texts):
+    """
+    Normalize a whole column of pinyin texts at once.
+
+    Args:
+        texts (iterable): Pinyin texts, one per record
+
+    Returns:
+        list: One list of numbered syllables per input text
+    """
+    return [to_numbered_many(text.split()) for text in texts]
+
+
+def split_tone(syllable):
+    """
+    Split a numbered syllable into its letters and tone number.
+
+    Args:
+        syllable (str): A numbered syllable such as "fa1"
+
+    Returns:
+        tuple: (letters, tone) where tone is an int, or None if the
+        syllable has no trailing ASCII tone number
+    """
+    if len(syllable) > 1 and syllable[-1] in _DIGITS:
+        return syllable[:-1], int(syllable[-1])
+    return syllable, None
+
+
+def strip_tone(syllable):
+    """Return a numbered syllable without its tone number: "fa1" -> "fa"."""
+    return syllable[:-1] if syllable and syllable[-1] in _DIGITS else syllable
+
+
+def fold_umlaut(text):
+    """Spell ü as v, the way the tone and syllabary tables do."""
+    return text.replace("ü", "v").replace("Ü", "v")
+
+
+def to_marked(syllable):
+    """
+    Convert a numbered syllable to tone-marked form: "lve4" -> "lüè".
+
+    The mark goes on a or e if present, on the o of "ou", and otherwise on
+    the last vowel. Tones 0 and 5 (neutral) get no mark.
+
+    Args:
+        syllable (str): A numbered syllable
+
+    Returns:
+        str: The syllable with a tone mark and ü in place of v
+    """
+    letters, tone = split_tone(fold_umlaut(syllable.lower()))
+    if tone is None or not 1 <= tone <= 4:
+        return letters.replace("v", "ü")
+
+    if "a" in letters:
+        index = letters.index("a")
+    elif "e" in letters:
+        index = letters.index("e")
+    elif "ou" in letters:
+        index = letters.index("o")
+    else:
+        index = max(letters.rfind(vowel) for vowel in _VOWELS)
+        if index < 0:
+            return letters.replace("v", "ü")
+
+    mark = _ADD_MARK[(letters[index], str(tone))]
+    return (letters[:index] + mark + letters[index + 1 :]).replace("v", "ü")
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+
+"""
+Sharded output of a generated table.
+
+Instead of one file holding the whole table, write_shards() writes a
+directory with one fragment per group of rows and a manifest.json:
+
+    {
+      "version": 1,
+      "prefix": "<table>\\n<tr><th></th>...</tr>\\n",
+      "suffix": "</table>",
+      "rows": 412,
+      "bytes": 126759,
+      "shards": [
+        {"key": "er", "file": "er.html", "rows": 1, "bytes": 287},
+        {"key": "a", "file": "a.html", "rows": 20, "bytes": 6120},
+        ...
+      ]
+    }
+
+A fragment holds complete <tr> rows and nothing else. The prefix, then every
+fragment in manifest order, then the suffix give exactly the single-file
+table, which is what assemble() returns. So a page can render the prefix and
+suffix up front and fetch the fragments as their sections come into view.
+
+Fragments are written first and the manifest last, each atomically. Fragments
+named only in a previous manifest are removed afterwards.
+"""
+
+import json
+import os
+import re
+
+from zhgen.pages import write_atomic
+from zhgen.stats import NULL_STATS
+
+MANIFEST = "manifest.json"
+SHARDS_VERSION = 1
+
+_KEY_RE = re.compile(r"^[a-z0-9_-]+$")
+
+
+def shard_directory(output_file):
+    """Return the shard directory for a table file: "tone_table.html" -> "tone_table"."""
+    return os.path.splitext(output_file)[0]
+
+
+def read_manifest(directory):
+    """Return the manifest in directory, or None if there is none."""
+    try:
+        with open(os.path.join(directory, MANIFEST), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_shards(directory, prefix, shards, suffix, stats=NULL_STATS, writer=None):
+    """
+    Write a table as fragments plus a manifest.
+
+    Args:
+        directory (str): Created if needed
+        prefix (str): Everything before the first row
+        shards (iterable): (key, html, rows) per fragment, in table order;
+            key names the file and must be lowercase letters, digits, "_" or
+            "-"; html holds the rows, ending in a newline
+        suffix (str): Everything after the last row
+        stats (Stats): Receives a count of shards written
+        writer (ArtifactWriter): Writes the fragments, minified and
+            gzipped as it was asked to; prefix and suffix are minified to
+            match
+
+    Returns:
+        dict: The manifest
+
+    Raises:
+        ValueError: For a bad or repeated key
+    """
+    os.makedirs(directory, exist_ok=True)
+    previous = read_manifest(directory)
+
+    if writer is not None:
+        prefix = writer.process(prefix)
+        suffix = writer.process(suffix)
+    entries = []
+    total_rows = 0
+    total_bytes = len(prefix.encode("utf-8")) + len(suffix.encode("utf-8"))
+    for key, html, rows in shards:
+        if not _KEY_RE.match(key) or key == os.path.splitext(MANIFEST)[0]:
+            raise ValueError(f"bad shard key {key!r}")
+        filename = f"{key}.html"
+        if any(entry["file"] == filename for entry in entries):
+            raise ValueError(f"repeated shard key {key!r}")
+        path = os.path.join(directory, filename)
+        if writer is None:
+            write_atomic(path, html)
+            size = len(html.encode("utf-8"))
+        else:
+            _, size, _ = writer.write(path, html)
+        entries.append({"key": key, "file": filename, "rows": rows, "bytes": size})
+        total_rows += rows
+        total_bytes += size
+        stats.count("shards")
+
+    manifest = {
+        "version": SHARDS_VERSION,
+        "prefix": prefix,
+        "suffix": suffix,
+        "rows": total_rows,
+        "bytes": total_bytes,
+        "shards": entries,
+    }
+    write_atomic(
+        os.path.join(directory, MANIFEST),
+        json.dumps(manifest, ensure_ascii=False, indent=2) + "\n",
+    )
+
+    if previous is not None:
+        current = {entry["file"] for entry in entries}
+        for entry in previous.get("shards", ()):
+            if entry["file"] not in current:
+                for stale in (entry["file"], entry["file"] + ".gz"):
+                    try:
+                        os.unlink(os.path.join(directory, stale))
+                    except OSError:
+                        pass
+    return manifest
+
+
+def assemble(directory):
+    """
+    Return the single-file table from a shard directory.
+
+    Raises:
+        ValueError: If the directory has no readable manifest
+    """
+    manifest = read_manifest(directory)
+    if manifest is None:
+        raise ValueError(f"no {MANIFEST} in {directory}")
+    parts = [manifest["prefix"]]
+    for entry in manifest["shards"]:
+        with open(os.path.join(directory, entry["file"]), "r", encoding="utf-8") as f:
+            parts.append(f.read())
+    parts.append(manifest["suffix"])
+    return "".join(parts)
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+
+"""
+The source files a generator's results depend on.
+
+A generator's output is decided by its own script and by the zhgen modules
+it imports, directly or through other modules. build.py rebuilds a target
+when one of them changes, and the parse cache and generate_frequencies.py's
+checkpoint fold a hash of them into their keys, so a result computed by
+older code is never reused.
+"""
+
+import functools
+import os
+import re
+
+ZHGEN_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# "from zhgen.x import ...", "import zhgen.x" and "from zhgen import x, y".
+# The generators import one module per line, which is all this matches.
+_IMPORT_RE = re.compile(
+    r"^[ \t]*(?:from|import)[ \t]+zhgen\.(\w+)"
+    r"|^[ \t]*from[ \t]+zhgen[ \t]+import[ \t]+([\w \t,]+)",
+    re.MULTILINE,
+)
+
+
+@functools.lru_cache(maxsize=None)
+def zhgen_imports(path, package):
+    """
+    Return the zhgen modules imported by a Python file, as absolute paths.
+
+    Args:
+        path (str): The Python file
+        package (str): The zhgen directory the imports resolve to
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    modules = set()
+    for match in _IMPORT_RE.finditer(text):
+        names = [match.group(1)] if match.group(1) else match.group(2).split(",")
+        modules.add(os.path.join(package, "__init__.py"))
+        for name in names:
+            module = os.path.join(package, name.strip() + ".py")
+            if os.path.exists(module):
+                modules.add(module)
+    return frozenset(modules)
+
+
+def imported_files(paths, package=None):
+    """
+    Return Python files and the zhgen modules they import, directly or
+    through other modules.
+
+    Args:
+        paths (iterable): Python files
+        package (str): The zhgen directory the imports resolve to, by
+            default ZHGEN_DIR
+
+    Returns:
+        list: Absolute paths, sorted
+    """
+    package = package or ZHGEN_DIR
+    todo = [os.path.abspath(path) for path in paths]
+    seen = set()
+    while todo:
+        path = todo.pop()
+        if path not in seen:
+            seen.add(path)
+            todo.extend(zhgen_imports(path, package))
+    return sorted(seen)
+
+
+def source_digest(paths):
+    """
+    Return a hash of Python files and of every zhgen module they import.
+
+    Args:
+        paths (iterable): Python files, e.g. a generator's __file__
+
+    Returns:
+        str: Hex digest; it changes whenever any of the files does
+    """
+    import hashlib
+
+    digest = hashlib.sha256()
+    for path in imported_files(paths):
+        with open(path, "rb") as f:
+            source = f.read()
+        name = os.path.basename(path).encode("utf-8")
+        digest.update(b"%s\0%d\0%s" % (name, len(source), source))
+    return digest.hexdigest()
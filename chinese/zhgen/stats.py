@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+
+"""
+Per-stage timing and counters for the generator scripts.
+
+A generator creates one Stats object with make_stats() and passes it down to
+the functions it calls. Stages are timed with "with stats.stage(name):" and
+events are tallied with stats.count() and stats.skip(). When --stats is not
+given, make_stats() returns NULL_STATS, whose methods do nothing, so the
+instrumentation costs one no-op call per event.
+
+Stage names used by the generators:
+    read       reading input files
+    parse      parsing input lines (fused with read when streaming)
+    aggregate  combining parsed records (counting, merging, winner picking)
+    render     building the output (sorting, HTML)
+    write      writing the output
+
+Counter names are dotted: "lines" for lines read, "skipped.<reason>" for
+lines that were ignored, and generator-specific ones such as
+"mismatch.more_chars".
+"""
+
+import json
+import sys
+import time
+from contextlib import nullcontext
+
+_NULL_CONTEXT = nullcontext()
+
+
+class _Stage:
+    """Context manager that adds its elapsed time to a Stats stage."""
+
+    __slots__ = ("stats", "name", "start")
+
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        stages = self.stats.stages
+        stages[self.name] = stages.get(self.name, 0.0) + (
+            time.perf_counter() - self.start
+        )
+        return False
+
+
+class Stats:
+    """Collects stage timings and counters for one generator run."""
+
+    enabled = True
+
+    def __init__(self, script):
+        self.script = script
+        self.stages = {}
+        self.counters = {}
+        self._start = time.perf_counter()
+
+    def stage(self, name):
+        """Return a context manager that times one stage."""
+        return _Stage(self, name)
+
+    def count(self, name, n=1):
+        """Add n to a counter."""
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def skip(self, reason, n=1):
+        """Record n lines skipped for the given reason."""
+        self.count(f"skipped.{reason}", n)
+
+    def merge(self, report):
+        """
+        Add the stages and counters of a report() collected elsewhere, e.g.
+        in a worker process. Stage times from parallel workers add up to
+        more than the wall time they took.
+        """
+        for name, seconds in report["stages"].items():
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+        for name, n in report["counters"].items():
+            self.count(name, n)
+
+    def report(self):
+        """Return the collected data as a JSON-serializable dict."""
+        return {
+            "script": self.script,
+            "total_s": round(time.perf_counter() - self._start, 6),
+            "stages": {name: round(s, 6) for name, s in self.stages.items()},
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+    def write(self, destination):
+        """Write the report as JSON to a file path, or to stderr for "-"."""
+        text = json.dumps(self.report(), ensure_ascii=False, indent=2) + "\n"
+        if destination == "-":
+            sys.stderr.write(text)
+        else:
+            with open(destination, "w", encoding="utf-8") as f:
+                f.write(text)
+
+
+class _NullStats:
+    """Stand-in for Stats when --stats is off; every method is a no-op."""
+
+    enabled = False
+    stages = {}
+    counters = {}
+
+    def stage(self, name):
+        return _NULL_CONTEXT
+
+    def count(self, name, n=1):
+        pass
+
+    def skip(self, reason, n=1):
+        pass
+
+    def merge(self, report):
+        pass
+
+    def write(self, destination):
+        pass
+
+
+NULL_STATS = _NullStats()
+
+
+def add_stats_argument(parser):
+    """Add the shared --stats [FILE] option to an argparse parser."""
+    parser.add_argument(
+        "--stats",
+        nargs="?",
+        const="-",
+        metavar="FILE",
+        help="write per-stage timings and counters as JSON to FILE "
+        "(default: stderr)",
+    )
+
+
+def make_stats(script, destination):
+    """Return a Stats for script if destination is set, else NULL_STATS."""
+    return Stats(script) if destination else NULL_STATS
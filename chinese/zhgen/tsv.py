@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+
+"""
+Memory-mapped reader for tab-separated data files.
+
+ColumnReader maps the input and walks it in blocks of whole lines, splitting
+records on raw bytes. Only the requested columns of data lines are decoded;
+comment lines, blank lines and the other columns never become str objects.
+Memory use is bounded by BLOCK_SIZE, so multi-gigabyte inputs stream without
+being held in RAM.
+
+write_rows() is the output-side counterpart: it formats rows as tab-separated
+lines and writes them in chunks rather than one write() call per line.
+
+Lines are interpreted exactly as the text-mode loops in the generators do
+(strip the line, skip it if empty or starting with "#", split on tabs).
+The rare lines where byte-level stripping could disagree with str.strip(),
+such as lines edged by non-ASCII whitespace or holding a bare carriage
+return, are handed to the same str-based logic instead.
+"""
+
+import io
+import mmap
+import os
+import re
+
+BLOCK_SIZE = 1 << 22
+
+# Rows per write() call in write_rows().
+WRITE_CHUNK_ROWS = 4096
+
+_HASH = 0x23
+
+# Characters that str.strip() removes but bytes.strip() keeps: U+001C-U+001F,
+# U+0085, U+00A0, U+1680, U+2000-U+200A, U+2028, U+2029, U+202F, U+205F and
+# U+3000. A bytes-stripped line edged by one of these needs the str path.
+_EXTRA_SPACES = tuple(
+    chr(code).encode("utf-8")
+    for code in [
+        *range(0x1C, 0x20),
+        0x85,
+        0xA0,
+        0x1680,
+        *range(0x2000, 0x200B),
+        0x2028,
+        0x2029,
+        0x202F,
+        0x205F,
+        0x3000,
+    ]
+)
+_EXTRA_SPACE_RE = re.compile(b"|".join(re.escape(space) for space in _EXTRA_SPACES))
+
+
+class ColumnReader:
+    """
+    Iterate over selected columns of a tab-separated file.
+
+    Iterating yields one tuple of decoded strings per data line. After
+    iteration, line_count holds the number of lines read, blank_count and
+    comment_count the number of blank and comment lines, and skipped holds
+    (line_num, line) for each data line with too few columns. Line numbers
+    are relative to start.
+
+    Args:
+        filename (str): Path to a UTF-8 file
+        columns (tuple): Zero-based indexes of the columns to yield
+        start (int): First byte to read; must be the start of a line
+        end (int): End of the range (default: end of file); must be the end
+            of a line or the end of the file
+    """
+
+    def __init__(self, filename, columns, start=0, end=None):
+        self.filename = filename
+        self.columns = tuple(columns)
+        self.start = start
+        self.end = end
+        self.line_count = 0
+        self.blank_count = 0
+        self.comment_count = 0
+        self.skipped = []
+
+    def __iter__(self):
+        with open(self.filename, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            end = size if self.end is None else min(self.end, size)
+            if end <= self.start:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                pos = self.start
+                while pos < end:
+                    limit = min(pos + BLOCK_SIZE, end)
+                    stop = mm.rfind(b"\n", pos, limit) + 1 if limit < end else end
+                    if stop <= pos:
+                        # A single line longer than BLOCK_SIZE.
+                        newline = mm.find(b"\n", limit, end)
+                        stop = end if newline < 0 else newline + 1
+                    yield from self._block_records(mm[pos:stop])
+                    pos = stop
+
+    def _block_records(self, block):
+        """Yield the records in a block of whole lines."""
+        columns = self.columns
+        last = max(columns)
+        pair = columns if len(columns) == 2 else None
+        skipped = self.skipped
+        # Most blocks contain neither, so check once per block, not per line.
+        check_cr = b"\r" in block
+        check_edges = _EXTRA_SPACE_RE.search(block) is not None
+
+        lines = block.split(b"\n")
+        if lines[-1] == b"":
+            lines.pop()  # the block ended with a newline
+
+        line_count = self.line_count
+        for raw in lines:
+            if check_cr and raw.find(b"\r", 0, len(raw) - 1) >= 0:
+                self.line_count = line_count
+                yield from self._slow_records(raw)
+                line_count = self.line_count
+                continue
+
+            line_count += 1
+            line = raw.strip()
+            if not line:
+                self.blank_count += 1
+                continue
+            if line[0] == _HASH:
+                self.comment_count += 1
+                continue
+            if check_edges and (
+                line.startswith(_EXTRA_SPACES) or line.endswith(_EXTRA_SPACES)
+            ):
+                self.line_count = line_count - 1
+                yield from self._slow_records(raw)
+                line_count = self.line_count
+                continue
+
+            parts = line.split(b"\t", last + 1)
+            if len(parts) <= last:
+                skipped.append((line_count, line.decode("utf-8")))
+            elif pair:
+                yield parts[pair[0]].decode("utf-8"), parts[pair[1]].decode("utf-8")
+            else:
+                yield tuple([parts[column].decode("utf-8") for column in columns])
+        self.line_count = line_count
+
+    def _slow_records(self, raw):
+        """Handle one raw line (possibly holding bare CRs) via str methods."""
+        last = max(self.columns)
+        for line in io.StringIO(raw.decode("utf-8"), newline=None):
+            self.line_count += 1
+            line = line.strip()
+            if not line:
+                self.blank_count += 1
+                continue
+            if line.startswith("#"):
+                self.comment_count += 1
+                continue
+            parts = line.split("\t")
+            if len(parts) <= last:
+                self.skipped.append((self.line_count, line))
+                continue
+            yield tuple(parts[column] for column in self.columns)
+
+
+def write_rows(f, rows, chunk_rows=WRITE_CHUNK_ROWS):
+    """
+    Write rows as tab-separated lines, chunk_rows lines per write() call.
+
+    Rows are consumed lazily, so a generator of rows is never materialized
+    beyond one chunk.
+
+    Args:
+        f: A text file object
+        rows (iterable): Tuples of values; each is formatted with str()
+        chunk_rows (int): Number of lines to join per write
+
+    Returns:
+        int: Number of rows written
+    """
+    written = 0
+    chunk = []
+    append = chunk.append
+    for row in rows:
+        append("\t".join(map(str, row)))
+        if len(chunk) >= chunk_rows:
+            f.write("\n".join(chunk) + "\n")
+            written += len(chunk)
+            chunk.clear()
+    if chunk:
+        f.write("\n".join(chunk) + "\n")
+        written += len(chunk)
+    return written